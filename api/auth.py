@@ -1,4 +1,5 @@
 from api.service_names import Service
+from utils.async_base_request import AsyncBaseRequest
 from utils.base_request import BaseRequest
 
 
@@ -65,3 +66,29 @@ class AuthAPI(BaseRequest):
         json_data = {'old_password': old_password, 'new_password': new_password}
         result = self.put('/user/password', json=json_data)
         return result
+
+
+class AsyncAuthAPI(AsyncBaseRequest):
+    """`AuthAPI` 的非同步版本，供 async 測試在不阻塞事件迴圈的前提下呼叫
+
+    路徑與請求內容必須與 `AuthAPI` 保持一致，各方法的說明見同名的同步方法。
+    """
+
+    service = Service.FRONT
+
+    ws_url_from = staticmethod(AuthAPI.ws_url_from)
+
+    async def register(self, account: str, password: str) -> dict:
+        """註冊帳號，見 `AuthAPI.register`"""
+        json_data = {'account': account, 'password': password}
+        return await self.post('/auth/register', json=json_data)
+
+    async def login(self, account: str, password: str) -> dict:
+        """使用帳號密碼登入，見 `AuthAPI.login`"""
+        json_data = {'account': account, 'password': password}
+        return await self.post('/auth/login', json=json_data)
+
+    async def change_password(self, old_password: str, new_password: str) -> dict:
+        """變更已登入使用者的密碼，見 `AuthAPI.change_password`"""
+        json_data = {'old_password': old_password, 'new_password': new_password}
+        return await self.put('/user/password', json=json_data)
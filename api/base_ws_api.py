@@ -1,9 +1,18 @@
+import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import Iterable
 from enum import Enum
 from typing import Union
 
 from utils.async_base_ws import AsyncBaseWS
 
+# `BaseWsApi._send_requests` 預設同時在途的請求數
+DEFAULT_PIPELINE_WINDOW = 16
+
+
+class ReplyMismatch(RuntimeError):
+    """管線化請求收到的回應與請求對不上 (例如回應的物品 id 不是所查詢的 id)"""
+
 
 class BaseWsApi(ABC):
     """WebSocket API 的抽象基底類別
@@ -49,3 +58,30 @@ class BaseWsApi(ABC):
         return await self.ws.send_and_receive(
             op_code=self.op_code, sub_code=sub_code_value, data=data, expected_op_code=self.expected_op_code
         )
+
+    async def _send_requests(
+        self, sub_code: Union[Enum, int], data_list: Iterable[dict], window: int = DEFAULT_PIPELINE_WINDOW
+    ) -> list[dict | BaseException]:
+        """在同一條連線上管線化地發送多個請求，依輸入順序回傳結果
+
+        最多同時有 `window` 個請求在途，一個回來就補送下一個，省下逐一等待的往返時間。
+        回應由 `AsyncBaseWS` 依送出順序配對，因此伺服器須依收到的順序回應同一種請求。
+
+        單筆失敗不影響其他請求：逾時與業務錯誤一樣是該筆的回應 dict，其他例外 (例如連線中斷)
+        則以例外物件放在該筆的位置。
+
+        Args:
+            sub_code: 次操作碼，可以是 Enum 或 int。
+            data_list: 每個請求的資料。
+            window: 同時在途的請求數上限。
+
+        Returns:
+            與 `data_list` 順序相同的回應 dict 或例外。
+        """
+        semaphore = asyncio.Semaphore(window)
+
+        async def send_one(data: dict) -> dict:
+            async with semaphore:
+                return await self._send_request(sub_code, data)
+
+        return await asyncio.gather(*(send_one(data) for data in data_list), return_exceptions=True)
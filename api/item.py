@@ -1,7 +1,9 @@
 from api.service_names import Service
-from utils.base_request import BaseRequest
+from utils.async_base_request import AsyncBaseRequest
+from utils.base_request import DEFAULT_BATCH_WORKERS, BaseRequest, RequestSpec
+from utils.json_stream import ListStream
 
-from .base_ws_api import BaseWsApi
+from .base_ws_api import DEFAULT_PIPELINE_WINDOW, BaseWsApi, ReplyMismatch
 from .ws_constants import ItemFlow, OpCode
 
 
@@ -18,6 +20,41 @@ class ItemAPI(BaseRequest):
         result = self.get(f'/items/{item_id}')
         return result
 
+    def stream_all_items(self, schema: dict = None) -> ListStream:
+        """以串流方式取得所有物品，適用於只需要逐筆檢查或彙總的大型清單
+
+        Args:
+            schema: 整個回應的 schema (例如 `HTTP.Item.Schemas.GET_ITEM_LIST`)，每筆物品依其驗證。
+
+        Returns:
+            逐筆交出物品的 `ListStream`，請以 `with` 使用。
+        """
+        return self.stream_list('/items/', schema=schema)
+
+    def get_items_by_ids(self, item_ids: list[int], max_workers: int = DEFAULT_BATCH_WORKERS) -> list[dict]:
+        """併發查詢多個物品，結果順序與 `item_ids` 相同
+
+        Args:
+            item_ids: 要查詢的物品 id。
+            max_workers: 同時進行的請求數上限，見 `BaseRequest.batch`。
+
+        Returns:
+            每個 id 對應的 `get_item` 結果。
+        """
+        return self.batch([RequestSpec('GET', f'/items/{item_id}') for item_id in item_ids], max_workers=max_workers)
+
+
+class AsyncItemAPI(AsyncBaseRequest):
+    """`ItemAPI` 的非同步版本，路徑必須與 `ItemAPI` 保持一致"""
+
+    service = Service.FRONT
+
+    async def get_all_items(self) -> dict:
+        return await self.get('/items/')
+
+    async def get_item(self, item_id: int) -> dict:
+        return await self.get(f'/items/{item_id}')
+
 
 class ItemWS(BaseWsApi):
     """提供物品相關的 WebSocket API"""
@@ -34,5 +71,29 @@ class ItemWS(BaseWsApi):
         data = {'item_id': item_id}
         return await self._send_request(sub_code=ItemFlow.GetItemById, data=data)
 
+    async def get_items_by_ids(
+        self, item_ids: list[int], window: int = DEFAULT_PIPELINE_WINDOW
+    ) -> list[dict | BaseException]:
+        """在同一條連線上管線化地查詢多個物品，結果順序與 `item_ids` 相同
+
+        回應只依送出順序配對，成功的回應另外確認其物品 id 就是所查詢的 id，對不上時該筆改為
+        `ReplyMismatch`，不會把別的物品當成該筆的結果。
+
+        Args:
+            item_ids: 要查詢的物品 id。
+            window: 同時在途的請求數上限，見 `BaseWsApi._send_requests`。
+
+        Returns:
+            每個 id 對應的 `get_item_by_id` 結果，連線層的失敗與回應對不上以例外物件表示。
+        """
+        results = await self._send_requests(
+            ItemFlow.GetItemById, [{'item_id': item_id} for item_id in item_ids], window=window
+        )
+        for index, (item_id, result) in enumerate(zip(item_ids, results, strict=True)):
+            item = result.get('data') if isinstance(result, dict) else None
+            if isinstance(item, dict) and item.get('id') != item_id:
+                results[index] = ReplyMismatch(f'查詢物品 {item_id} 卻收到物品 {item.get("id")} 的回應')
+        return results
+
     async def get_all_items(self) -> dict:
         return await self._send_request(sub_code=ItemFlow.GetAllItems)
@@ -30,3 +30,12 @@ class ItemFlow(Enum):
 
     GetAllItems = 1
     GetItemById = 2
+
+
+# 各 op_code 的 sub_code 所屬的 Enum，供統計與日誌把數字轉成名稱
+SUB_CODE_ENUMS: dict[OpCode, type[Enum]] = {
+    OpCode.C2SPlayerFlow: PlayerFlow,
+    OpCode.S2CPlayerFlow: PlayerFlow,
+    OpCode.C2SItemFlow: ItemFlow,
+    OpCode.S2CItemFlow: ItemFlow,
+}
@@ -1,12 +1,17 @@
 import logging
+import random
 from pathlib import Path
 
 import allure
 import pytest
+from faker import Faker
 
 from test_data.common.base import TestCaseData
 from utils.allure_reporting import write_allure_metadata
-from utils.config_loader import get_config, set_current_env
+from utils.config_loader import get_config, override_config, set_current_env
+from utils.http_cassette import cassette_seed
+from utils.json_codec import JSON_DECODERS, set_json_decoder
+from utils.mock_backend import DEFAULT_ITEM_COUNT, MockBackend, base_config
 
 # pytest 只改寫測試檔與 conftest 內的斷言。不註冊的話，`case_verify_tool` 裡的
 # 比對失敗只會拋出光禿禿的 `AssertionError`，看不到實際值與預期值的差異。
@@ -15,27 +20,130 @@ pytest.register_assert_rewrite('utils.case_verify_tool')
 
 logger = logging.getLogger(__name__)
 
+_mock_backend_key = pytest.StashKey[MockBackend]()
+_data_seed_key = pytest.StashKey[int]()
+
 
 # --- Pytest Hooks ---
 
 
 def pytest_addoption(parser):
-    """為 pytest 新增 `--env` 命令列參數。
+    """為 pytest 新增 `--env`、`--json-decoder`，以及 HTTP、WS 與模擬後端相關的命令列參數。
 
     Args:
         parser: pytest 的命令列參數解析器。
     """
     parser.addoption('--env', default='qa', choices=['dev', 'qa'], help='environment parameter')
+    parser.addoption(
+        '--json-decoder',
+        default='json',
+        choices=JSON_DECODERS,
+        help='HTTP 回應的 JSON 解碼器，orjson / msgspec 需另行安裝',
+    )
+    parser.addoption('--http-cache', action='store_true', help='在 session 內快取 HTTP GET 回應')
+    parser.addoption('--http-cache-ttl', type=float, default=60.0, help='快取回應不經重新驗證可直接使用的秒數')
+    parser.addoption('--http-cache-size', type=int, default=256, help='快取最多保留的回應筆數')
+    parser.addoption('--http-record', metavar='PATH', help='把 HTTP 請求與回應錄進此 cassette 檔')
+    parser.addoption('--http-replay', metavar='PATH', help='不連線，改由此 cassette 檔重播 HTTP 回應')
+    parser.addoption(
+        '--http-seed',
+        type=int,
+        help='錄製 cassette 時產生測試資料的亂數種子，預設每次隨機；重播時一律沿用 cassette 中記錄的種子',
+    )
+    parser.addoption('--ws-pool-idle-timeout', type=float, default=60.0, help='WS 連線歸還後閒置超過此秒數就不再重用')
+    parser.addoption('--ws-pool-max-lifetime', type=float, default=300.0, help='WS 連線建立超過此秒數就不再重用')
+    parser.addoption(
+        '--ws-latency-report',
+        metavar='PATH',
+        default='logs/ws_latency.json',
+        help='WS 請求依 op_code / sub_code 彙整的耗時統計寫入此 JSON 檔',
+    )
+    parser.addoption('--ws-record', metavar='PATH', help='把所有 WS 連線收送的原始 frame 錄進此紀錄檔')
+    parser.addoption(
+        '--mock-backend',
+        action='store_true',
+        help='在行程內啟動模擬後端並把 front 服務指向它，沒有 secrets.yml 時使用內建的測試帳號',
+    )
+    parser.addoption('--mock-items', type=int, default=DEFAULT_ITEM_COUNT, help='模擬後端的物品筆數')
+    parser.addoption('--mock-latency', type=float, default=0.0, help='模擬後端每個回應固定延遲的秒數')
+    parser.addoption('--mock-jitter', type=float, default=0.0, help='模擬後端每個回應額外延遲的上限 (秒)')
 
 
 def pytest_configure(config):
-    """在測試開始時，設定要使用的環境名稱
+    """在測試開始時，設定要使用的環境名稱與 JSON 解碼器
+
+    錄製或重播 cassette 時在收集測試資料之前決定亂數種子：測試資料 (帳號、密碼) 在收集階段以
+    Faker 與 random 產生，而 cassette 以請求 body 比對，重播時必須產生與錄製時相同的資料才對得上。
+    錄製時的種子預設每次隨機 (對著保留資料的後端重錄時，註冊的帳號才不會與上次重複)，
+    寫回 `--http-seed` 供 cassette 記在 header 中；重播時讀出 cassette 的種子沿用。
+    每個測試模組收集前再以此種子重設 (見 `pytest_collectstart`)，重播時只收集部分測試檔或以 `-k`
+    篩選也能產生相同的資料。
+
+    `--mock-backend` 時在背景執行緒啟動模擬後端，並在收集測試資料之前把設定換成指向它的
+    版本；設定檔中的測試帳號預先註冊在模擬後端中。
 
     Args:
         config: pytest 的設定物件。
+
+    Raises:
+        pytest.UsageError: 如果選用的 JSON 解碼器套件未安裝、同時指定了錄製與重播，或重播的 cassette
+            無法讀取。
     """
     env = config.getoption('--env')
     set_current_env(env)
+    try:
+        set_json_decoder(config.getoption('--json-decoder'))
+    except ImportError as e:
+        raise pytest.UsageError(str(e)) from e
+    if config.getoption('--http-record') and config.getoption('--http-replay'):
+        raise pytest.UsageError('--http-record 與 --http-replay 不能同時使用')
+    if config.getoption('--http-record'):
+        if config.option.http_seed is None:
+            config.option.http_seed = random.SystemRandom().randrange(2**32)
+        config.stash[_data_seed_key] = config.option.http_seed
+    elif config.getoption('--http-replay'):
+        try:
+            config.stash[_data_seed_key] = cassette_seed(config.getoption('--http-replay'))
+        except (OSError, ValueError) as e:
+            raise pytest.UsageError(str(e)) from e
+    if config.getoption('--mock-backend'):
+        base = base_config(env)
+        backend = MockBackend(
+            item_count=config.getoption('--mock-items'),
+            latency=config.getoption('--mock-latency'),
+            jitter=config.getoption('--mock-jitter'),
+            users=base.users.values(),
+        ).start_in_thread()
+        config.stash[_mock_backend_key] = backend
+        override_config(backend.config(base))
+
+
+def pytest_collectstart(collector: pytest.Collector):
+    """錄製或重播 cassette 時，在每個測試模組被 import (產生測試資料) 前重設亂數種子
+
+    種子由 cassette 的種子與模組的 nodeid 組成，每個模組產生的資料只取決於這兩者，
+    與同時收集了哪些其他模組無關。
+
+    Args:
+        collector: 即將收集的 collector。
+    """
+    seed = collector.config.stash.get(_data_seed_key, None)
+    if seed is not None and isinstance(collector, pytest.Module):
+        module_seed = f'{seed}:{collector.nodeid}'
+        random.seed(module_seed)
+        Faker.seed(module_seed)
+
+
+def pytest_unconfigure(config):
+    """關閉 `--mock-backend` 啟動的模擬後端
+
+    Args:
+        config: pytest 的設定物件。
+    """
+    backend = config.stash.get(_mock_backend_key, None)
+    if backend is not None:
+        override_config(None)
+        backend.stop_thread()
 
 
 @pytest.hookimpl(hookwrapper=True)
@@ -0,0 +1,103 @@
+"""比較 HTTP/1.1 (requests) 與 HTTP/2 (httpx) 兩種 transport 在併發下的表現
+
+兩者皆以與測試相同的 adapter (`ServiceAdapter` / `Http2Adapter`) 送出請求，併發數相同、
+連線池上限等於併發數。HTTP/1.1 每個併發請求占一條連線，HTTP/2 則在一條連線上多工，
+差距主要反映在建立的連線數與高併發時的延遲。需要一個可連線的服務，預設打 secrets.yml
+中 `--env` 環境的 front 服務:
+
+    uv run python scripts/bench_http_transport.py --env qa --path /items/ --requests 500 --concurrency 50
+
+伺服器不支援 HTTP/2 時，https 會退回 HTTP/1.1 (兩列結果會相近)，http 則會連線失敗。
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.config_loader import ServiceSettings, get_config, set_current_env  # noqa: E402
+from utils.http_session import Http2Adapter, ServiceAdapter  # noqa: E402
+from utils.http_timing import percentile  # noqa: E402
+
+
+def run(adapter: ServiceAdapter, url: str, total: int, concurrency: int) -> dict:
+    """以指定併發數送出 total 個 GET，回傳吞吐量、延遲與連線統計
+
+    Args:
+        adapter: 要量測的 adapter，用完會被關閉。
+        url: 請求的完整 URL。
+        total: 請求總數。
+        concurrency: 同時進行的請求數。
+
+    Returns:
+        包含 rps、p50 / p95 / max 延遲 (毫秒)、錯誤數與 adapter 連線統計的 dict。
+    """
+    session = requests.Session()
+    session.mount(url, adapter)
+
+    def timed_get(_) -> float | None:
+        start = time.perf_counter()
+        try:
+            session.get(url).raise_for_status()
+        except requests.RequestException:
+            return None
+        return time.perf_counter() - start
+
+    # 先送一個請求建立連線，讓量測聚焦在穩態
+    session.get(url)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed_get, range(total)))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(result for result in results if result is not None)
+    stats = adapter.pool_stats()
+    session.close()
+    return {
+        'rps': total / elapsed,
+        'p50': percentile(latencies, 50) * 1000 if latencies else float('nan'),
+        'p95': percentile(latencies, 95) * 1000 if latencies else float('nan'),
+        'max': latencies[-1] * 1000 if latencies else float('nan'),
+        'errors': total - len(latencies),
+        'connections': stats['misses'],
+    }
+
+
+def main():
+    """執行 benchmark 並印出兩種 transport 的比較"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--env', default='qa', help='讀取 secrets.yml 中哪個環境的 front URL')
+    parser.add_argument('--url', help='直接指定 base URL，覆蓋 --env 的設定')
+    parser.add_argument('--path', default='/items/', help='請求的路徑')
+    parser.add_argument('--requests', type=int, default=500, help='每種 transport 的請求總數')
+    parser.add_argument('--concurrency', type=int, default=50, help='同時進行的請求數')
+    args = parser.parse_args()
+
+    if args.url:
+        base_url = args.url
+    else:
+        set_current_env(args.env)
+        base_url = get_config().url('front')
+    url = base_url.rstrip('/') + args.path
+    print(f'{url}，{args.requests} 個請求，併發 {args.concurrency}')
+
+    print(f'{"transport":<12}{"req/s":>10}{"p50":>12}{"p95":>12}{"max":>12}{"連線數":>8}{"錯誤":>6}')
+    for name, adapter_class in (('http1', ServiceAdapter), ('http2', Http2Adapter)):
+        settings = ServiceSettings(pool_maxsize=args.concurrency, transport=name)
+        try:
+            result = run(adapter_class(settings), url, args.requests, args.concurrency)
+        except requests.RequestException as e:
+            print(f'{name:<12}連線失敗: {type(e).__name__}')
+            continue
+        print(
+            f'{name:<12}{result["rps"]:>10.1f}{result["p50"]:>10.2f}ms{result["p95"]:>10.2f}ms'
+            f'{result["max"]:>10.2f}ms{result["connections"]:>8}{result["errors"]:>6}'
+        )
+
+
+if __name__ == '__main__':
+    main()
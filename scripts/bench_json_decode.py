@@ -0,0 +1,106 @@
+"""比較 HTTP 回應解碼管線改版前後、以及各 JSON 解碼器的每請求耗時
+
+改版前 `save_response_log` 與 `normalize_response` 各自呼叫一次 `response.json()`，
+每個 body 被解碼兩次；改版後由 `decode_body` 解碼一次，兩者共用結果。
+此腳本以 `/items/` 形狀的假資料組出 `requests.Response`，不需要後端即可執行:
+
+    uv run python scripts/bench_json_decode.py --items 5000
+"""
+
+import argparse
+import json
+import logging
+import sys
+import timeit
+from pathlib import Path
+
+import humps
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.base_request import BaseRequest  # noqa: E402
+from utils.json_codec import JSON_DECODERS, set_json_decoder  # noqa: E402
+from utils.masking import mask_sensitive  # noqa: E402
+from utils.response import decode_body, normalize_response  # noqa: E402
+
+
+def build_response(item_count: int) -> requests.Response:
+    """組出一個 body 為物品清單的 `requests.Response`
+
+    Args:
+        item_count: 清單中的物品數量。
+
+    Returns:
+        已填好 body 與 headers 的 `requests.Response`。
+    """
+    items = [{'id': i, 'itemName': f'item-{i}', 'itemDescription': 'x' * 40} for i in range(item_count)]
+    body = {'code': 0, 'data': items}
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(body).encode()
+    response.headers['Content-Type'] = 'application/json'
+    response.encoding = 'utf-8'
+    response.request = requests.Request('GET', 'http://localhost/items/').prepare()
+    return response
+
+
+def legacy_decode(response: requests.Response):
+    """改版前的解碼：`save_response_log` 與 `normalize_response` 各呼叫一次 `response.json()`"""
+    response.json()
+    response.json()
+
+
+def legacy_pipeline(response: requests.Response) -> dict:
+    """改版前的完整管線 (遮蔽 + 正規化)，兩個環節各自解碼"""
+    mask_sensitive(response.request.headers)
+    mask_sensitive(response.headers)
+    mask_sensitive(response.json())
+    return {'status_code': response.status_code, **humps.decamelize(response.json())}
+
+
+def single_decode_pipeline(response: requests.Response) -> dict:
+    """改版後的完整管線：解碼一次，日誌與正規化共用"""
+    body = decode_body(response)
+    BaseRequest.save_response_log(response, body)
+    return normalize_response(response, body)
+
+
+def measure(func, repeat: int) -> float:
+    """回傳 func 單次執行的耗時 (秒)，取多輪中最快的一輪以降低雜訊"""
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main():
+    """執行 benchmark 並印出每請求的耗時"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=5000, help='回應中的物品數量')
+    parser.add_argument('--repeat', type=int, default=20, help='每種量測執行的輪數')
+    args = parser.parse_args()
+
+    # 與 pytest.ini 的 log_cli_level 一致，日誌照常產生，只是丟到 NullHandler
+    logging.basicConfig(level=logging.INFO, handlers=[logging.NullHandler()])
+    response = build_response(args.items)
+    print(f'body 大小: {len(response.content) / 1024:.1f} KiB，{args.items} 筆物品，取 {args.repeat} 輪中最快的一輪')
+
+    set_json_decoder('json')
+    decode_baseline = measure(lambda: legacy_decode(response), args.repeat)
+    pipeline_baseline = measure(lambda: legacy_pipeline(response), args.repeat)
+    print(f'{"":<20}{"解碼":>12}{"完整管線":>14}')
+    print(f'{"legacy (json x2)":<20}{decode_baseline * 1000:>10.2f}ms{pipeline_baseline * 1000:>12.2f}ms')
+
+    for name in JSON_DECODERS:
+        label = f'single ({name})'
+        try:
+            set_json_decoder(name)
+        except ImportError:
+            print(f'{label:<20}{"未安裝":>10}')
+            continue
+        decode = measure(lambda: decode_body(response), args.repeat)
+        pipeline = measure(lambda: single_decode_pipeline(response), args.repeat)
+        saving = (decode_baseline - decode) * 1000
+        print(f'{label:<20}{decode * 1000:>10.2f}ms{pipeline * 1000:>12.2f}ms  (每請求省下 {saving:.2f}ms 解碼)')
+
+
+if __name__ == '__main__':
+    main()
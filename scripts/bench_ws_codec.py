@@ -0,0 +1,123 @@
+"""比較 WebSocket 訊息編解碼改版前後的每則訊息耗時
+
+改版前 `AsyncBaseWS._pack_msg` / `unpack_msg` 每次呼叫 `msgpack.packb` 建立新的 packer、
+解碼前以 `frame[1:]` 複製整個 frame；改版後由 `WsCodec` 重用 packer、以 memoryview 切片。
+此腳本以 PlayerFlow / ItemFlow 形狀的假資料量測，不需要後端即可執行:
+
+    uv run python scripts/bench_ws_codec.py --items 500
+"""
+
+import argparse
+import gzip
+import sys
+import timeit
+from pathlib import Path
+
+import msgpack
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.ws_constants import ItemFlow, OpCode, PlayerFlow  # noqa: E402
+from utils.ws_codec import WsCodec  # noqa: E402
+
+
+def legacy_pack(data: dict) -> bytes:
+    """改版前的 `AsyncBaseWS._pack_msg` (會修改傳入的 dict，因此每次傳入副本)"""
+    if 'data' in data and data['data'] is not None:
+        data['data'] = msgpack.packb(data['data'])
+    msg_pack = msgpack.packb(data)
+    if len(msg_pack) >= 250:
+        msg_pack = b'\x01' + gzip.compress(msg_pack)
+    else:
+        msg_pack = b'\x00' + msg_pack
+    return msg_pack
+
+
+def legacy_unpack(msgpack_data: bytes) -> dict:
+    """改版前的 `AsyncBaseWS.unpack_msg`"""
+    if msgpack_data.startswith(b'\x01'):
+        msgpack_data = gzip.decompress(msgpack_data[1:])
+    else:
+        msgpack_data = msgpack_data[1:]
+    msg = msgpack.unpackb(msgpack_data)
+    if 'data' in msg and isinstance(msg['data'], bytes):
+        msg['data'] = msgpack.unpackb(msg['data'])
+    return msg
+
+
+def build_messages(item_count: int) -> dict[str, dict]:
+    """組出代表性的訊息
+
+    Args:
+        item_count: GetAllItems 回應中的物品數量。
+
+    Returns:
+        名稱到訊息 dict 的對應，涵蓋 ping、小型請求與會觸發 gzip 的大型回應。
+    """
+    player = {'id': 1, 'account': 'player-0001', 'name': 'tester', 'phone': '0912345678', 'level': 30, 'exp': 123456}
+    items = [
+        {'id': i, 'itemName': f'item-{i}', 'itemDescription': 'x' * 40, 'price': i * 10, 'stock': 99}
+        for i in range(item_count)
+    ]
+    return {
+        'C2SPing': {'op_code': OpCode.C2SPing.value},
+        'GetPlayerInfo': {'op_code': OpCode.C2SPlayerFlow.value, 'sub_code': PlayerFlow.GetPlayerInfo.value},
+        'UpdateName': {
+            'op_code': OpCode.C2SPlayerFlow.value,
+            'sub_code': PlayerFlow.UpdateName.value,
+            'data': {'name': 'new-name'},
+        },
+        'S2C PlayerInfo': {
+            'op_code': OpCode.S2CPlayerFlow.value,
+            'sub_code': PlayerFlow.GetPlayerInfo.value,
+            'data': {'code': 0, 'data': player},
+        },
+        'GetItemById': {
+            'op_code': OpCode.C2SItemFlow.value,
+            'sub_code': ItemFlow.GetItemById.value,
+            'data': {'item_id': 42},
+        },
+        f'S2C GetAllItems x{item_count}': {
+            'op_code': OpCode.S2CItemFlow.value,
+            'sub_code': ItemFlow.GetAllItems.value,
+            'data': {'code': 0, 'data': items},
+        },
+    }
+
+
+def measure(func, number: int, repeat: int) -> float:
+    """回傳 func 單次執行的耗時 (秒)，取多輪中最快的一輪以降低雜訊"""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main():
+    """執行 benchmark 並印出每則訊息的耗時"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=500, help='GetAllItems 回應中的物品數量')
+    parser.add_argument('--number', type=int, default=2000, help='每輪執行的次數')
+    parser.add_argument('--repeat', type=int, default=5, help='每種量測執行的輪數')
+    parser.add_argument('--compress-level', type=int, default=9, help='改版後的 gzip 壓縮等級 (改版前固定為 9)')
+    args = parser.parse_args()
+
+    codec = WsCodec(compress_level=args.compress_level)
+    print(f'取 {args.repeat} 輪中最快的一輪，每輪 {args.number} 次，單位為微秒/則，壓縮等級 {args.compress_level}')
+    print(f'{"":<24}{"frame":>9}{"encode 前":>10}{"encode 後":>10}{"decode 前":>10}{"decode 後":>10}')
+    for name, message in build_messages(args.items).items():
+        frame = codec.encode(message)
+        # 兩種實作必須能互相解碼，否則比較沒有意義
+        assert legacy_unpack(frame) == codec.decode(legacy_pack(dict(message))) == message
+
+        number = max(args.number * 100 // len(frame), 1) if len(frame) > 100 else args.number
+        legacy_encode = measure(lambda: legacy_pack(dict(message)), number, args.repeat)
+        encode = measure(lambda: codec.encode(message), number, args.repeat)
+        legacy_decode = measure(lambda: legacy_unpack(frame), number, args.repeat)
+        decode = measure(lambda: codec.decode(frame), number, args.repeat)
+        print(
+            f'{name:<24}{len(frame):>8}B'
+            f'{legacy_encode * 1e6:>10.2f}{encode * 1e6:>10.2f}'
+            f'{legacy_decode * 1e6:>10.2f}{decode * 1e6:>10.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""比較各 WebSocket 壓縮方式 (見 `utils/ws_codec.py`) 的壓縮率與每則訊息的編解碼耗時
+
+以 PlayerFlow / ItemFlow 形狀的假資料依外層大小分桶量測，不需要後端即可執行。
+所有壓縮方式的門檻皆設為 0，各桶都看得到壓縮效果；zstd-dict 的字典以另一批 (不同亂數種子)
+的假資料訓練，避免以測試資料訓練而高估壓縮率。zstd 與 zstd-dict 需先安裝 zstandard:
+
+    uv pip install zstandard
+    uv run python scripts/bench_ws_compression.py
+"""
+
+import argparse
+import random
+import sys
+import timeit
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.ws_constants import ItemFlow, OpCode, PlayerFlow  # noqa: E402
+from utils.ws_codec import WS_COMPRESSIONS, WsCodec, train_dictionary  # noqa: E402
+
+# (桶名稱, 外層大小上限)
+BUCKETS = (('<256B', 256), ('256B-1K', 1024), ('1K-8K', 8192), ('8K-64K', 65536), ('>=64K', float('inf')))
+
+
+def build_messages(rng: random.Random, count: int) -> list[dict]:
+    """組出一批大小分布接近實際流量的訊息
+
+    Args:
+        rng: 亂數產生器，決定名稱、id 與清單長度。
+        count: 訊息數量。
+
+    Returns:
+        訊息 dict 的清單，涵蓋玩家與物品的請求與回應。
+    """
+
+    def item(item_id: int) -> dict:
+        return {
+            'id': item_id,
+            'itemName': f'item-{rng.randrange(10_000)}',
+            'itemDescription': rng.choice(('sword', 'shield', 'potion', 'scroll')) * rng.randint(1, 10),
+            'price': rng.randrange(100_000),
+            'stock': rng.randrange(100),
+        }
+
+    def player() -> dict:
+        return {
+            'id': rng.randrange(100_000),
+            'account': f'player-{rng.randrange(10_000):04d}',
+            'name': f'tester-{rng.randrange(1000)}',
+            'phone': f'09{rng.randrange(10**8):08d}',
+            'level': rng.randrange(100),
+            'exp': rng.randrange(10**7),
+        }
+
+    makers = (
+        lambda: {'op_code': OpCode.C2SPlayerFlow.value, 'sub_code': PlayerFlow.GetPlayerInfo.value},
+        lambda: {
+            'op_code': OpCode.C2SPlayerFlow.value,
+            'sub_code': PlayerFlow.UpdateName.value,
+            'data': {'name': f'name-{rng.randrange(1000)}'},
+        },
+        lambda: {
+            'op_code': OpCode.S2CPlayerFlow.value,
+            'sub_code': PlayerFlow.GetPlayerInfo.value,
+            'data': {'code': 0, 'data': player()},
+        },
+        lambda: {
+            'op_code': OpCode.C2SItemFlow.value,
+            'sub_code': ItemFlow.GetItemById.value,
+            'data': {'item_id': rng.randrange(1000)},
+        },
+        lambda: {
+            'op_code': OpCode.S2CItemFlow.value,
+            'sub_code': ItemFlow.GetItemById.value,
+            'data': {'code': 0, 'data': item(rng.randrange(1000))},
+        },
+        lambda: {
+            'op_code': OpCode.S2CItemFlow.value,
+            'sub_code': ItemFlow.GetAllItems.value,
+            'data': {'code': 0, 'data': [item(i) for i in range(rng.choice((5, 20, 100, 500, 2000)))]},
+        },
+    )
+    return [rng.choice(makers)() for _ in range(count)]
+
+
+def bucket_of(size: int) -> str:
+    """回傳外層大小所屬的桶"""
+    return next(name for name, limit in BUCKETS if size < limit)
+
+
+def measure(func, repeat: int) -> float:
+    """回傳 func 單次執行的耗時 (秒)，取多輪中最快的一輪以降低雜訊"""
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main():
+    """執行 benchmark 並印出各壓縮方式在各桶的壓縮率與耗時"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=300, help='量測用的訊息數量')
+    parser.add_argument('--training', type=int, default=1000, help='訓練字典用的訊息數量')
+    parser.add_argument('--dictionary-size', type=int, default=16 * 1024, help='字典的最大位元組數')
+    parser.add_argument('--repeat', type=int, default=5, help='每則訊息量測的輪數')
+    args = parser.parse_args()
+
+    plain = WsCodec('none')
+    messages = build_messages(random.Random(1), args.messages)
+    dictionary = None
+    try:
+        dictionary = train_dictionary(
+            [plain.encode(message) for message in build_messages(random.Random(2), args.training)],
+            args.dictionary_size,
+        )
+    except ImportError as e:
+        print(f'略過 zstd-dict: {e}')
+
+    buckets = defaultdict(list)
+    for message in messages:
+        buckets[bucket_of(len(plain.encode(message)) - 1)].append(message)
+    print(f'{args.messages} 則訊息，取 {args.repeat} 輪中最快的一輪；比例為壓縮後 / 壓縮前，耗時為微秒/則')
+    print(f'{"":<12}' + ''.join(f'{name:>26}' for name, _ in BUCKETS if name in buckets))
+    print(f'{"訊息數":<12}' + ''.join(f'{len(buckets[name]):>26}' for name, _ in BUCKETS if name in buckets))
+
+    for compression in WS_COMPRESSIONS:
+        try:
+            codec = WsCodec(compression, threshold=0, dictionary=dictionary)
+        except (ImportError, ValueError) as e:
+            print(f'{compression:<12}{e}')
+            continue
+        cells = []
+        for name, _ in BUCKETS:
+            if name not in buckets:
+                continue
+            raw = compressed = encode = decode = 0
+            for message in buckets[name]:
+                frame = codec.encode(message)
+                assert codec.decode(frame) == message
+                raw += len(plain.encode(message))
+                compressed += len(frame)
+                encode += measure(lambda: codec.encode(message), args.repeat)
+                decode += measure(lambda: codec.decode(frame), args.repeat)
+            count = len(buckets[name])
+            cells.append(f'{compressed / raw:.2f} {encode / count * 1e6:>8.1f} {decode / count * 1e6:>8.1f}')
+        print(f'{compression:<12}' + ''.join(f'{cell:>26}' for cell in cells))
+    print('欄位：比例 encode decode')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""比較大型 WS frame 在事件迴圈上直接 (解) 壓縮與交給執行緒池時的迴圈延遲
+
+模擬同一個事件迴圈上有多條連線，各自不斷收送 GetAllItems 形狀的大型訊息，以
+`LoopLagMonitor` 量測迴圈延遲 (代表其他連線的心跳與收訊要多等多久)，以及整體的吞吐量。
+不需要後端即可執行:
+
+    uv run python scripts/bench_ws_offload.py --connections 8 --items 2000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.ws_constants import ItemFlow, OpCode  # noqa: E402
+from utils.loop_lag import LoopLagMonitor  # noqa: E402
+from utils.ws_codec import DEFAULT_OFFLOAD_THRESHOLD, WsCodec  # noqa: E402
+
+
+def build_message(item_count: int) -> dict:
+    """組出一則 GetAllItems 回應"""
+    items = [
+        {'id': i, 'itemName': f'item-{i}', 'itemDescription': f'description of item {i}', 'price': i * 10}
+        for i in range(item_count)
+    ]
+    return {'op_code': OpCode.S2CItemFlow.value, 'sub_code': ItemFlow.GetAllItems.value, 'data': {'data': items}}
+
+
+async def connection(codec: WsCodec, message: dict, frame: bytes, rounds: int):
+    """模擬一條連線：每輪送出並收到一則大型訊息"""
+    for _ in range(rounds):
+        await codec.encode_async(message)
+        await codec.decode_async(frame)
+        await asyncio.sleep(0)
+
+
+async def run(compression: str, offload_threshold: int | None, args: argparse.Namespace) -> tuple[dict, float]:
+    """以指定設定跑一輪，回傳 (迴圈延遲統計, 每秒處理的訊息數)"""
+    message = build_message(args.items)
+    codecs = [
+        WsCodec(compression, compress_level=args.compress_level, offload_threshold=offload_threshold)
+        for _ in range(args.connections)
+    ]
+    frame = codecs[0].encode(message)
+    async with LoopLagMonitor(interval=0.005) as monitor:
+        start = time.perf_counter()
+        await asyncio.gather(*(connection(codec, message, frame, args.rounds) for codec in codecs))
+        elapsed = time.perf_counter() - start
+    return monitor.stats(), args.connections * args.rounds * 2 / elapsed
+
+
+def main():
+    """執行 benchmark 並印出各設定的迴圈延遲與吞吐量"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--connections', type=int, default=8, help='同一個迴圈上的連線數')
+    parser.add_argument('--items', type=int, default=2000, help='每則訊息中的物品數量')
+    parser.add_argument('--rounds', type=int, default=20, help='每條連線收送的輪數')
+    parser.add_argument('--compress-level', type=int, default=None, help='壓縮等級，未提供時使用各壓縮方式的預設值')
+    args = parser.parse_args()
+
+    frame = WsCodec('none').encode(build_message(args.items))
+    print(f'{args.connections} 條連線 x {args.rounds} 輪，外層 {len(frame) / 1024:.0f} KiB；延遲單位為毫秒')
+    print(f'{"":<18}{"p50":>8}{"p95":>8}{"p99":>8}{"max":>8}{"訊息/秒":>10}')
+    for compression in ('gzip', 'zstd'):
+        for label, threshold in (('inline', None), ('offload', DEFAULT_OFFLOAD_THRESHOLD)):
+            try:
+                stats, throughput = asyncio.run(run(compression, threshold, args))
+            except ImportError as e:
+                print(f'{compression} {label:<12}{e}')
+                break
+            cells = ''.join(f'{stats[name]:>8.2f}' for name in ('p50', 'p95', 'p99', 'max'))
+            print(f'{compression + " " + label:<18}{cells}{throughput:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""單獨啟動行程內的模擬後端 (`utils/mock_backend.py`)，供 benchmark 與其他腳本在沒有外部 mock-server 時使用
+
+HTTP 與 WebSocket 各占一個埠，WebSocket 的位址由登入回應提供。`--env` 環境有 secrets.yml 時預先註冊
+其中的測試帳號，否則註冊內建的帳號 (見 `DEFAULT_USERS`)。啟動後印出可填入 secrets.yml 的 front 位址:
+
+    uv run python scripts/mock_backend.py --port 8000 --items 10000 --latency 0.02 --jitter 0.01
+
+跑 pytest 時不需要此腳本，直接加上 `--mock-backend` 即可在同一個行程內啟動。
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.config_loader import set_current_env  # noqa: E402
+from utils.mock_backend import DEFAULT_ITEM_COUNT, MockBackend, base_config  # noqa: E402
+from utils.ws_codec import WS_COMPRESSIONS  # noqa: E402
+
+
+async def serve(args: argparse.Namespace):
+    """啟動模擬後端並執行到被中斷"""
+    set_current_env(args.env)
+    base = base_config(args.env)
+    backend = MockBackend(
+        host=args.host,
+        http_port=args.port,
+        ws_port=args.ws_port,
+        item_count=args.items,
+        latency=args.latency,
+        jitter=args.jitter,
+        compression=args.compression,
+        users=base.users.values(),
+        seed=args.seed,
+    )
+    async with backend:
+        print(f'HTTP: {backend.base_url} (secrets.yml 的 urls.front)')
+        print(f'WS:   {backend.ws_base_url}?token=... (由登入回應提供)')
+        for key, user in base.users.items():
+            print(f'使用者 {key}: {user.account}')
+        await asyncio.Future()
+
+
+def main():
+    """解析參數並啟動模擬後端"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--env', default='qa', choices=['dev', 'qa'], help='預先註冊哪個環境的 secrets.yml 測試帳號')
+    parser.add_argument('--host', default='127.0.0.1', help='監聽的位址')
+    parser.add_argument('--port', type=int, default=8000, help='HTTP 的埠號')
+    parser.add_argument('--ws-port', type=int, default=8001, help='WebSocket 的埠號')
+    parser.add_argument('--items', type=int, default=DEFAULT_ITEM_COUNT, help='物品清單的筆數')
+    parser.add_argument('--latency', type=float, default=0.0, help='每個回應固定延遲的秒數')
+    parser.add_argument('--jitter', type=float, default=0.0, help='每個回應額外延遲的上限 (秒)')
+    parser.add_argument('--compression', default='gzip', choices=WS_COMPRESSIONS, help='WS 回應的壓縮方式')
+    parser.add_argument('--seed', type=int, default=0, help='延遲亂數的種子')
+    parser.add_argument('--log-level', default='WARNING', help='日誌等級')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level, format='%(asctime)s [%(levelname)s] [%(name)s] %(message)s')
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
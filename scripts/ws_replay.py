@@ -0,0 +1,226 @@
+"""以 `--ws-record` 錄下的紀錄檔驅動一個 WebSocket 伺服器，離線重跑 `ItemWS` / `PlayerWS` 的流程
+
+紀錄中的每條連線各開一條連線到 `--url` (例如本機的 mock server)，依序送出錄到的原始 frame。
+送出每個 frame 前，先等到這條連線收到的訊息數追上錄製時送出它之前收到的數目，
+因此請求與回應的先後關係和錄製時相同，重播結果是確定的:
+
+- original: 連線的開啟、每個 frame 與連線的關閉都不早於錄製時的時間點，重現原本的節奏 (含閒置與心跳)
+- fast: 不等時間點，只等前面的回應，量測伺服器能多快跑完同樣的流程
+
+收到的訊息依序與錄製時比對 op_code / sub_code，輸出耗時、等待回應的時間分布與不符的數量，
+結果印出並寫成 JSON (預設 logs/ws_replay.json)，可跨版本比較:
+
+    uv run pytest --env qa testcases/api_test/ws --ws-record logs/ws.rec
+    uv run python scripts/ws_replay.py logs/ws.rec --url ws://127.0.0.1:8000/ws?token=... --timing fast
+
+伺服器須接受紀錄中的訊息 (錄製時的 token 不會寫入紀錄，連線身分由 `--url` 決定)。
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import websockets
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.http_timing import PERCENTILES, percentile  # noqa: E402
+from utils.ws_codec import WsCodec  # noqa: E402
+from utils.ws_recorder import CLOSE, OPEN, RECV, SEND, WsRecord, read_records  # noqa: E402
+from utils.ws_timing import message_name  # noqa: E402
+
+logger = logging.getLogger('ws_replay')
+
+TIMINGS = ('original', 'fast')
+
+_codec = WsCodec('none')
+
+
+def message_key(frame: bytes) -> tuple[int, int | None]:
+    """回傳 frame 的 (op_code, sub_code)，不論壓縮方式"""
+    data = _codec.decode(frame)
+    return data.get('op_code'), data.get('sub_code')
+
+
+class Script:
+    """一條錄到的連線要重播的內容
+
+    Attributes:
+        opened_at: 錄製時開啟連線的時間點 (秒)。
+        closed_at: 錄製時關閉連線的時間點 (秒)，錄製中斷而沒有關閉紀錄時為 None。
+        path: 錄製時連線的路徑，僅供報告參考。
+        sends: (錄製時的時間點, 送出前已收到的訊息數, 原始 frame)，依送出順序。
+        expected: 錄製時收到的訊息的 (op_code, sub_code)，依收到順序。
+    """
+
+    def __init__(self, opened_at: float, path: str):
+        self.opened_at = opened_at
+        self.closed_at: float | None = None
+        self.path = path
+        self.sends: list[tuple[float, int, bytes]] = []
+        self.expected: list[tuple[int, int | None]] = []
+
+
+def load_scripts(records: list[WsRecord]) -> dict[int, Script]:
+    """把紀錄依連線整理成 `Script`，依連線編號排序"""
+    scripts: dict[int, Script] = {}
+    for record in records:
+        if record.kind == OPEN:
+            scripts[record.connection_id] = Script(record.timestamp, record.data.decode())
+            continue
+        script = scripts.get(record.connection_id)
+        if script is None:
+            continue
+        if record.kind == SEND:
+            script.sends.append((record.timestamp, len(script.expected), record.data))
+        elif record.kind == RECV:
+            script.expected.append(message_key(record.data))
+        elif record.kind == CLOSE:
+            script.closed_at = record.timestamp
+    return dict(sorted(scripts.items()))
+
+
+class Replay:
+    """重播一條連線，並累積收到的訊息與等待回應的時間"""
+
+    def __init__(self, script: Script, args: argparse.Namespace, start: float):
+        self.script = script
+        self.args = args
+        self.start = start
+        self.received: list[tuple[int, int | None]] = []
+        self.waits: list[float] = []
+        self.stalls = 0
+        self.error: str | None = None
+        self._arrived = asyncio.Condition()
+
+    async def run(self):
+        """開啟連線並依序送出錄到的 frame，最後等剩下的回應到齊"""
+        script = self.script
+        await self._sleep_until(script.opened_at)
+        try:
+            async with websockets.connect(self.args.url, max_size=None) as websocket:
+                listener = asyncio.create_task(self._listen(websocket))
+                try:
+                    for recorded_at, received_before, frame in script.sends:
+                        await self._wait_for(received_before)
+                        await self._sleep_until(recorded_at)
+                        await websocket.send(frame)
+                    await self._wait_for(len(script.expected))
+                    if script.closed_at is not None:
+                        await self._sleep_until(script.closed_at)
+                finally:
+                    listener.cancel()
+        except (OSError, websockets.exceptions.WebSocketException) as e:
+            self.error = repr(e)
+            logger.warning('%s 重播失敗: %r', script.path, e)
+
+    async def _sleep_until(self, recorded_at: float):
+        if self.args.timing == 'original':
+            delay = self.start + recorded_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def _wait_for(self, count: int):
+        """等到收到 count 則訊息，逾時記為 stall 後繼續"""
+        if len(self.received) >= count:
+            return
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.args.timeout), self._arrived:
+                await self._arrived.wait_for(lambda: len(self.received) >= count)
+        except TimeoutError:
+            self.stalls += 1
+            logger.warning(
+                '%s 在 %s 秒內只收到 %s / %s 則訊息', self.script.path, self.args.timeout, len(self.received), count
+            )
+            return
+        self.waits.append(time.perf_counter() - start)
+
+    async def _listen(self, websocket):
+        async for frame in websocket:
+            self.received.append(message_key(frame))
+            async with self._arrived:
+                self._arrived.notify_all()
+
+    def mismatches(self) -> dict[str, int]:
+        """依錄製時的訊息名稱，計算收到的訊息與錄製時不同或缺少的數量"""
+        counts: defaultdict[str, int] = defaultdict(int)
+        for index, expected in enumerate(self.script.expected):
+            if index >= len(self.received) or self.received[index] != expected:
+                counts[message_name(*expected)] += 1
+        return dict(counts)
+
+
+def summarize(replays: list[Replay], elapsed: float, recorded: float) -> dict:
+    """彙整所有連線的重播結果"""
+    waits_ms = sorted(wait * 1000 for replay in replays for wait in replay.waits)
+    mismatches: defaultdict[str, int] = defaultdict(int)
+    for replay in replays:
+        for name, count in replay.mismatches().items():
+            mismatches[name] += count
+    summary = {
+        'connections': len(replays),
+        'failed': sum(replay.error is not None for replay in replays),
+        'sent': sum(len(replay.script.sends) for replay in replays),
+        'expected': sum(len(replay.script.expected) for replay in replays),
+        'received': sum(len(replay.received) for replay in replays),
+        'stalls': sum(replay.stalls for replay in replays),
+        'mismatches': dict(sorted(mismatches.items())),
+        'seconds': round(elapsed, 3),
+        'recorded_seconds': round(recorded, 3),
+        'wait_ms': {'samples': len(waits_ms)},
+    }
+    if waits_ms:
+        summary['wait_ms'].update(
+            {f'p{p}': round(percentile(waits_ms, p), 3) for p in PERCENTILES}, max=round(waits_ms[-1], 3)
+        )
+    return summary
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """重播紀錄檔中的所有連線並回傳結果"""
+    records = list(read_records(args.record))
+    scripts = load_scripts(records)
+    # 錄製時的時間點從第一條連線開啟起算
+    offset = min((script.opened_at for script in scripts.values()), default=0)
+    recorded = records[-1].timestamp - offset if records else 0
+    for script in scripts.values():
+        script.opened_at -= offset
+        if script.closed_at is not None:
+            script.closed_at -= offset
+        script.sends = [(at - offset, before, frame) for at, before, frame in script.sends]
+
+    start = time.perf_counter()
+    replays = [Replay(script, args, start) for script in scripts.values()]
+    await asyncio.gather(*(replay.run() for replay in replays))
+    summary = summarize(replays, time.perf_counter() - start, recorded)
+    return {'config': {'record': args.record, 'timing': args.timing, 'timeout': args.timeout}, 'replay': summary}
+
+
+def main():
+    """解析參數、重播並輸出結果"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('record', help='`--ws-record` 錄下的紀錄檔')
+    parser.add_argument('--url', required=True, help='要重播的 WebSocket 伺服器位址，所有連線共用')
+    parser.add_argument('--timing', default='original', choices=TIMINGS, help='依錄製時的時間點送出，或盡快送出')
+    parser.add_argument('--timeout', type=float, default=5, help='等待回應的秒數，逾時記為 stall 後繼續')
+    parser.add_argument('--output', default='logs/ws_replay.json', help='結果的輸出路徑')
+    parser.add_argument('--log-level', default='WARNING', help='日誌等級')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level, format='%(asctime)s [%(levelname)s] [%(name)s] %(message)s')
+    result = asyncio.run(run(args))
+    print(json.dumps(result['replay'], indent=2, ensure_ascii=False))
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f'重播結果已寫入 {output}')
+
+
+if __name__ == '__main__':
+    main()
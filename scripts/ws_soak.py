@@ -0,0 +1,272 @@
+"""量測單一行程能同時維持多少條 `AsyncBaseWS` 連線，以及長時間執行下的資源變化
+
+依序執行三個階段，結果印出並寫成 JSON (預設 logs/ws_soak.json)，作為容量基準:
+
+1. ramp: 以固定速率開啟 N 條已登入的連線 (同時進行的交握數有上限)，記錄每秒建立的連線數、
+   失敗數與每條連線的記憶體 (RSS 增量 / 連線數)
+2. soak: 維持所有連線 `--duration` 秒，心跳照常運作，另以 `--traffic-rate` 的速率隨機挑連線送出
+   GetPlayerInfo；每 `--sample-interval` 秒取樣一次存活連線數、RSS 與事件迴圈延遲
+3. close: 關閉所有連線，記錄耗時
+
+連線數、速率與挑選連線的亂數種子都固定，對同一個伺服器 (例如本機的 mock server) 重跑
+可得到可比較的結果。預設以 secrets.yml 中 `--env` 環境的 `--user` 登入一次，所有連線共用
+登入回應中的 WebSocket 位址 (伺服器須允許同一身分多條連線)；`--ws-url` 則直接連線、不登入:
+
+    uv run python scripts/ws_soak.py --env qa --connections 10000 --ramp-rate 500 --duration 3600
+    uv run python scripts/ws_soak.py --ws-url ws://127.0.0.1:8000/ws?token=... --connections 2000 --duration 60
+
+一萬條以上的連線需要足夠的檔案描述子，腳本會嘗試把 soft limit 提高到 hard limit。
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.auth import AuthAPI  # noqa: E402
+from api.player import PlayerWS  # noqa: E402
+from utils.api_provider import ApiClientProvider  # noqa: E402
+from utils.async_base_ws import AsyncBaseWS  # noqa: E402
+from utils.config_loader import get_config, set_current_env  # noqa: E402
+from utils.loop_lag import LoopLagMonitor  # noqa: E402
+from utils.ws_timing import ws_timing_summary  # noqa: E402
+
+logger = logging.getLogger('ws_soak')
+
+
+def rss_bytes() -> int:
+    """目前行程的 RSS (位元組)
+
+    Linux 讀取 /proc/self/statm；其他平台退回 `ru_maxrss`，那是峰值而非目前值，只能看出成長。
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+def raise_fd_limit(needed: int):
+    """把檔案描述子的 soft limit 提高到足以容納 needed 條連線 (不超過 hard limit)"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    # 預留給日誌、HTTP 登入等其他用途
+    wanted = needed + 256
+    if soft >= wanted:
+        return
+    target = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    if target < wanted:
+        logger.warning('檔案描述子上限只能提高到 %s，超過的連線會失敗', target)
+
+
+def resolve_ws_url(args: argparse.Namespace) -> str:
+    """回傳要連線的 WebSocket 位址：`--ws-url`，或以 `--user` 登入後取得"""
+    if args.ws_url:
+        return args.ws_url
+    set_current_env(args.env)
+    config = get_config()
+    user = config.user(args.user)
+    auth_api = ApiClientProvider(requests.Session(), config).get(AuthAPI)
+    return auth_api.ws_url_from(auth_api.login(user.account, user.password))
+
+
+class Fleet:
+    """一群維持中的 WebSocket 連線，每條連線由一個 task 持有直到 `close`"""
+
+    def __init__(self, ws_url: str, args: argparse.Namespace):
+        self.ws_url = ws_url
+        self.args = args
+        self.connections: list[AsyncBaseWS] = []
+        self.failures = 0
+        self._settled = 0
+        self._all_settled = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._handshakes = asyncio.Semaphore(args.connect_concurrency)
+        self._tasks: list[asyncio.Task] = []
+
+    def open(self):
+        """開始建立一條連線，結果 (成功或失敗) 計入 `settled`"""
+        self._tasks.append(asyncio.create_task(self._hold()))
+
+    async def wait_settled(self):
+        """等待所有已開始的連線完成交握或失敗"""
+        await self._all_settled.wait()
+
+    def alive(self) -> list[AsyncBaseWS]:
+        return [ws for ws in self.connections if ws.is_alive]
+
+    async def close(self):
+        """關閉所有連線"""
+        self._stop.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _hold(self):
+        async with AsyncExitStack() as stack:
+            async with self._handshakes:
+                try:
+                    ws = await stack.enter_async_context(
+                        AsyncBaseWS(
+                            self.ws_url,
+                            receive_init_msgs=self.args.receive_init_msgs,
+                            queue_size=self.args.queue_size,
+                            overflow='drop-oldest',
+                            heartbeat_interval=self.args.heartbeat_interval,
+                        )
+                    )
+                except Exception as e:
+                    self.failures += 1
+                    logger.debug('連線失敗: %r', e)
+                    ws = None
+                finally:
+                    self._settled += 1
+                    if self._settled == self.args.connections:
+                        self._all_settled.set()
+            if ws is None:
+                return
+            self.connections.append(ws)
+            await self._stop.wait()
+
+
+async def drive_traffic(fleet: Fleet, rate: float, rng: random.Random, counters: dict):
+    """以固定速率隨機挑一條存活的連線送出 GetPlayerInfo，直到被取消"""
+    pending: set[asyncio.Task] = set()
+
+    async def request(ws: AsyncBaseWS):
+        result = await PlayerWS(ws).get_player_info()
+        counters['ok' if result.get('status_code') != 408 else 'timeouts'] += 1
+
+    try:
+        while True:
+            await asyncio.sleep(1 / rate)
+            if fleet.connections:
+                task = asyncio.create_task(request(rng.choice(fleet.connections)))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """執行 ramp、soak、close 三個階段並回傳容量基準"""
+    ws_url = resolve_ws_url(args)
+    raise_fd_limit(args.connections)
+    fleet = Fleet(ws_url, args)
+    rng = random.Random(args.seed)
+    profile = {'config': {k: v for k, v in vars(args).items() if k != 'ws_url'}}
+
+    rss_before = rss_bytes()
+    async with LoopLagMonitor() as ramp_lag:
+        start = time.perf_counter()
+        for i in range(args.connections):
+            # 依固定時間表開啟，不受前面交握快慢影響
+            delay = start + i / args.ramp_rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            fleet.open()
+        await fleet.wait_settled()
+        ramp_elapsed = time.perf_counter() - start
+    connected = len(fleet.connections)
+    rss_after = rss_bytes()
+    profile['ramp'] = {
+        'connected': connected,
+        'failed': fleet.failures,
+        'seconds': round(ramp_elapsed, 3),
+        'connects_per_second': round(connected / ramp_elapsed, 1),
+        'rss_mb': round(rss_after / 2**20, 1),
+        'kib_per_connection': round((rss_after - rss_before) / 1024 / connected, 2) if connected else None,
+        'loop_lag_ms': ramp_lag.stats(),
+    }
+    print(f'ramp: {json.dumps(profile["ramp"], ensure_ascii=False)}')
+
+    counters = {'ok': 0, 'timeouts': 0}
+    traffic = asyncio.create_task(drive_traffic(fleet, args.traffic_rate, rng, counters)) if args.traffic_rate else None
+    samples = []
+    soak_start = time.perf_counter()
+    while time.perf_counter() - soak_start < args.duration:
+        async with LoopLagMonitor() as window_lag:
+            await asyncio.sleep(min(args.sample_interval, args.duration - (time.perf_counter() - soak_start)))
+        sample = {
+            'elapsed_s': round(time.perf_counter() - soak_start, 1),
+            'alive': len(fleet.alive()),
+            'rss_mb': round(rss_bytes() / 2**20, 1),
+            'loop_lag_ms': window_lag.stats(),
+            **counters,
+        }
+        samples.append(sample)
+        print(f'soak: {json.dumps(sample, ensure_ascii=False)}')
+    if traffic is not None:
+        traffic.cancel()
+        await asyncio.gather(traffic, return_exceptions=True)
+
+    heartbeats = [ws.heartbeat_stats() for ws in fleet.connections]
+    rtts = sorted(stats['rtt_last_ms'] for stats in heartbeats if 'rtt_last_ms' in stats)
+    first_rss, last_rss = (samples[0]['rss_mb'], samples[-1]['rss_mb']) if samples else (0, 0)
+    hours = (samples[-1]['elapsed_s'] - samples[0]['elapsed_s']) / 3600 if len(samples) > 1 else 0
+    profile['soak'] = {
+        'seconds': args.duration,
+        'alive_at_end': samples[-1]['alive'] if samples else connected,
+        'rss_growth_mb': round(last_rss - first_rss, 1),
+        'rss_growth_mb_per_hour': round((last_rss - first_rss) / hours, 1) if hours else None,
+        'heartbeat_pings': sum(stats['pings'] for stats in heartbeats),
+        'heartbeat_skipped': sum(stats['skipped'] for stats in heartbeats),
+        'heartbeat_timeouts': sum(stats['timeouts'] for stats in heartbeats),
+        'heartbeat_rtt_p50_ms': rtts[len(rtts) // 2] if rtts else None,
+        'requests': counters,
+        'samples': samples,
+    }
+
+    start = time.perf_counter()
+    await fleet.close()
+    profile['close'] = {'seconds': round(time.perf_counter() - start, 3)}
+    profile['ws_latency'] = ws_timing_summary()
+    return profile
+
+
+def main():
+    """解析參數、執行並輸出容量基準"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--env', default='qa', choices=['dev', 'qa'], help='登入時使用的 secrets.yml 環境')
+    parser.add_argument('--user', default='default_user', help='登入時使用的 secrets.yml users 區塊中的 key')
+    parser.add_argument('--ws-url', help='直接連線的 WebSocket 位址，提供時不登入')
+    parser.add_argument('--connections', type=int, default=1000, help='要維持的連線數')
+    parser.add_argument('--ramp-rate', type=float, default=200, help='每秒開啟的連線數')
+    parser.add_argument('--connect-concurrency', type=int, default=100, help='同時進行的交握數上限')
+    parser.add_argument('--duration', type=float, default=60, help='soak 階段的秒數')
+    parser.add_argument('--sample-interval', type=float, default=10, help='soak 階段的取樣間隔 (秒)')
+    parser.add_argument('--traffic-rate', type=float, default=50, help='soak 階段每秒送出的請求數，0 表示只有心跳')
+    parser.add_argument('--heartbeat-interval', type=float, default=7, help='連線閒置多少秒後送出心跳')
+    parser.add_argument('--queue-size', type=int, default=100, help='每條連線 message_queue 的上限 (滿了丟棄最舊的)')
+    parser.add_argument('--no-init-msgs', dest='receive_init_msgs', action='store_false', help='連線後不等待初始訊息')
+    parser.add_argument('--seed', type=int, default=0, help='挑選送出請求的連線所用的亂數種子')
+    parser.add_argument('--output', default='logs/ws_soak.json', help='容量基準的輸出路徑')
+    parser.add_argument('--log-level', default='WARNING', help='日誌等級，連線數多時 INFO 會大量輸出')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level, format='%(asctime)s [%(levelname)s] [%(name)s] %(message)s')
+    profile = asyncio.run(run(args))
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(profile, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f'容量基準已寫入 {output}')
+
+
+if __name__ == '__main__':
+    main()
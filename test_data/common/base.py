@@ -3,7 +3,7 @@ from typing import Generic, List, Optional
 
 from typing_extensions import NotRequired, TypedDict, TypeVar
 
-from utils.base_request import mask_sensitive
+from utils.masking import mask_sensitive
 
 from .enums import AllureSeverity, PytestMark
 
@@ -1,5 +1,7 @@
+import json
 import logging
 from collections.abc import Generator
+from pathlib import Path
 from typing import Any, AsyncIterator, Callable
 
 import allure
@@ -7,30 +9,189 @@ import pytest
 import pytest_asyncio
 import requests
 
-from api.auth import AuthAPI
+from api.auth import AsyncAuthAPI, AuthAPI
 from test_data.common.expectations import HTTP
 from utils.api_provider import ApiClientProvider
-from utils.async_base_ws import AsyncBaseWS
 from utils.config_loader import User, get_config
+from utils.deadline import deadline
+from utils.http_cache import ResponseCache
+from utils.http_cassette import Cassette
+from utils.http_session import build_async_client, build_session, session_pool_stats, warm_up_session
+from utils.http_timing import timing_summary
+from utils.ws_recorder import WsRecorder, set_ws_recorder
+from utils.ws_timing import ws_timing_summary
 
 logger = logging.getLogger(__name__)
 
 
+# --- Pytest Hooks ---
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]):
+    """重播 cassette 時略過會開啟 WebSocket 連線的測項。
+
+    cassette 只含 HTTP：WS 既沒有錄進 cassette 也沒有替身，登入回應中 `ws_url` 的 token 也已遮蔽，
+    這些測項在重播時必然連不上。`ws` 目錄下的測項以路徑判斷，其他目錄中會開 WS 的測項
+    (例如情境測試) 標上 `@pytest.mark.ws`。
+
+    Args:
+        config: pytest 的設定物件，用於讀取 `--http-replay`。
+        items: 本次收集到的所有測項。
+    """
+    if not config.getoption('--http-replay'):
+        return
+    ws_dir = Path(__file__).parent / 'ws'
+    skip = pytest.mark.skip(reason='--http-replay 只重播 HTTP，需要 WebSocket 的測項略過')
+    for item in items:
+        if item.path.is_relative_to(ws_dir) or item.get_closest_marker('ws'):
+            item.add_marker(skip)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item: pytest.Item):
+    """為標記 `@pytest.mark.deadline(seconds)` 的測項套上整體的時間預算
+
+    只框住測項本體：前置的 fixture 不占用預算，清理用的 fixture (例如還原密碼) 也不會
+    因為預算用完而無法執行。fixture 需要自己的預算時，直接在其中使用 `deadline`。
+
+    Args:
+        item: 當前執行的測試項目。
+    """
+    marker = item.get_closest_marker('deadline')
+    if marker is None:
+        yield
+        return
+    with deadline(*marker.args, **marker.kwargs):
+        yield
+
+
 # --- Core API Fixtures ---
 
 
 @pytest.fixture(scope='package')
-def shared_session() -> Generator[requests.Session, Any, None]:
+def http_cassette(request: pytest.FixtureRequest) -> Generator[Cassette | None, Any, None]:
+    """依 `--http-record` / `--http-replay` 開啟整個 package 共用的 cassette，兩者皆未指定時為 None。
+
+    同步與非同步的 client 共用同一份 cassette，請求的錄製與重播順序才會一致。
+
+    Args:
+        request: pytest 的 request 物件，用於讀取 cassette 相關的命令列參數。
+
+    Yields:
+        開啟中的 `Cassette`，或 None。
+    """
+    record_path = request.config.getoption('--http-record')
+    replay_path = request.config.getoption('--http-replay')
+    if not (record_path or replay_path):
+        yield None
+        return
+    if record_path:
+        # 種子已在 pytest_configure 決定並用於產生測試資料，記進 cassette 供重播時沿用
+        cassette = Cassette(record_path, mode='record', seed=request.config.getoption('--http-seed'))
+    else:
+        cassette = Cassette(replay_path, mode='replay')
+    yield cassette
+    cassette.close()
+
+
+@pytest.fixture(scope='package')
+def shared_session(
+    request: pytest.FixtureRequest, http_cassette: Cassette | None
+) -> Generator[requests.Session, Any, None]:
     """提供一個在整個測試 package 中共用的 `requests.Session` 物件。
 
+    各服務的連線池大小、阻塞行為與預熱連線數取自 secrets.yml 的 'services' 區塊。
+    結束時把各服務的連線池命中統計寫進 log 與 Allure 附件，用來判斷 `pool_maxsize`
+    是否足夠 (misses 遠多於服務數時，代表連線一直在重開)。
+
+    帶 `--http-cache` 時所有服務共用一個 GET 回應快取，其命中統計一併輸出；cassette 的
+    錄製 / 重播筆數亦同。重播時不連線，因此不預熱。
+    另把所有請求 (含 async) 依端點彙整的各階段耗時與傳輸量統計附上，用來判斷變慢的是
+    網路、伺服器還是框架本身，以及壓縮是否有效。
+
+    Args:
+        request: pytest 的 request 物件，用於讀取快取相關的命令列參數。
+        http_cassette: 整個 package 共用的 cassette，可為 None。
+
     Yields:
         一個 `requests.Session` 物件，用於共用連線。
     """
-    session = requests.Session()
+    cache = None
+    if request.config.getoption('--http-cache'):
+        cache = ResponseCache(
+            ttl=request.config.getoption('--http-cache-ttl'),
+            max_entries=request.config.getoption('--http-cache-size'),
+        )
+    session = build_session(get_config(), cache=cache, cassette=http_cassette)
+    if http_cassette is None or not http_cassette.replaying:
+        warm_up_session(session)
     yield session
+    stats = {'pools': session_pool_stats(session)}
+    if cache is not None:
+        stats['cache'] = cache.stats()
+    if http_cassette is not None:
+        stats['cassette'] = http_cassette.stats()
+    logger.info('HTTP 連線統計 => %s', stats)
+    allure.attach(json.dumps(stats, indent=2), name='HTTP 連線統計', attachment_type=allure.attachment_type.JSON)
+    timings = timing_summary()
+    logger.info('HTTP 端點統計 => %s', timings)
+    allure.attach(
+        json.dumps(timings, indent=2, ensure_ascii=False),
+        name='HTTP 端點統計',
+        attachment_type=allure.attachment_type.JSON,
+    )
     session.close()
 
 
+@pytest.fixture(scope='package', autouse=True)
+def ws_latency_report(request: pytest.FixtureRequest) -> Generator[None, Any, None]:
+    """在所有 API 測試結束後輸出 WS 請求依 op_code / sub_code 彙整的耗時統計。
+
+    統計 (含逾時與非預期訊息數，見 `utils/ws_timing.py`) 寫入 `--ws-latency-report` 指定的
+    JSON 檔並附到 Allure，可跨版本比較同一種請求是否變慢。沒有 WS 請求時不輸出。
+
+    Args:
+        request: pytest 的 request 物件，用於讀取輸出路徑。
+    """
+    yield
+    summary = ws_timing_summary()
+    if not summary:
+        return
+    content = json.dumps(summary, indent=2, ensure_ascii=False)
+    path = request.config.rootpath / request.config.getoption('--ws-latency-report')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding='utf-8')
+    logger.info('WS 請求耗時統計已寫入 %s => %s', path, summary)
+    allure.attach(content, name='WS 請求耗時統計', attachment_type=allure.attachment_type.JSON)
+
+
+@pytest.fixture(scope='package', autouse=True)
+def ws_recorder(request: pytest.FixtureRequest) -> Generator[WsRecorder | None, Any, None]:
+    """依 `--ws-record` 錄下所有 API 測試中 WS 連線收送的原始 frame，未指定時為 None。
+
+    期間建立的 `AsyncBaseWS` 都寫入同一份紀錄檔，之後可用 `scripts/ws_replay.py` 離線重播。
+    結束時把錄製統計附到 Allure。
+
+    Args:
+        request: pytest 的 request 物件，用於讀取紀錄檔路徑。
+
+    Yields:
+        錄製中的 `WsRecorder`，或 None。
+    """
+    path = request.config.getoption('--ws-record')
+    if not path:
+        yield None
+        return
+    recorder = WsRecorder(request.config.rootpath / path)
+    set_ws_recorder(recorder)
+    yield recorder
+    set_ws_recorder(None)
+    recorder.close()
+    allure.attach(
+        json.dumps(recorder.stats(), indent=2), name='WS 錄製統計', attachment_type=allure.attachment_type.JSON
+    )
+
+
 @pytest.fixture(scope='package')
 def api_provider(shared_session: requests.Session) -> ApiClientProvider:
     """提供一個 package 等級、已設定好的 API Client 提供者。
@@ -47,6 +208,40 @@ def api_provider(shared_session: requests.Session) -> ApiClientProvider:
     return ApiClientProvider(shared_session, get_config())
 
 
+@pytest_asyncio.fixture
+async def async_api_provider(
+    shared_session: requests.Session, http_cassette: Cassette | None
+) -> AsyncIterator[ApiClientProvider]:
+    """提供一個能建立非同步 client (`AsyncBaseRequest` 子類別) 的 API Client 提供者。
+
+    `httpx.AsyncClient` 的連線綁定在建立它的事件迴圈上，而 async 測試預設每個測試
+    一個事件迴圈，因此這裡是 function scope，不能像 `api_provider` 一樣跨測試共用。
+    同步 client 仍可從它取得，並共用 `shared_session`。
+
+    Args:
+        shared_session: 整個測試 package 中共用的 `requests.Session` 物件。
+        http_cassette: 與 `shared_session` 共用的 cassette，可為 None。
+
+    Yields:
+        一個帶有 async_session 的 ApiClientProvider 物件。
+    """
+    async with build_async_client(get_config(), cassette=http_cassette) as async_session:
+        yield ApiClientProvider(shared_session, get_config(), async_session=async_session)
+
+
+@pytest.fixture
+def async_auth_api(async_api_provider: ApiClientProvider) -> AsyncAuthAPI:
+    """提供一個 `AsyncAuthAPI` 物件，供 async fixture 與測試登入使用。
+
+    Args:
+        async_api_provider: 能建立非同步 client 的提供者。
+
+    Returns:
+        一個 `AsyncAuthAPI` 物件。
+    """
+    return async_api_provider.get(AsyncAuthAPI)
+
+
 @pytest.fixture(scope='package')
 def auth_api(api_provider: ApiClientProvider) -> AuthAPI:
     """提供一個 package 範圍的 `AuthAPI` 物件。
@@ -133,25 +328,6 @@ def authed_api(api_provider: ApiClientProvider, access_token: str) -> ApiClientP
     return api_provider.with_auth(access_token)
 
 
-@pytest_asyncio.fixture
-async def ws_connect(auth_api: AuthAPI, user_data: User) -> AsyncIterator[AsyncBaseWS]:
-    """提供一個已連線的 WebSocket 物件。
-
-    Args:
-        auth_api: 用於登入以獲取 WebSocket URL 的 `AuthAPI` 物件。
-        user_data: 登入所需的使用者資料。
-
-    Yields:
-        一個已連線的 `AsyncBaseWS` 物件。
-
-    Raises:
-        ValueError: 如果登入後找不到 WebSocket URL。
-    """
-    result = auth_api.login(user_data.account, user_data.password)
-    async with AsyncBaseWS(auth_api.ws_url_from(result)) as ws:
-        yield ws
-
-
 # --- User Creation Fixtures ---
 
 
@@ -0,0 +1,52 @@
+import dataclasses
+import gzip
+import json
+
+import pytest
+
+from api.service_names import Service
+from utils.config_loader import Config, get_config
+from utils.http_cassette import Cassette
+from utils.http_session import build_async_client
+
+
+def _config_with_compression() -> Config:
+    """回傳 front 服務開啟請求壓縮並覆蓋 Accept-Encoding 的設定，其他設定與當前環境相同"""
+    config = get_config()
+    settings = dataclasses.replace(
+        config.service(Service.FRONT.value),
+        request_compression='gzip',
+        compression_threshold=0,
+        accept_encoding='identity',
+    )
+    return dataclasses.replace(config, services={**config.services, Service.FRONT.value: settings})
+
+
+class TestAsyncClient:
+    """固定非同步 client 套用請求壓縮與 Accept-Encoding 設定，但不經過 GET 快取 (見 `build_async_client`)"""
+
+    @pytest.mark.asyncio
+    async def test_request_compression_applied(self, http_cassette: Cassette | None):
+        if http_cassette is not None and http_cassette.replaying:
+            pytest.skip('重播時請求不會送出，與同步 session 一樣不壓縮')
+        config = _config_with_compression()
+        user = config.user('default_user')
+        body = {'account': user.account, 'password': user.password}
+        async with build_async_client(config, cassette=http_cassette) as client:
+            response = await client.post(f'{config.url(Service.FRONT.value)}/auth/login', json=body)
+
+        assert response.status_code == 200, '後端應能解開壓縮後的請求 body'
+        assert response.request.headers['content-encoding'] == 'gzip'
+        assert json.loads(gzip.decompress(response.request.content)) == body
+        assert response.request.headers['accept-encoding'] == 'identity'
+
+    @pytest.mark.asyncio
+    async def test_get_not_cached(self, http_cassette: Cassette | None):
+        config = _config_with_compression()
+        url = f'{config.url(Service.FRONT.value)}/items/'
+        async with build_async_client(config, cassette=http_cassette) as client:
+            await client.get(url)
+            response = await client.get(url)
+
+        for header in ('if-none-match', 'if-modified-since'):
+            assert header not in response.request.headers, '非同步 client 不應以快取重新驗證 GET'
@@ -4,7 +4,7 @@ from api.item import ItemAPI
 from test_data.api_test_data.http.get_item import GetItemCase, generate_get_item_cases
 from test_data.api_test_data.http.get_items import GetItemsCase, generate_get_items_cases
 from utils.api_provider import ApiClientProvider
-from utils.case_verify_tool import verify_case_auto
+from utils.case_verify_tool import assert_result, verify_case_auto
 
 
 class TestGetItem:
@@ -23,3 +23,12 @@ class TestGetItem:
         expected = case.expected
         actual_result = item_api.get_all_items()
         verify_case_auto(actual_result, expected)
+
+    @pytest.mark.parametrize('case', generate_get_items_cases())
+    def test_get_items_streaming(self, authed_api: ApiClientProvider, case: GetItemsCase):
+        item_api = authed_api.get(ItemAPI)
+        expected = case.expected
+        with item_api.stream_all_items(schema=expected['schema']) as items:
+            item_ids = [item['id'] for item in items]
+        assert len(set(item_ids)) == len(item_ids), '物品 id 有重複'
+        assert_result(items.envelope, expected['result'])
@@ -7,7 +7,7 @@ import logging
 import allure
 import pytest
 
-from api.auth import AuthAPI
+from api.auth import AsyncAuthAPI
 from api.player import PlayerWS
 from test_data.api_test_data.scenario.user_profile_scenario import (
     UserProfileScenarioCase,
@@ -22,25 +22,27 @@ logger = logging.getLogger(__name__)
 
 class TestUserProfileScenario:
     @pytest.mark.parametrize('case', generate_user_profile_scenario_cases())
+    @pytest.mark.deadline(60)
+    @pytest.mark.ws
     @pytest.mark.asyncio
-    async def test_user_profile_scenario(self, case: UserProfileScenarioCase, api_provider: ApiClientProvider):
-        # 註冊與登入本身不需授權，使用匿名的 client
-        auth_api = api_provider.get(AuthAPI)
+    async def test_user_profile_scenario(self, case: UserProfileScenarioCase, async_api_provider: ApiClientProvider):
+        # 註冊與登入本身不需授權，使用匿名的 client；全程走非同步 client，HTTP 請求不會卡住 WS 的心跳與監聽
+        auth_api = async_api_provider.get(AsyncAuthAPI)
 
         step_1 = '步驟 1: 註冊新帳號'
         with allure.step(step_1):
             logger.info(step_1)
-            register_result = auth_api.register(case.request.account, case.request.initial_password)
+            register_result = await auth_api.register(case.request.account, case.request.initial_password)
             verify_case_auto(register_result, case.expected['register'])
 
         step_2 = '步驟 2: 使用新帳號登入'
         with allure.step(step_2):
             logger.info(step_2)
-            login_result = auth_api.login(case.request.account, case.request.initial_password)
+            login_result = await auth_api.login(case.request.account, case.request.initial_password)
             verify_case_auto(login_result, case.expected['login'])
             login_data = login_result.get('data')
             # 後續需授權的步驟改用這個已認證的 client，不影響上面的匿名 auth_api
-            authed_auth_api = api_provider.with_auth(login_data.get('access_token')).get(AuthAPI)
+            authed_auth_api = async_api_provider.with_auth(login_data.get('access_token')).get(AsyncAuthAPI)
             ws_url = auth_api.ws_url_from(login_result)
             init_name = login_data.get('player_info').get('username')
 
@@ -66,7 +68,7 @@ class TestUserProfileScenario:
         step_5 = '步驟 5: 變更密碼'
         with allure.step(step_5):
             logger.info(step_5)
-            change_password_result = authed_auth_api.change_password(
+            change_password_result = await authed_auth_api.change_password(
                 case.request.initial_password, case.request.new_password
             )
             verify_case_auto(change_password_result, case.expected['change_password'])
@@ -74,15 +76,17 @@ class TestUserProfileScenario:
         step_6 = '步驟 6: 驗證新密碼有效'
         with allure.step(step_6):
             logger.info(step_6)
-            verify_login_result = auth_api.login(case.request.account, case.request.new_password)
+            verify_login_result = await auth_api.login(case.request.account, case.request.new_password)
             verify_case_auto(verify_login_result, case.expected['login'])
             # 改密碼後舊 token 已失效，以新 token 重新取得已認證的 client
-            authed_auth_api = api_provider.with_auth(verify_login_result.get('data').get('access_token')).get(AuthAPI)
+            authed_auth_api = async_api_provider.with_auth(verify_login_result.get('data').get('access_token')).get(
+                AsyncAuthAPI
+            )
 
         step_7 = '步驟 7: 還原為初始密碼'
         with allure.step(step_7):
             logger.info(step_7)
-            revert_password_result = authed_auth_api.change_password(
+            revert_password_result = await authed_auth_api.change_password(
                 case.request.new_password, case.request.initial_password
             )
             verify_case_auto(revert_password_result, case.expected['revert_password'])
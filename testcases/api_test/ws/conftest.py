@@ -0,0 +1,152 @@
+import json
+import logging
+from pathlib import Path
+from typing import AsyncIterator
+
+import allure
+import pytest
+import pytest_asyncio
+import requests
+from pytest_asyncio import is_async_test
+
+from api.auth import AsyncAuthAPI
+from utils.api_provider import ApiClientProvider
+from utils.async_base_ws import AsyncBaseWS
+from utils.config_loader import User, get_config
+from utils.http_cassette import Cassette
+from utils.http_session import build_async_client
+from utils.loop_lag import LoopLagMonitor
+from utils.ws_pool import WsPool
+
+logger = logging.getLogger(__name__)
+
+
+# --- Pytest Hooks ---
+
+
+def pytest_collection_modifyitems(items: list[pytest.Item]):
+    """讓本目錄的 async 測試共用一個 package 範圍的事件迴圈。
+
+    WebSocket 連線綁定在建立它的事件迴圈上，`ws_pool` 的連線要跨測試重用，測試就得跑在
+    同一個迴圈中。只處理本目錄底下的測項，其他目錄維持每個測試一個迴圈。
+
+    Args:
+        items: 本次收集到的所有測項。
+    """
+    here = Path(__file__).parent
+    for item in items:
+        if is_async_test(item) and item.path.is_relative_to(here):
+            item.add_marker(pytest.mark.asyncio(loop_scope='package'), append=False)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item: pytest.Item):
+    """把各階段的結果存在測項上 (`item.rep_setup` / `rep_call` / `rep_teardown`)，供 fixture 判斷測試是否失敗。
+
+    Args:
+        item: 當前執行的測試項目。
+    """
+    outcome = yield
+    report = outcome.get_result()
+    setattr(item, f'rep_{report.when}', report)
+
+
+# --- WebSocket Fixtures ---
+
+
+@pytest_asyncio.fixture(scope='package', loop_scope='package', autouse=True)
+async def loop_lag() -> AsyncIterator[LoopLagMonitor]:
+    """量測本 package 共用的事件迴圈的延遲，結束時寫進 log 與 Allure 附件。
+
+    所有 WS 連線的收訊、心跳與 (解) 壓縮都在這個迴圈上，延遲偏高代表有同步的工作卡住了迴圈
+    (見 `utils/ws_codec.py` 的 offload_threshold)。
+
+    Yields:
+        一個取樣中的 `LoopLagMonitor` 物件。
+    """
+    async with LoopLagMonitor() as monitor:
+        yield monitor
+    stats = monitor.stats()
+    logger.info('WS 事件迴圈延遲 (ms) => %s', stats)
+    allure.attach(json.dumps(stats, indent=2), name='WS 事件迴圈延遲', attachment_type=allure.attachment_type.JSON)
+
+
+@pytest_asyncio.fixture(scope='package', loop_scope='package')
+async def ws_pool(
+    request: pytest.FixtureRequest, shared_session: requests.Session, http_cassette: Cassette | None
+) -> AsyncIterator[WsPool]:
+    """提供本 package 共用、依使用者重用已登入連線的 WebSocket 連線池。
+
+    開新連線時的登入走非同步的 `AsyncAuthAPI`，其 `httpx.AsyncClient` 與連線池同樣綁在
+    package 的事件迴圈上。結束時把重用統計寫進 log 與 Allure 附件。
+
+    Args:
+        request: pytest 的 request 物件，用於讀取連線池相關的命令列參數。
+        shared_session: 整個測試 package 中共用的 `requests.Session` 物件。
+        http_cassette: 與 `shared_session` 共用的 cassette，可為 None。
+
+    Yields:
+        一個 `WsPool` 物件。
+    """
+    async with build_async_client(get_config(), cassette=http_cassette) as async_session:
+        auth_api = ApiClientProvider(shared_session, get_config(), async_session=async_session).get(AsyncAuthAPI)
+
+        async def ws_url_for(user: User) -> str:
+            return auth_api.ws_url_from(await auth_api.login(user.account, user.password))
+
+        pool = WsPool(
+            ws_url_for,
+            idle_timeout=request.config.getoption('--ws-pool-idle-timeout'),
+            max_lifetime=request.config.getoption('--ws-pool-max-lifetime'),
+        )
+        try:
+            yield pool
+        finally:
+            stats = pool.stats()
+            logger.info('WS 連線池統計 => %s', stats)
+            allure.attach(
+                json.dumps(stats, indent=2), name='WS 連線池統計', attachment_type=allure.attachment_type.JSON
+            )
+            await pool.close()
+
+
+@pytest_asyncio.fixture(loop_scope='package')
+async def ws_connect(request: pytest.FixtureRequest, ws_pool: WsPool, user_data: User) -> AsyncIterator[AsyncBaseWS]:
+    """提供一個已連線的 WebSocket 物件，取自 `ws_pool`，測試結束後歸還。
+
+    同一使用者的連線會在測試之間重用，`player_init_info` 因此可能是先前連線時的內容；
+    要比對初始訊息的測試請加上 `@pytest.mark.ws_fresh_connection` 取得新連線。
+    測試失敗時把連線最近收到的訊息、`message_queue` 與心跳的統計附到 Allure 供診斷，
+    並關閉連線而不歸還——失敗的測試可能留下未讀的回應或逾時的請求。
+
+    Args:
+        request: pytest 的 request 物件，用於讀取 `ws_fresh_connection` 標記。
+        ws_pool: 本 package 共用的 WebSocket 連線池。
+        user_data: 連線所屬的使用者。
+
+    Yields:
+        一個已連線的 `AsyncBaseWS` 物件。
+
+    Raises:
+        ValueError: 如果登入後找不到 WebSocket URL。
+    """
+    fresh = request.node.get_closest_marker('ws_fresh_connection') is not None
+    async with ws_pool.connection(user_data, fresh=fresh) as ws:
+        yield ws
+        report = getattr(request.node, 'rep_call', None)
+        if report is not None and report.failed:
+            allure.attach(
+                json.dumps(
+                    {
+                        'queue': ws.queue_stats(),
+                        'heartbeat': ws.heartbeat_stats(),
+                        'recent_messages': list(ws.recent_messages),
+                    },
+                    indent=2,
+                    ensure_ascii=False,
+                    default=repr,
+                ),
+                name='WS 最近訊息',
+                attachment_type=allure.attachment_type.JSON,
+            )
+            ws_pool.discard(ws)
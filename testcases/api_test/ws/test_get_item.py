@@ -18,6 +18,16 @@ class TestItemWS:
         actual_result = await item_ws_api.get_item_by_id(item_id)
         verify_case_auto(actual_result, expected)
 
+    @pytest.mark.asyncio
+    async def test_get_items_by_ids_ws(self, ws_connect: AsyncBaseWS):
+        # 把單筆查詢的所有案例 (含失敗的) 放在同一批管線化送出，每筆結果須與其單獨查詢時相同
+        cases: list[GetItemWsCase] = [param.values[0] for param in generate_get_item_ws_cases()]
+        item_ws_api = ItemWS(ws_connect)
+
+        actual_results = await item_ws_api.get_items_by_ids([case.request.item_id for case in cases], window=2)
+        for case, actual_result in zip(cases, actual_results, strict=True):
+            verify_case_auto(actual_result, case.expected)
+
     @pytest.mark.parametrize('case', generate_get_items_cases())
     @pytest.mark.asyncio
     async def test_get_items_ws(self, ws_connect: AsyncBaseWS, case: GetItemsCase):
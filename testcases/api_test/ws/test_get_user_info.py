@@ -8,6 +8,7 @@ from utils.case_verify_tool import verify_case_auto
 
 @pytest.mark.parametrize('case', generate_get_user_info_cases())
 class TestGetUserInfo:
+    @pytest.mark.ws_fresh_connection
     @pytest.mark.asyncio
     async def test_get_user_info(self, ws_connect: AsyncBaseWS, case: GetUserInfoCase):
         player = PlayerWS(ws_connect)
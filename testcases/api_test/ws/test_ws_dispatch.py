@@ -0,0 +1,79 @@
+import asyncio
+from typing import AsyncIterator
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from api.item import ItemWS
+from api.player import PlayerWS
+from api.ws_constants import ItemFlow, OpCode, PlayerFlow
+from utils.async_base_ws import AsyncBaseWS
+from utils.mock_backend import DEFAULT_USERS, MockBackend
+
+# 模擬後端每個回應的延遲 (秒)，讓逾時的請求的回應一定晚於逾時才到
+LATENCY = 0.2
+
+
+@pytest_asyncio.fixture(loop_scope='package')
+async def slow_ws() -> AsyncIterator[AsyncBaseWS]:
+    """提供一條連到行程內、回應有固定延遲的模擬後端的 WebSocket 連線。
+
+    不論是否指定 `--mock-backend` 都另開一個模擬後端，也不經過 `ws_pool`——逾時後的連線不能交給其他測試重用。
+
+    Yields:
+        一個已連線的 `AsyncBaseWS` 物件。
+    """
+    user = DEFAULT_USERS['default_user']
+    async with MockBackend(latency=LATENCY, users=[user]) as backend:
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                f'{backend.base_url}/auth/login', json={'account': user.account, 'password': user.password}
+            )
+        async with AsyncBaseWS(response.json()['data']['ws_url']) as ws:
+            yield ws
+
+
+class TestWsDispatch:
+    @pytest.mark.asyncio
+    async def test_concurrent_requests(self, slow_ws: AsyncBaseWS):
+        # 不同種類的請求同時在途中，各自收到自己的回應
+        item_ws_api = ItemWS(slow_ws)
+        player_info, item, items = await asyncio.gather(
+            PlayerWS(slow_ws).get_player_info(),
+            item_ws_api.get_item_by_id(1),
+            item_ws_api.get_items_by_ids([2, 3, 4]),
+        )
+
+        assert player_info['data']['username'] == DEFAULT_USERS['default_user'].account
+        assert item['data']['id'] == 1
+        assert [result['data']['id'] for result in items] == [2, 3, 4]
+
+    @pytest.mark.asyncio
+    async def test_late_reply_is_not_delivered_to_next_request(self, slow_ws: AsyncBaseWS):
+        # 逾時的請求的回應之後才到，不能被當成下一個同種請求的回應
+        timed_out = await slow_ws.send_and_receive(
+            OpCode.C2SItemFlow.value,
+            OpCode.S2CItemFlow.value,
+            ItemFlow.GetItemById.value,
+            {'item_id': 1},
+            timeout=LATENCY / 2,
+        )
+        assert timed_out['status_code'] == 408
+        assert slow_ws.has_pending_replies
+
+        item_ws_api = ItemWS(slow_ws)
+        item = await item_ws_api.get_item_by_id(2)
+        items = await item_ws_api.get_items_by_ids([3, 4, 5])
+
+        assert item['data']['id'] == 2
+        assert [result['data']['id'] for result in items] == [3, 4, 5]
+        assert not slow_ws.has_pending_replies
+
+    @pytest.mark.asyncio
+    async def test_unmatched_message_goes_to_queue(self, slow_ws: AsyncBaseWS):
+        # 沒有請求在等的訊息放進 message_queue
+        await slow_ws.send_msg({'op_code': OpCode.C2SPlayerFlow.value, 'sub_code': PlayerFlow.GetPlayerInfo.value})
+
+        message = await asyncio.wait_for(slow_ws.receive_msg(), timeout=LATENCY * 10)
+        assert message['data']['username'] == DEFAULT_USERS['default_user'].account
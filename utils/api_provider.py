@@ -1,8 +1,10 @@
 from typing import Type, TypeVar
 
+import httpx
 import requests
 
 from api.service_names import Service
+from utils.async_base_request import AsyncBaseRequest
 from utils.config_loader import Config
 
 T = TypeVar('T')
@@ -19,6 +21,7 @@ class ApiClientProvider:
         session: requests.Session,
         config: Config,
         default_headers: dict = None,
+        async_session: httpx.AsyncClient = None,
     ):
         """初始化 Provider
 
@@ -27,17 +30,20 @@ class ApiClientProvider:
             config: 當前環境的測試設定，用於查詢各服務的 base URL。
             default_headers: 由此 Provider 建立的 client 都會帶上的 headers。
                 用於表達 Provider 的身分 (例如已認證)，見 `with_auth`。
+            async_session: 共用的 httpx.AsyncClient 物件，建立 `AsyncBaseRequest` 子類別時使用。
+                連線綁定在建立它的事件迴圈上，因此由 async fixture 逐測試提供，可選。
         """
         self._session = session
         self._config = config
         self._default_headers = default_headers or {}
+        self._async_session = async_session
 
     def with_auth(self, token: str) -> 'ApiClientProvider':
         """以指定的 token 建立一個「已認證」的 Provider。
 
         回傳的是新的 Provider 實例，原本的 Provider 不受影響，因此匿名與已認證
         兩種身分可以並存 (也可同時持有多個不同使用者的 Provider)。
-        新舊 Provider 共用同一個 session。
+        新舊 Provider 共用同一個 session 與 async_session。
 
         Args:
             token: 登入取得的 access token (不含 'Bearer ' 前綴)。
@@ -49,11 +55,21 @@ class ApiClientProvider:
             self._session,
             self._config,
             default_headers={**self._default_headers, 'Authorization': f'Bearer {token}'},
+            async_session=self._async_session,
         )
 
     def _create_client(self, api_class: Type[T], base_url: str) -> T:
-        """內部使用的 client 建立方法。"""
-        return api_class(base_url=base_url, session=self._session, default_headers=self._default_headers)
+        """內部使用的 client 建立方法，依 client 是否為非同步版本選用對應的 session。"""
+        if issubclass(api_class, AsyncBaseRequest):
+            if self._async_session is None:
+                raise RuntimeError(
+                    f'{api_class.__name__} 是非同步 client，但此 Provider 沒有 async_session，'
+                    '請改用 `async_api_provider` fixture 取得'
+                )
+            session = self._async_session
+        else:
+            session = self._session
+        return api_class(base_url=base_url, session=session, default_headers=self._default_headers)
 
     def get(self, api_class: Type[T], service: Service = None) -> T:
         """獲取一個設定好的 API Client 物件。
@@ -71,6 +87,7 @@ class ApiClientProvider:
         Raises:
             AttributeError: 如果 api_class 未宣告 `service` 屬性且未傳入 `service` 參數。
             ConfigError: 如果設定檔的 'urls' 中找不到該服務。
+            RuntimeError: 如果 api_class 是 `AsyncBaseRequest` 子類別，但此 Provider 沒有 async_session。
         """
         target_service = service or getattr(api_class, 'service', None)
         if target_service is None:
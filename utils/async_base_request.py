@@ -0,0 +1,126 @@
+"""提供一個非同步 HTTP 請求的基礎類別"""
+
+import logging
+import time
+from typing import ClassVar
+
+import allure
+import httpx
+
+from api.service_names import Service
+from utils.base_request import BaseRequest
+from utils.http_timing import HttpxTracer, record_timing
+from utils.response import decode_body, normalize_response
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBaseRequest:
+    """`BaseRequest` 的非同步版本，底層為共用連線池的 `httpx.AsyncClient`
+
+    async 測試若呼叫同步的 `BaseRequest`，整個 HTTP 往返期間事件迴圈都會被卡住，
+    WebSocket 的心跳與監聽任務也跟著停擺。此類別讓 HTTP 請求與 WebSocket 收發在
+    同一個事件迴圈中交錯進行。
+
+    介面、headers 優先序、遮蔽與日誌皆與 `BaseRequest` 相同，差別只在動詞方法要 await:
+
+        class AsyncItemAPI(AsyncBaseRequest):
+            service = Service.FRONT
+
+            async def get_item(self, item_id: int) -> dict:
+                return await self.get(f'/items/{item_id}')
+    """
+
+    # 由子類別指定，`ApiClientProvider` 依此決定要使用哪個 base URL
+    service: ClassVar[Service]
+
+    def __init__(self, base_url, session: httpx.AsyncClient = None, default_headers: dict = None):
+        """初始化 AsyncBaseRequest
+
+        Args:
+            base_url: API 的 base URL
+            session: 共用的 `httpx.AsyncClient` 物件。如果未提供，會自動建立一個新的
+            default_headers: 此 client 每次請求都會帶上的 headers (例如認證資訊)。
+                刻意存放在 client 自身而非 session，避免污染其他共用同一 session 的 client
+        """
+        self.base_url = base_url
+        self.session = session if session else httpx.AsyncClient()
+        self.default_headers = default_headers or {}
+
+    async def get(self, path, **kwargs):
+        """發送一個 GET 請求，參數同 `BaseRequest.get`"""
+        return await self._send(path, 'GET', **kwargs)
+
+    async def post(self, path, data=None, json=None, **kwargs):
+        """發送一個 POST 請求，參數同 `BaseRequest.post`"""
+        return await self._send(path, 'POST', data, json, **kwargs)
+
+    async def put(self, path, data=None, json=None, **kwargs):
+        """發送一個 PUT 請求，參數同 `BaseRequest.put`"""
+        return await self._send(path, 'PUT', data, json, **kwargs)
+
+    async def delete(self, path, **kwargs):
+        """發送一個 DELETE 請求，參數同 `BaseRequest.delete`"""
+        return await self._send(path, 'DELETE', **kwargs)
+
+    async def _send(self, path: str, method: str, data=None, json: dict = None, **kwargs) -> dict:
+        """發送請求、寫入回應日誌並回傳正規化結果 (供四個動詞方法共用)"""
+        with allure.step(f'{method} {path}'):
+            start = time.perf_counter()
+            response = await self._request(path, method, data, json, **kwargs)
+            decode_start = time.perf_counter()
+            body = decode_body(response)
+            decode = time.perf_counter() - decode_start
+            BaseRequest.save_response_log(response, body)
+            result = normalize_response(response, body)
+            record_timing(method, path, response, decode=decode, total=time.perf_counter() - start)
+            return result
+
+    async def request(self, path: str, method: str, data=None, json: dict = None, **kwargs) -> httpx.Response:
+        """發送一個 HTTP 請求的核心方法
+
+        行為與 `BaseRequest.request` 一致。`httpx` 的 `data` 只接受表單 dict，
+        原始的 str / bytes body 要改放 `content`，此處代為轉換，呼叫端不必區分兩個函式庫。
+
+        Args:
+            path: API 的路徑
+            method: HTTP 請求方法 (例如 'GET', 'POST')
+            data: `data` 參數，用於 POST/PUT 等請求，可選
+            json: `json` 參數，用於 POST/PUT 等請求，可選
+            **kwargs: 其他傳遞給 `httpx.AsyncClient.request` 的參數 (例如 headers, params)
+
+        Returns:
+            一個 `httpx.Response` 物件
+
+        Raises:
+            httpx.HTTPError: 當請求失敗時觸發
+        """
+        with allure.step(f'{method} {path}'):
+            return await self._request(path, method, data, json, **kwargs)
+
+    async def _request(self, path: str, method: str, data=None, json: dict = None, **kwargs) -> httpx.Response:
+        """`request` 去掉 Allure step 的本體，並記下回應的 `phase_timings` (由 httpx 的 trace) 與 `transfer_sizes`
+
+        非同步請求不壓縮 body，送出與壓縮前的位元組數相同。
+        """
+        try:
+            headers = {**self.default_headers, **(kwargs.pop('headers', None) or {})}
+            url = self.base_url + path
+            BaseRequest.request_log(url, method, data=data, json=json, **kwargs)
+            if isinstance(data, (str, bytes)):
+                kwargs['content'], data = data, None
+            tracer = HttpxTracer()
+            kwargs['extensions'] = {**kwargs.get('extensions', {}), 'trace': tracer}
+            response = await self.session.request(method, url, data=data, json=json, headers=headers, **kwargs)
+            response.phase_timings = tracer.phase_timings()
+            request_size = len(response.request.content)
+            response.transfer_sizes = {
+                'request_sent': request_size,
+                'request_uncompressed': request_size,
+                'response_received': response.num_bytes_downloaded,
+                'response_decompressed': len(response.content),
+            }
+            return response
+        except httpx.HTTPError as e:
+            logger.error(f'Request failed: {e}')
+            raise
@@ -1,16 +1,35 @@
 import asyncio
-import gzip
 import logging
+import time
+from collections import defaultdict, deque
 
 import allure
-import msgpack
 import websockets
 
 from api.ws_constants import OpCode
+from utils import deadline
+from utils.http_timing import percentile
 from utils.response import normalize_response
+from utils.ws_codec import WsCodec
+from utils.ws_recorder import RECV, SEND, WsRecorder, current_ws_recorder
+from utils.ws_timing import record_ws_late, record_ws_push, record_ws_timeout, record_ws_timing, record_ws_unexpected
 
 logger = logging.getLogger(__name__)
 
+# `message_queue` 滿了時的處理方式，見 `AsyncBaseWS.__init__`
+OVERFLOW_POLICIES = ('drop-oldest', 'drop-newest', 'block')
+
+DEFAULT_QUEUE_SIZE = 1000
+
+# `recent_messages` 保留的訊息數
+DEFAULT_RECENT_SIZE = 50
+
+# 連線閒置 (沒有送出任何訊息) 多少秒後送出心跳
+DEFAULT_HEARTBEAT_INTERVAL = 7
+
+# RTT 統計採用的最近 ping 數
+DEFAULT_RTT_WINDOW = 100
+
 
 class AsyncBaseWS:
     """一個非同步 WebSocket 客戶端，負責處理連線、訊息收發與心跳
@@ -19,22 +38,101 @@ class AsyncBaseWS:
 
         async with AsyncBaseWS(ws_url) as ws:
             ...
+
+    回應依 (op_code, sub_code) 分派給等待中的 `send_and_receive`，同一條連線上可以同時
+    進行多個請求；沒有人等待的訊息 (例如伺服器主動推送) 放進 `message_queue`，由
+    `receive_msg` 取用。協定中沒有請求 id，同一個 (op_code, sub_code) 的多個請求依送出
+    順序配對回應。
+
+    心跳只在連線閒置 `heartbeat_interval` 秒後才送出，其他訊息送出時順延；每個 ping 的往返時間
+    計入 `heartbeat_stats`，可作為網路延遲的參考。
+
+    `message_queue` 有容量上限，伺服器推送的訊息沒人取用時不會在長時間的執行中無限累積；
+    滿了之後預設丟棄最舊的訊息，監聽任務不會因此停擺，見 `__init__` 的 overflow。
+    最近收到的訊息另外保留在 `recent_messages`，供測試失敗時診斷。
+
+    有 recorder 時，連線上收送的原始 frame 都附加到紀錄檔，見 `utils/ws_recorder.py`。
     """
 
-    def __init__(self, ws_url: str, receive_init_msgs: bool = True) -> None:
+    def __init__(
+        self,
+        ws_url: str,
+        receive_init_msgs: bool = True,
+        codec: WsCodec | None = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        overflow: str = 'drop-oldest',
+        recent_size: int = DEFAULT_RECENT_SIZE,
+        heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+        heartbeat_timeout: float = 5,
+        rtt_window: int = DEFAULT_RTT_WINDOW,
+        recorder: WsRecorder | None = None,
+    ) -> None:
         """初始化 WebSocket 客戶端
 
         Args:
             ws_url: 要連接的 WebSocket 伺服器 URL
             receive_init_msgs: 是否在連線後等待接收初始訊息 (例如 player_init_info)
+            codec: 訊息的編解碼器，可調整 gzip 門檻與壓縮等級。未提供時使用預設值的 `WsCodec`
+            queue_size: `message_queue` 最多保留的訊息數
+            overflow: `message_queue` 滿了時的處理方式，須為 `OVERFLOW_POLICIES` 之一
+                - drop-oldest (預設): 丟棄佇列中最舊的訊息，保留最新的。推送訊息沒人取用時
+                  (多數測試如此) 監聽任務照常收訊，回應與 pong 不受影響
+                - drop-newest: 丟棄新收到的訊息，保留佇列中既有的
+                - block: 監聽任務暫停收訊直到有空位，由 TCP 對伺服器施加背壓。暫停期間
+                  `send_and_receive` 的回應與 pong 也收不到，連線池的健康檢查也會失敗，
+                  只適合一定會持續取用推送訊息、且不能漏掉任何一則的測試
+            recent_size: `recent_messages` 保留的最近訊息數
+            heartbeat_interval: 連線閒置 (沒有送出任何訊息) 多少秒後送出心跳。伺服器是以收到客戶端的
+                訊息判斷連線存活，因此只有送出的訊息會順延心跳，收到的不會
+            heartbeat_timeout: 心跳等待 pong 的秒數，逾時只記錄警告，不中斷連線
+            rtt_window: `heartbeat_stats` 的 RTT 統計採用的最近 ping 數
+            recorder: 記錄收送 frame 的紀錄檔。未提供時使用 `set_ws_recorder` 設定的預設值 (`--ws-record`)，
+                皆無時不錄製
+
+        Raises:
+            ValueError: 如果 overflow 不在 `OVERFLOW_POLICIES` 中。
         """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"未知的佇列溢出處理方式 '{overflow}'，可用的有: {OVERFLOW_POLICIES}")
         self.ws_url = ws_url
         self.receive_init_msgs = receive_init_msgs
+        self.codec = codec or WsCodec()
+        self.overflow = overflow
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
         self._websocket: websockets.WebSocketClientProtocol | None = None
         self.polling_task: asyncio.Task | None = None
         self.listener_task: asyncio.Task | None = None
-        self.message_queue = asyncio.Queue()
+        # (放入時的 `time.monotonic`, 訊息)，取出時據以計算取用者的延遲
+        self.message_queue: asyncio.Queue[tuple[float, dict]] = asyncio.Queue(maxsize=queue_size)
+        # 最近收到的訊息 (pong 除外)，不論是否已被取用
+        self.recent_messages: deque[dict] = deque(maxlen=recent_size)
+        self._queue_stats = {
+            'high_water': 0,
+            'dropped': 0,
+            'blocked': 0,
+            'consumed': 0,
+            'lag_total': 0.0,
+            'lag_max': 0.0,
+        }
         self.player_init_info = None
+        # (預期的 op_code, sub_code) -> 依送出順序排隊的 `send_and_receive`
+        self._pending: defaultdict[tuple[int, int | None], deque[asyncio.Future]] = defaultdict(deque)
+        # (預期的 op_code, sub_code) -> 已送出但逾時或被取消、回應仍在途中的請求的 (op_code, sub_code)，依送出順序
+        self._timed_out: defaultdict[tuple[int, int | None], deque[tuple[int, int | None]]] = defaultdict(deque)
+        # 連線後的第一則訊息是伺服器主動推送的初始訊息，收到前為 True
+        self._awaiting_init = receive_init_msgs
+        # 讓登記等待與送出成為一體，同一個 key 的登記順序才會與線路上的送出順序一致
+        self._send_lock = asyncio.Lock()
+        # 等待下一個 pong 的 `ping`
+        self._pong_waiters: list[asyncio.Future] = []
+        # 最後一次送出訊息的 `time.monotonic`，心跳據以判斷連線是否閒置
+        self._last_sent = time.monotonic()
+        self._rtts: deque[float] = deque(maxlen=rtt_window)
+        self._heartbeat_stats = {'pings': 0, 'skipped': 0, 'timeouts': 0}
+        self.recorder = recorder or current_ws_recorder()
+        # 此連線在紀錄檔中的編號，連線建立後才取得
+        self._record_id: int | None = None
 
     @allure.step('WS connect')
     async def __aenter__(self) -> 'AsyncBaseWS':
@@ -61,6 +159,8 @@ class AsyncBaseWS:
     async def _connect(self):
         """建立 WebSocket 連線，並啟動背景監聽和心跳任務"""
         self._websocket = await websockets.connect(self.ws_url)
+        if self.recorder is not None:
+            self._record_id = self.recorder.open(self.ws_url)
 
         self.listener_task = asyncio.create_task(self.listen_for_messages())
 
@@ -77,18 +177,28 @@ class AsyncBaseWS:
         """持續監聽來自 WebSocket 的所有訊息
 
         此方法作為一個背景任務執行
-        - Pong 訊息會被直接記錄
-        - 其他所有訊息會被解包後放入 `message_queue` 等待處理
+        - Pong 訊息會被直接記錄，並喚醒等待中的 `ping`
+        - 有 `send_and_receive` 在等待的訊息交給它，見 `_dispatch`
+        - 其他所有訊息會被放入 `message_queue` 等待處理，佇列滿了時見 `_enqueue`；
+          統計上依來源分類，見 `_record_undispatched`
         """
         try:
             while True:
                 response = await self._websocket.recv()
-                data = self.unpack_msg(response)
+                if self._record_id is not None:
+                    self.recorder.record(self._record_id, RECV, response)
+                data = await self.codec.decode_async(response)
 
                 if data.get('op_code') == OpCode.S2CPong.value:
                     logger.debug(f'Received pong: {data}')
-                else:
-                    await self.message_queue.put(data)
+                    for future in self._pong_waiters:
+                        if not future.done():
+                            future.set_result(None)
+                    continue
+                self.recent_messages.append(data)
+                if not self._dispatch(data):
+                    self._record_undispatched(data)
+                    await self._enqueue(data)
         except websockets.exceptions.ConnectionClosed:
             logger.info('監聽任務停止：連線已關閉')
         except asyncio.CancelledError:
@@ -96,24 +206,72 @@ class AsyncBaseWS:
         except Exception as e:
             logger.error(f'監聽任務發生錯誤: {e}', exc_info=True)
 
-    @staticmethod
-    def _pack_msg(data: dict) -> bytes:
-        """將字典打包成 WebSocket 傳輸用的二進位格式
+    async def _enqueue(self, data: dict):
+        """把沒有人等待的訊息放進 `message_queue`，佇列滿了時依 `overflow` 處理
 
-        Args:
-            data: 準備發送的訊息 dict
+        丟棄只在第一次時以 warning 記錄，之後改記 debug，避免推送頻繁的伺服器洗版。
+        """
+        queue = self.message_queue
+        stats = self._queue_stats
+        if queue.full():
+            if self.overflow == 'block':
+                stats['blocked'] += 1
+                logger.warning('message_queue 已滿 (%s 則)，暫停收訊直到訊息被取用', queue.maxsize)
+            else:
+                stats['dropped'] += 1
+                log_level = logging.WARNING if stats['dropped'] == 1 else logging.DEBUG
+                if self.overflow == 'drop-oldest':
+                    logger.log(log_level, 'message_queue 已滿，丟棄最舊的訊息: %s', queue.get_nowait()[1])
+                else:
+                    logger.log(log_level, 'message_queue 已滿，丟棄新收到的訊息: %s', data)
+                    return
+        await queue.put((time.monotonic(), data))
+        stats['high_water'] = max(stats['high_water'], queue.qsize())
+
+    def _record_undispatched(self, data: dict):
+        """把沒有人等待的訊息依來源計入 `utils/ws_timing.py` 的統計
+
+        連線後的初始訊息算推送，其餘算非預期的訊息 (遲到的回應已在 `_dispatch` 計入)。
+        """
+        op_code = data.get('op_code')
+        sub_code = data.get('sub_code')
+        if self._awaiting_init:
+            self._awaiting_init = False
+            record_ws_push(op_code, sub_code)
+            return
+        record_ws_unexpected(op_code, sub_code)
+
+    def _dispatch(self, data: dict) -> bool:
+        """把訊息交給等待它的 `send_and_receive`
+
+        先找 op_code 與 sub_code 都相符的請求，再找未指定 sub_code 的請求 (只比對 op_code)。
+
+        協定中沒有請求 id，回應只能依送出順序配對，因此逾時或被取消的請求仍占著它的位置：
+        同一個 key 有這樣的請求時，收到的訊息先視為其中最早一個的遲到回應，計入 `record_ws_late`
+        後丟棄，不交給任何人。否則遲到的回應會被下一個同 key 的請求收下，之後每個請求都拿到
+        前一個請求的回應。
 
         Returns:
-            經過 msgpack 打包和 gzip 壓縮 (如果需要) 的位元組
+            是否已處理此訊息 (交給請求，或視為遲到的回應丟棄)。
         """
-        if 'data' in data and data['data'] is not None:
-            data['data'] = msgpack.packb(data['data'])
-        msg_pack = msgpack.packb(data)
-        if len(msg_pack) >= 250:
-            msg_pack = b'\x01' + gzip.compress(msg_pack)
-        else:
-            msg_pack = b'\x00' + msg_pack
-        return msg_pack
+        op_code = data.get('op_code')
+        keys = ((op_code, data.get('sub_code')), (op_code, None))
+        for key in keys:
+            requests = self._timed_out.get(key)
+            if requests:
+                record_ws_late(*requests.popleft())
+                if not requests:
+                    del self._timed_out[key]
+                logger.warning('收到已逾時請求的遲到回應，丟棄: %s', data)
+                return True
+        for key in keys:
+            waiters = self._pending.get(key)
+            while waiters:
+                future = waiters.popleft()
+                if not future.done():
+                    future.set_result(data)
+                    return True
+        return False
 
     async def send_msg(self, data_dict: dict):
         """打包並發送一則訊息到 WebSocket 伺服器
@@ -124,12 +282,15 @@ class AsyncBaseWS:
         c2s_data = {k: v for k, v in data_dict.items() if v is not None}
         log_level = logging.DEBUG if c2s_data.get('op_code') == OpCode.C2SPing.value else logging.INFO
         logger.log(log_level, 'Send => %s', c2s_data)
-        content = self._pack_msg(c2s_data)
+        content = await self.codec.encode_async(c2s_data)
 
         logger.debug('msgpack data => %s', content)
         if self._websocket:
             try:
                 await self._websocket.send(content)
+                self._last_sent = time.monotonic()
+                if self._record_id is not None:
+                    self.recorder.record(self._record_id, SEND, content)
             except websockets.exceptions.ConnectionClosed:
                 logger.warning('WebSocket 連線已關閉，無法發送訊息')
         else:
@@ -141,45 +302,166 @@ class AsyncBaseWS:
         expected_op_code: int,
         sub_code: int = None,
         data: dict = None,
-        timeout: int = 5,
+        timeout: float = 5,
     ) -> dict:
         """發送一則訊息，並等待符合預期的回應
 
+        回應以 (expected_op_code, sub_code) 配對，可與其他 `send_and_receive` 同時進行；
+        其間收到的其他訊息留在 `message_queue`，不會被丟棄。從送出到收到回應的耗時與逾時
+        計入 `utils/ws_timing.py` 的統計。
+
         Args:
             op_code: 要發送訊息的主要操作碼
             expected_op_code: 預期回應訊息的主要操作碼
-            sub_code: 要發送訊息的子操作碼，可選
+            sub_code: 要發送訊息的子操作碼，回應的 sub_code 須與之相同。未提供時只比對 op_code
             data: 要發送的業務資料，可選
-            timeout: 等待回應的秒數，預設為 5 秒
+            timeout: 等待回應的秒數，預設為 5 秒。在 deadline 內時縮到剩餘預算以內 (見 `utils/deadline.py`)
 
         Returns:
             包含 API 回應結果的 dict, 若超時則回傳錯誤訊息 dict
+
+        Raises:
+            DeadlineExceeded: 如果所在的 deadline 已用完，訊息不會送出。
         """
         if not self._websocket:
             logger.error('WebSocket 尚未連線')
             return {'status_code': 500, 'message': 'WebSocket not connected'}
+        timeout = deadline.clamp(timeout)
 
         dict_data = {
             'op_code': op_code,
             'sub_code': sub_code,
             'data': data,
         }
-        await self.send_msg(dict_data)
-
+        # 先登記再送出，回應比登記先到時才不會落進 message_queue
+        key = (expected_op_code, sub_code)
+        future = asyncio.get_running_loop().create_future()
+        sent = False
         try:
+            async with self._send_lock:
+                self._pending[key].append(future)
+                start = time.perf_counter()
+                await self.send_msg(dict_data)
+                sent = True
             async with asyncio.timeout(timeout):
-                while True:
-                    response_data = await self.message_queue.get()
-                    if response_data.get('op_code') == expected_op_code:
-                        logger.info('Receive (Expected) => %s', response_data)
-                        result = normalize_response(response_data)
-                        return result
-                    else:
-                        logger.warning('等待 op_code %s 時收到非預期訊息: %s', expected_op_code, response_data)
-
+                response_data = await future
+            record_ws_timing(op_code, sub_code, time.perf_counter() - start)
         except TimeoutError:
-            logger.error('超時：在 %s 秒內未收到期望的 op_code %s', timeout, expected_op_code)
+            record_ws_timeout(op_code, sub_code)
+            logger.error('超時：在 %.3g 秒內未收到期望的 op_code %s', timeout, expected_op_code)
             return {'status_code': 408, 'message': f'Timeout waiting for op_code {expected_op_code}'}
+        finally:
+            if not future.done():
+                future.cancel()
+            waiters = self._pending[key]
+            if future in waiters:
+                waiters.remove(future)
+            if not waiters:
+                del self._pending[key]
+            if sent and future.cancelled():
+                # 已送出卻沒收到回應 (逾時或被取消)，回應之後仍會到，見 `_dispatch`
+                self._timed_out[key].append((op_code, sub_code))
+
+        logger.info('Receive (Expected) => %s', response_data)
+        return normalize_response(response_data)
+
+    @property
+    def has_pending_replies(self) -> bool:
+        """是否有已送出但逾時或被取消、回應仍可能到達的請求
+
+        這樣的連線在遲到的回應到齊前，同一種請求的回應會先被當成遲到的回應丟棄，不適合交給下一個使用者重用。
+        """
+        return bool(self._timed_out)
+
+    @property
+    def is_alive(self) -> bool:
+        """連線已建立、尚未關閉，且背景監聽任務仍在執行"""
+        return (
+            self._websocket is not None
+            and self.listener_task is not None
+            and not self.listener_task.done()
+            and self._websocket.close_code is None
+        )
+
+    async def ping(self, timeout: float = 5) -> float:
+        """送出一個 ping 並等待伺服器的 pong，用於確認連線仍可用
+
+        Args:
+            timeout: 等待 pong 的秒數。
+
+        協定中的 pong 不帶 ping 的識別，同時有多個 ping 在等待時都以第一個 pong 計算。
+
+        Returns:
+            往返時間 (秒)，同時計入 `heartbeat_stats` 的 RTT 統計。
+
+        Raises:
+            TimeoutError: 如果在 timeout 內沒有收到 pong。
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pong_waiters.append(future)
+        start = time.perf_counter()
+        try:
+            await self.send_msg({'op_code': OpCode.C2SPing.value})
+            async with asyncio.timeout(timeout):
+                await future
+        finally:
+            self._pong_waiters.remove(future)
+        rtt = time.perf_counter() - start
+        self._rtts.append(rtt)
+        return rtt
+
+    def heartbeat_stats(self) -> dict:
+        """回傳心跳與 RTT 的統計
+
+        Returns:
+            包含 pings (心跳送出的 ping 數)、skipped (因期間有其他訊息送出而順延的心跳數)、
+            timeouts (心跳逾時數)，以及最近 `rtt_window` 個 ping (含 `ping` 的直接呼叫) 的
+            rtt_samples 與 rtt_min_ms / rtt_avg_ms / rtt_p99_ms / rtt_last_ms 的 dict。
+            沒有 RTT 樣本時不含 rtt_*_ms。
+        """
+        stats = {**self._heartbeat_stats, 'rtt_samples': len(self._rtts)}
+        if self._rtts:
+            ordered = sorted(self._rtts)
+            stats.update(
+                rtt_min_ms=round(ordered[0] * 1000, 3),
+                rtt_avg_ms=round(sum(ordered) / len(ordered) * 1000, 3),
+                rtt_p99_ms=round(percentile(ordered, 99) * 1000, 3),
+                rtt_last_ms=round(self._rtts[-1] * 1000, 3),
+            )
+        return stats
+
+    def drain_messages(self) -> int:
+        """丟棄 `message_queue` 中尚未被取用的訊息
+
+        Returns:
+            丟棄的訊息數。
+        """
+        count = 0
+        while not self.message_queue.empty():
+            logger.debug('丟棄殘留訊息: %s', self.message_queue.get_nowait()[1])
+            count += 1
+        return count
+
+    def queue_stats(self) -> dict:
+        """回傳 `message_queue` 的統計
+
+        Returns:
+            包含 size (目前的訊息數)、maxsize、high_water (曾經到達的最大訊息數)、dropped (因佇列
+            滿了而丟棄的訊息數)、blocked (監聽任務因佇列滿了而暫停的次數)、consumed (被
+            `receive_msg` 取用的訊息數)，以及這些訊息在佇列中等待的 lag_avg_ms / lag_max_ms 的 dict。
+        """
+        stats = self._queue_stats
+        consumed = stats['consumed']
+        return {
+            'size': self.message_queue.qsize(),
+            'maxsize': self.message_queue.maxsize,
+            'high_water': stats['high_water'],
+            'dropped': stats['dropped'],
+            'blocked': stats['blocked'],
+            'consumed': consumed,
+            'lag_avg_ms': round(stats['lag_total'] / consumed * 1000, 3) if consumed else 0.0,
+            'lag_max_ms': round(stats['lag_max'] * 1000, 3),
+        }
 
     async def receive_msg(self) -> dict:
         """從訊息佇列中獲取下一則訊息
@@ -190,7 +472,12 @@ class AsyncBaseWS:
             一個包含 API 回應結果的 dict
         """
         if self._websocket:
-            data = await self.message_queue.get()
+            enqueued_at, data = await self.message_queue.get()
+            lag = time.monotonic() - enqueued_at
+            stats = self._queue_stats
+            stats['consumed'] += 1
+            stats['lag_total'] += lag
+            stats['lag_max'] = max(stats['lag_max'], lag)
             logger.info('Receive => %s', data)
             result = normalize_response(data)
             return result
@@ -198,37 +485,28 @@ class AsyncBaseWS:
             logger.error('WebSocket 尚未連線或已關閉，無法接收訊息')
             return {'status_code': 500, 'message': 'WebSocket not connected'}
 
-    @staticmethod
-    def unpack_msg(msgpack_data: bytes) -> dict:
-        """解包從伺服器收到的二進位訊息
-
-        此方法會自動處理 gzip 解壓縮
-
-        Args:
-            msgpack_data: 從 WebSocket 收到的原始位元組
+    async def polling_ping(self):
+        """作為背景任務，在連線閒置 `heartbeat_interval` 秒後發送 Ping 以保持連線活躍
 
-        Returns:
-            解包和解壓後的 dict
+        等待期間有其他訊息送出時順延，不送多餘的 ping；連線關閉後結束。
         """
-        if msgpack_data.startswith(b'\x01'):
-            msgpack_data = gzip.decompress(msgpack_data[1:])
-        else:
-            msgpack_data = msgpack_data[1:]
-
-        msg = msgpack.unpackb(msgpack_data)
-
-        if 'data' in msg and isinstance(msg['data'], bytes):
-            raw_data = msgpack.unpackb(msg['data'])
-            msg['data'] = raw_data
-        return msg
-
-    async def polling_ping(self):
-        """作為背景任務，定期發送 Ping 訊息以保持連線活躍"""
-        dict_data = {'op_code': OpCode.C2SPing.value}
         try:
-            while True:
-                await self.send_msg(dict_data)
-                await asyncio.sleep(7)
+            while self.is_alive:
+                delay = self._last_sent + self.heartbeat_interval - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    if self._last_sent + self.heartbeat_interval > time.monotonic():
+                        self._heartbeat_stats['skipped'] += 1
+                    continue
+                self._heartbeat_stats['pings'] += 1
+                try:
+                    rtt = await self.ping(self.heartbeat_timeout)
+                except TimeoutError:
+                    self._heartbeat_stats['timeouts'] += 1
+                    logger.warning('心跳在 %s 秒內沒有收到 pong', self.heartbeat_timeout)
+                else:
+                    logger.debug('心跳 RTT: %.3f ms', rtt * 1000)
+            logger.info('心跳任務停止：連線已關閉')
         except asyncio.CancelledError:
             logger.info('心跳任務已被取消')
         except websockets.exceptions.ConnectionClosed:
@@ -270,6 +548,12 @@ class AsyncBaseWS:
         await self.stop_listener()
         if self._websocket:
             await self._websocket.close()
-            logger.info('WebSocket 連線已關閉')
+            if self._record_id is not None:
+                self.recorder.close_connection(self._record_id)
+            logger.info(
+                'WebSocket 連線已關閉，message_queue 統計 => %s，心跳統計 => %s',
+                self.queue_stats(),
+                self.heartbeat_stats(),
+            )
         else:
             logger.info('WebSocket 已關閉或不存在')
@@ -1,47 +1,46 @@
 """提供一個 HTTP 請求的基礎類別"""
 
+import contextvars
 import logging
-from collections.abc import Mapping
-from typing import ClassVar
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, ClassVar
 
 import allure
 import requests
 
 from api.service_names import Service
-from utils.response import normalize_response
+from utils.http_timing import record_timing
+from utils.json_stream import ListStream
+from utils.masking import MaskedLog
+from utils.response import NOT_JSON, decode_body, normalize_response
 
 logger = logging.getLogger(__name__)
 
-SENSITIVE_KEYS = frozenset({'password', 'token', 'authorization', 'cookie'})
+# `BaseRequest.batch` 預設的併發數。刻意低於 requests 預設的連線池大小 (10)，
+# 併發數超過服務的 `pool_maxsize` 時，多開的連線用完就會被丟掉
+DEFAULT_BATCH_WORKERS = 8
 
 
-def _is_sensitive(key: str) -> bool:
-    """判斷欄位名是否屬於敏感欄位
+@dataclass(frozen=True)
+class RequestSpec:
+    """`BaseRequest.batch` 中的一個請求，欄位對應 `BaseRequest.request` 的參數
 
-    用子字串比對而非整鍵比對——測試資料的欄位名有 `initial_password`、
-    `new_password`、`access_token` 這類變體，整鍵比對會漏掉。
+    Attributes:
+        method: HTTP 請求方法 (例如 'GET')。
+        path: API 的路徑。
+        data: 請求的 body 資料，可選。
+        json: 請求的 body JSON 資料，可選。
+        kwargs: 其他傳遞給 `requests.request` 的參數 (例如 headers, params)。
     """
-    key = key.lower()
-    return any(word in key for word in SENSITIVE_KEYS)
 
-
-def mask_sensitive(value):
-    """遮蔽敏感欄位的值，避免密碼與 token 寫進 log 與 Allure 附件
-
-    比對 `Mapping` 而非 `dict`，因為 requests 的 headers 是 `CaseInsensitiveDict`，
-    不是 `dict` 的子類別，只比對 `dict` 會讓 Authorization 整包漏掉。
-
-    Args:
-        value: 任意可能含敏感欄位的資料，dict 與 list 會遞迴處理
-
-    Returns:
-        同結構的資料，敏感欄位的值換成 '***'
-    """
-    if isinstance(value, Mapping):
-        return {k: '***' if _is_sensitive(k) else mask_sensitive(v) for k, v in value.items()}
-    if isinstance(value, list):
-        return [mask_sensitive(v) for v in value]
-    return value
+    method: str
+    path: str
+    data: Any = None
+    json: Any = None
+    kwargs: dict = field(default_factory=dict)
 
 
 class BaseRequest:
@@ -121,11 +120,121 @@ class BaseRequest:
         """
         return self._send(path, 'DELETE', **kwargs)
 
+    def batch(self, specs: Iterable[RequestSpec], max_workers: int = DEFAULT_BATCH_WORKERS) -> list[dict]:
+        """以有上限的執行緒池併發送出多個請求，依輸入順序回傳正規化結果
+
+        適用於彼此獨立、唯讀的請求 (例如以大量 id 查詢物品)。網路往返在工作執行緒中
+        併發進行，日誌、Allure step 與正規化則回到呼叫端的執行緒依輸入順序逐一處理——
+        Allure 的 step 堆疊屬於測試的執行緒，在工作執行緒裡開 step 不會掛到測試底下，
+        依序處理也讓每個請求的 log 連續出現，不會與其他請求交錯。
+
+        任一請求失敗時，其餘尚未開始的請求會被取消，例外照 `request` 的方式拋出。
+        呼叫端所在的 deadline (見 `utils/deadline.py`) 會帶進工作執行緒，一樣限制每個請求。
+
+        Args:
+            specs: 要送出的請求。
+            max_workers: 同時進行的請求數上限，不應超過該服務的 `pool_maxsize`。
+
+        Returns:
+            與 `specs` 順序相同的正規化結果。
+
+        Raises:
+            requests.RequestException: 當任一請求失敗時觸發
+        """
+        specs = list(specs)
+        prepared = [self._prepare(spec.path, spec.kwargs) for spec in specs]
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch-request')
+        try:
+            futures = [
+                executor.submit(
+                    # 每個請求各複製一份 context：同一個 Context 物件不能同時在多個執行緒中 run
+                    contextvars.copy_context().run,
+                    self._timed_request,
+                    spec.method,
+                    url,
+                    data=spec.data,
+                    json=spec.json,
+                    headers=headers,
+                    **kwargs,
+                )
+                for spec, (url, headers, kwargs) in zip(specs, prepared)
+            ]
+            results = []
+            for spec, (url, _, kwargs), future in zip(specs, prepared, futures):
+                with allure.step(f'{spec.method} {spec.path}'):
+                    self.request_log(url, spec.method, data=spec.data, json=spec.json, **kwargs)
+                    try:
+                        response, elapsed = future.result()
+                    except requests.RequestException as e:
+                        logger.error(f'Request failed: {e}')
+                        raise
+                    # 併發下牆鐘時間沒有意義，總耗時取工作執行緒中的請求耗時加上本執行緒的處理耗時
+                    start = time.perf_counter()
+                    results.append(self._handle_response(response, spec.method, spec.path, start - elapsed))
+            return results
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def stream_list(self, path: str, array_key: str = 'data', schema: dict = None, **kwargs) -> ListStream:
+        """以串流方式發送 GET 請求，逐筆消費回應中的大型清單
+
+        body 不會整個讀進記憶體，也不經過 `normalize_response`；元素在迭代時才從 socket
+        讀取、解析、decamelize 與驗證。回應 body 不寫入日誌 (只記錄外層欄位與筆數)，
+        也不計入各階段耗時統計——串流下下載與解析交錯進行，無法拆開量測。
+
+        Args:
+            path: API 的路徑
+            array_key: 要逐筆解析的陣列所在的鍵
+            schema: 整個回應的 schema，陣列元素會逐筆依其驗證，見 `ListStream`
+            **kwargs: 其他傳遞給 `requests.request` 的參數
+
+        Returns:
+            一個 `ListStream`，請以 `with` 使用
+
+        Raises:
+            requests.RequestException: 當請求失敗時觸發
+        """
+        with allure.step(f'GET {path} (串流)'):
+            response = self._request(path, 'GET', stream=True, **kwargs)
+            logger.info('Request headers => %s', MaskedLog(response.request.headers))
+            logger.info('Response headers => %s', MaskedLog(response.headers))
+        return ListStream(response, array_key=array_key, schema=schema)
+
     def _send(self, path: str, method: str, data=None, json: dict = None, **kwargs) -> dict:
-        """發送請求、寫入回應日誌並回傳正規化結果 (供四個動詞方法共用)"""
-        response = self.request(path, method, data, json, **kwargs)
-        self.save_response_log(response)
-        return normalize_response(response)
+        """發送請求、寫入回應日誌並回傳正規化結果 (供四個動詞方法共用)
+
+        body 只解碼一次，日誌與正規化共用同一份結果。各階段耗時附在同一個 Allure step 上。
+        """
+        with allure.step(f'{method} {path}'):
+            start = time.perf_counter()
+            response = self._request(path, method, data, json, **kwargs)
+            return self._handle_response(response, method, path, start)
+
+    def _handle_response(self, response: requests.Response, method: str, path: str, start: float) -> dict:
+        """解碼、記錄日誌、正規化並記下各階段耗時 (供 `_send` 與 `batch` 共用)
+
+        Args:
+            response: 請求的回應。
+            method: HTTP 請求方法。
+            path: API 的路徑。
+            start: 開始處理此請求的 `time.perf_counter` 值，用於計算 overhead。
+
+        Returns:
+            正規化後的回應。
+        """
+        decode_start = time.perf_counter()
+        body = decode_body(response)
+        decode = time.perf_counter() - decode_start
+        self.save_response_log(response, body)
+        result = normalize_response(response, body)
+        record_timing(method, path, response, decode=decode, total=time.perf_counter() - start)
+        return result
+
+    def _timed_request(self, method: str, url: str, **kwargs) -> tuple[requests.Response, float]:
+        """送出請求並回傳耗時，供 `batch` 在工作執行緒中執行"""
+        start = time.perf_counter()
+        response = self.session.request(method, url, **kwargs)
+        return response, time.perf_counter() - start
 
     def request(self, path: str, method: str, data=None, json: dict = None, **kwargs):
         """發送一個 HTTP 請求的核心方法
@@ -153,14 +262,31 @@ class BaseRequest:
             requests.RequestException: 當請求失敗時觸發
         """
         with allure.step(f'{method} {path}'):
-            try:
-                headers = {**self.default_headers, **(kwargs.pop('headers', None) or {})}
-                url = self.base_url + path
-                self.request_log(url, method, data=data, json=json, **kwargs)
-                return self.session.request(method, url, data=data, json=json, headers=headers, **kwargs)
-            except requests.RequestException as e:
-                logger.error(f'Request failed: {e}')
-                raise
+            return self._request(path, method, data, json, **kwargs)
+
+    def _request(self, path: str, method: str, data=None, json: dict = None, **kwargs) -> requests.Response:
+        """`request` 去掉 Allure step 的本體，供已自行開 step 的 `_send` 使用"""
+        try:
+            url, headers, kwargs = self._prepare(path, kwargs)
+            self.request_log(url, method, data=data, json=json, **kwargs)
+            return self.session.request(method, url, data=data, json=json, headers=headers, **kwargs)
+        except requests.RequestException as e:
+            logger.error(f'Request failed: {e}')
+            raise
+
+    def _prepare(self, path: str, kwargs: dict) -> tuple[str, dict, dict]:
+        """組出完整 URL 與合併後的 headers (供 `request` 與 `batch` 共用)
+
+        Args:
+            path: API 的路徑
+            kwargs: 呼叫端傳入的其他參數，不會被修改
+
+        Returns:
+            (完整 URL, 合併後的 headers, 移除 headers 後的其餘參數)
+        """
+        kwargs = dict(kwargs)
+        headers = {**self.default_headers, **(kwargs.pop('headers', None) or {})}
+        return self.base_url + path, headers, kwargs
 
     @staticmethod
     def request_log(url: str, method: str, **kwargs):
@@ -176,22 +302,22 @@ class BaseRequest:
         for key, value in kwargs.items():
             if value is None:
                 continue
-            logger.info('Request %s => %s', key, mask_sensitive(value))
+            logger.info('Request %s => %s', key, MaskedLog(value))
 
     @staticmethod
-    def save_response_log(response: requests.Response):
+    def save_response_log(response: requests.Response, body=NOT_JSON):
         """將 HTTP 回應的詳細資訊記錄到日誌中
 
+        `AsyncBaseRequest` 也共用此方法，`httpx.Response` 的這幾個屬性與 requests 同名同義。
+
         Args:
-            response: 一個 `requests.Response` 物件
+            response: 一個 `requests.Response` 或 `httpx.Response` 物件
+            body: `decode_body` 的結果，由呼叫端解碼後傳入，此處不再重複解碼。
+                是 `NOT_JSON` 時改記錄原始文字
         """
         if response is None:
             logger.error('No response received')
             return
-        logger.info('Request headers => %s', mask_sensitive(response.request.headers))
-        logger.info('Response headers => %s', mask_sensitive(response.headers))
-        try:
-            response_data = response.json()
-            logger.info('Response => %s', mask_sensitive(response_data))
-        except ValueError:
-            logger.info('Response => %s', response.text)
+        logger.info('Request headers => %s', MaskedLog(response.request.headers))
+        logger.info('Response headers => %s', MaskedLog(response.headers))
+        logger.info('Response => %s', MaskedLog(response.text if body is NOT_JSON else body))
@@ -43,9 +43,11 @@ def assert_result(actual_result: Dict[str, Any], expected_result: Dict[str, Any]
         assert filtered_actual == expected_result
 
 
-def _verify_value(schema: Any, path: str, value: Any):
+def verify_value(schema: Any, path: str, value: Any):
     """依 schema 的形態驗證單一值
 
+    不開 Allure step，可用於逐筆驗證大量資料 (見 `utils/json_stream.py`)。
+
     Args:
         schema: 預期結構的片段，支援 None (略過)、型別、型別元組、dict (巢狀)、list。
         path: 此值在回應中的位置，僅用於錯誤訊息。
@@ -61,12 +63,12 @@ def _verify_value(schema: Any, path: str, value: Any):
         assert isinstance(value, schema), f"路徑 '{path}' 的值型別 {type(value)} 不在預期的型別元組 {schema} 中"
     elif isinstance(schema, dict):
         assert isinstance(value, dict), f"路徑 '{path}' 的值應為字典，但實際是 {type(value)}"
-        assert_structure(value, schema)
+        check_structure(value, schema, path)
     elif isinstance(schema, list):
         assert isinstance(value, list), f"路徑 '{path}' 的值應為列表，但實際是 {type(value)}"
         if schema:  # schema 為 `[]` 時僅驗證是列表
             for index, item in enumerate(value):
-                _verify_value(schema[0], f'{path}[{index}]', item)
+                verify_value(schema[0], f'{path}[{index}]', item)
     elif isinstance(schema, type):
         assert isinstance(value, schema), f"路徑 '{path}' 的值應為 {schema} 型別，但實際是 {type(value)}"
     else:
@@ -91,14 +93,32 @@ def assert_structure(actual_dict: dict, expected_schema: dict):
         TypeError: 如果 `expected_schema` 本身的格式不合法
     """
     with allure.step('驗證回應的巢狀結構 (Nested Structure)'):
-        assert isinstance(actual_dict, dict), f'要驗證的對象不是字典，而是 {type(actual_dict)}'
+        check_structure(actual_dict, expected_schema)
+
+
+def check_structure(actual_dict: dict, expected_schema: dict, path: str = ''):
+    """`assert_structure` 的本體，不開 Allure step
+
+    巢狀的字典也經由此函式驗證，整份回應只會有最外層的一個 step。
+
+    Args:
+        actual_dict: 要檢查的字典。
+        expected_schema: 描述預期結構的字典，格式同 `assert_structure`。
+        path: 此字典在回應中的位置，僅用於錯誤訊息，最外層為空字串。
+
+    Raises:
+        AssertionError: 如果結構或型別不匹配
+        TypeError: 如果 `expected_schema` 本身的格式不合法
+    """
+    assert isinstance(actual_dict, dict), f'要驗證的對象不是字典，而是 {type(actual_dict)}'
 
-        expected_keys = set(expected_schema.keys())
-        actual_keys = set(actual_dict.keys())
-        assert expected_keys.issubset(actual_keys), f'回應中缺少 key(s): {expected_keys - actual_keys}'
+    expected_keys = set(expected_schema.keys())
+    actual_keys = set(actual_dict.keys())
+    where = f"'{path}' " if path else ''
+    assert expected_keys.issubset(actual_keys), f'回應中{where}缺少 key(s): {expected_keys - actual_keys}'
 
-        for key, sub_schema in expected_schema.items():
-            _verify_value(sub_schema, key, actual_dict[key])
+    for key, sub_schema in expected_schema.items():
+        verify_value(sub_schema, f'{path}.{key}' if path else key, actual_dict[key])
 
 
 def verify_case_auto(actual_result: Dict[str, Any], expected: Expectation):
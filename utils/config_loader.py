@@ -3,12 +3,14 @@
 import functools
 import logging
 from collections.abc import Mapping
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import yaml
 
 _CURRENT_ENV: str | None = None
+# `override_config` 設定的設定，優先於 secrets.yml
+_CONFIG_OVERRIDE: 'Config | None' = None
 logger = logging.getLogger(__name__)
 BASE_PATH = Path(__file__).resolve().parent.parent
 
@@ -32,6 +34,52 @@ class User:
     phone: str | None = None
 
 
+# `ServiceSettings.transport` 可用的值
+TRANSPORTS = ('http1', 'http2')
+
+
+@dataclass(frozen=True)
+class ServiceSettings:
+    """secrets.yml 的 'services' 區塊中，一個服務的 HTTP 連線設定
+
+    整個區塊與各欄位皆為選填，未設定的服務沿用 requests 的預設值 (每個 host 10 條連線、不阻塞)。
+
+    Attributes:
+        pool_connections: 連線池快取的 host 數量 (對應 `HTTPAdapter` 的 `pool_connections`)。
+        pool_maxsize: 每個 host 最多保留的連線數。併發數超過此值時，多開的連線用完即丟，
+            urllib3 會記下 "Connection pool is full" 警告。
+        pool_block: 連線池用盡時是否等待歸還的連線，而非另開一條用完即丟的連線。
+        warmup_connections: session 建立時預先開啟的 keep-alive 連線數，0 表示不預熱。
+            超過 `pool_maxsize` 的部分放不回連線池，因此會被截到 `pool_maxsize`。
+        hedge_percentile: GET / HEAD 等待超過近期延遲的此百分位仍未回應時，另送一個備援請求，
+            先回來的勝出 (見 `utils/hedging.py`)。0 表示不啟用。
+        hedge_window: 計算上述百分位時採用的最近請求數。
+        transport: 'http1' (requests，預設) 或 'http2' (httpx，併發請求在同一條連線上多工)。
+            https 以 ALPN 協商，伺服器不支援時退回 HTTP/1.1；http 則直接以 HTTP/2 (h2c) 連線。
+        request_compression: 請求 body 的壓縮編碼 ('gzip'、'deflate' 或 'br')，空字串表示不壓縮。
+        compression_threshold: body 達到此位元組數才壓縮，太小的 body 壓縮後反而更大。
+        accept_encoding: 覆蓋預設的 Accept-Encoding header (例如 'gzip, br' 或 'identity')，
+            空字串表示沿用 requests / httpx 的預設值。
+        connect_timeout: 建立連線的 timeout (秒)。
+        read_timeout: 等待回應資料的 timeout (秒)，計的是兩次收到資料之間的間隔，而非整個請求。
+            呼叫端傳入 `timeout` 時以呼叫端為準；在 `utils/deadline.py` 的 deadline 內時兩者皆會
+            再縮到剩餘預算以內。
+    """
+
+    pool_connections: int = 10
+    pool_maxsize: int = 10
+    pool_block: bool = False
+    warmup_connections: int = 0
+    hedge_percentile: float = 0
+    hedge_window: int = 200
+    transport: str = 'http1'
+    request_compression: str = ''
+    compression_threshold: int = 1024
+    accept_encoding: str = ''
+    connect_timeout: float = 10
+    read_timeout: float = 30
+
+
 @dataclass(frozen=True)
 class Config:
     """單一環境 (--env) 的測試設定
@@ -40,11 +88,13 @@ class Config:
         env: 環境名稱，用於錯誤訊息指出是哪個環境缺設定。
         urls: 服務名稱到 base URL 的對應 (來自 'urls' 區塊)。
         users: user key 到 `User` 的對應 (來自 'users' 區塊)。
+        services: 服務名稱到 `ServiceSettings` 的對應 (來自選填的 'services' 區塊)。
     """
 
     env: str
     urls: Mapping[str, str]
     users: Mapping[str, User]
+    services: Mapping[str, ServiceSettings] = field(default_factory=dict)
 
     def user(self, key: str) -> User:
         """取得指定的測試使用者
@@ -78,6 +128,20 @@ class Config:
             raise ConfigError(f"環境 '{self.env}' 的 'urls' 中找不到服務 '{service}'，可用的有: {sorted(self.urls)}")
         return self.urls[service]
 
+    def service(self, service: str) -> ServiceSettings:
+        """取得指定服務的連線設定
+
+        與 `url` 不同，找不到時不報錯而是回傳預設值——連線設定是調校用的選項，
+        不設定也應該能跑。
+
+        Args:
+            service: 服務名稱 (例如 'front')。
+
+        Returns:
+            該服務的 `ServiceSettings`，未設定時為全預設值。
+        """
+        return self.services.get(service, ServiceSettings())
+
 
 def set_current_env(env: str):
     """設定當前測試要使用的環境 (由 conftest.py 呼叫)"""
@@ -85,11 +149,18 @@ def set_current_env(env: str):
     _CURRENT_ENV = env
 
 
+def override_config(config: Config | None):
+    """以指定的設定取代 secrets.yml (例如 `--mock-backend` 把服務指向模擬後端)，None 表示恢復讀檔"""
+    global _CONFIG_OVERRIDE
+    _CONFIG_OVERRIDE = config
+
+
 def get_config() -> Config:
     """取得已快取的設定
 
     此函式會呼叫內部被快取的讀取函式
-    只有在第一次被呼叫時會真正讀取檔案，後續呼叫會立即回傳結果
+    只有在第一次被呼叫時會真正讀取檔案，後續呼叫會立即回傳結果；
+    有 `override_config` 設定的設定時直接回傳它
 
     Returns:
         當前環境的 `Config` 物件。
@@ -99,6 +170,8 @@ def get_config() -> Config:
     """
     if _CURRENT_ENV is None:
         raise RuntimeError('測試環境尚未設定，請確認 pytest 啟動流程正確。')
+    if _CONFIG_OVERRIDE is not None:
+        return _CONFIG_OVERRIDE
     return _load_config_from_file(_CURRENT_ENV)
 
 
@@ -114,6 +187,7 @@ def _load_config_from_file(env: str) -> Config:
 
     Raises:
         ConfigError: 如果 `config/secrets.yml` 不存在、格式不符，或缺少 'urls' / 'users' 區塊。
+            'services' 區塊為選填，但存在時也必須是 key-value 結構。
     """
     config_dir = 'config'
     config_path = f'{config_dir}/secrets.yml'
@@ -135,8 +209,18 @@ def _load_config_from_file(env: str) -> Config:
         if not isinstance(final_config.get(section), Mapping):
             raise ConfigError(f"環境 '{env}' 的設定中缺少 '{section}' 區塊。")
 
+    services_config = final_config.get('services') or {}
+    if not isinstance(services_config, Mapping):
+        raise ConfigError(f"環境 '{env}' 的 'services' 區塊格式不符，應是服務名稱到設定的 key-value 結構。")
+
     users = {key: User(**value) for key, value in final_config['users'].items()}
-    return Config(env=env, urls=final_config['urls'], users=users)
+    services = {key: ServiceSettings(**(value or {})) for key, value in services_config.items()}
+    for name, settings in services.items():
+        if settings.transport not in TRANSPORTS:
+            raise ConfigError(
+                f"環境 '{env}' 的服務 '{name}' 的 transport '{settings.transport}' 不支援，可用的有: {TRANSPORTS}"
+            )
+    return Config(env=env, urls=final_config['urls'], users=users, services=services)
 
 
 def _read_yaml(directory: str, yaml_file_name: str) -> dict:
@@ -0,0 +1,72 @@
+"""讓多步驟流程共用一個整體的時間預算
+
+單一請求有各服務的 connect / read timeout 保護，但情境測試由十幾個請求與 WS 收發串成，
+每一步都剛好沒逾時仍可能耗掉好幾分鐘。在流程外層開一個 deadline:
+
+    with deadline(60):
+        ...  # 期間的 HTTP 請求與 `AsyncBaseWS.send_and_receive` 都不會等超過剩餘的預算
+
+傳輸層 (`ServiceAdapter`、`AsyncBaseRequest`、`AsyncBaseWS`) 送出前以 `clamp` 把自己的
+timeout 縮到剩餘預算以內，預算用完時直接拋出 `DeadlineExceeded`，不再送出請求。
+
+deadline 存在 contextvar 中：同一個 asyncio task 與其建立的 task 會繼承，另開的執行緒則要以
+`contextvars.copy_context().run` 帶過去 (見 `BaseRequest.batch`)。
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# 以 `time.monotonic` 表示的到期時間，None 表示沒有 deadline
+_expires_at: ContextVar[float | None] = ContextVar('deadline', default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """deadline 的預算已用完"""
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """在區塊內套用時間預算
+
+    巢狀使用時取較早到期的一個：內層只能縮短預算，不能延長外層的。
+
+    Args:
+        seconds: 區塊的時間預算 (秒)。
+    """
+    expires_at = time.monotonic() + seconds
+    outer = _expires_at.get()
+    if outer is not None:
+        expires_at = min(expires_at, outer)
+    token = _expires_at.set(expires_at)
+    try:
+        yield
+    finally:
+        _expires_at.reset(token)
+
+
+def remaining() -> float | None:
+    """目前 deadline 的剩餘秒數 (可能為負)，沒有 deadline 時為 None"""
+    expires_at = _expires_at.get()
+    return None if expires_at is None else expires_at - time.monotonic()
+
+
+def clamp(timeout: float | None) -> float | None:
+    """把一次操作的 timeout 縮到剩餘預算以內
+
+    Args:
+        timeout: 操作原本的 timeout (秒)，None 表示不限。
+
+    Returns:
+        沒有 deadline 時原樣回傳，否則為 timeout 與剩餘預算較小者。
+
+    Raises:
+        DeadlineExceeded: 如果預算已用完。
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded(f'deadline 已超過 {-left:.3f} 秒')
+    return left if timeout is None else min(timeout, left)
@@ -0,0 +1,147 @@
+"""提供降低長尾延遲的 hedged request
+
+共用的 QA 後端 p99 偏高，少數慢回應就能拖長整輪測試。hedging 的作法是：請求在
+「近期延遲的某個百分位」內還沒回來，就在另一條連線上再送一次相同的請求，誰先回來用誰。
+只要慢回應是個別連線或個別後端節點的問題 (而非整體過載)，第二個請求多半能先回來。
+
+門檻的樣本是每一次實際送出的請求從開始送出到回應的耗時，主請求與備援請求各算一筆：
+只記勝出者的話，備援勝出時慢的主請求會被丟掉，門檻會一路往下漂。在執行緒池中排隊的時間
+不算延遲，門檻也從主請求真正開始送出時起算。
+
+只適用於冪等的方法——重送 POST 可能造成重複寫入。由 `ServiceAdapter` 依服務的
+`hedge_percentile` 設定啟用，對 `BaseRequest` 完全透明。
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+import requests
+
+from utils.http_timing import percentile
+
+logger = logging.getLogger(__name__)
+
+# 可安全重送的方法
+HEDGE_METHODS = frozenset({'GET', 'HEAD'})
+
+# 樣本數不足時百分位沒有意義，先不 hedge，只累積樣本
+MIN_SAMPLES = 20
+
+
+class Hedger:
+    """依近期延遲決定何時送出備援請求，並統計備援次數與勝出次數
+
+    執行緒安全：`BaseRequest.batch` 會從多個執行緒同時送出請求。
+    """
+
+    def __init__(self, percentile: float, window: int, max_workers: int):
+        """初始化 Hedger
+
+        Args:
+            percentile: 觸發備援請求的延遲百分位 (0 < percentile < 100)，例如 95 表示等到 p95 還沒回來就再送一次。
+            window: 計算百分位時採用的最近樣本數。
+            max_workers: 送出請求的執行緒數上限，主請求與備援請求各占一個。
+        """
+        if not 0 < percentile < 100:
+            raise ValueError(f'hedge_percentile 必須介於 0 與 100 之間，收到 {percentile}')
+        self.percentile = percentile
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedge')
+        self._stats = {'hedged': 0, 'hedge_wins': 0}
+
+    def stats(self) -> dict:
+        """回傳目前的統計
+
+        Returns:
+            包含 hedged (送出備援請求的次數)、hedge_wins (備援請求先回來的次數) 與
+            hedge_delay (目前的觸發門檻，秒；樣本不足時為 None) 的 dict。
+        """
+        with self._lock:
+            return {**self._stats, 'hedge_delay': self._delay()}
+
+    def send(self, send_once: Callable[[], requests.Response]) -> requests.Response:
+        """送出請求，超過門檻仍未回應時再送一次備援請求
+
+        先成功的回應勝出；落敗的請求若還在排隊就直接取消，已送出的則在回應到達時關閉、
+        歸還連線。兩者都失敗時拋出主請求的例外。
+
+        Args:
+            send_once: 實際送出一次請求的函式，可被呼叫兩次且可在任一執行緒執行。
+
+        Returns:
+            勝出的 `requests.Response`。
+        """
+        with self._lock:
+            delay = self._delay()
+        if delay is None:
+            return self._timed(send_once)
+
+        started = threading.Event()
+        primary = self._executor.submit(self._timed, send_once, started)
+        # 被取消 (例如 close 時仍在排隊) 的主請求不會開始，完成時一併放行
+        primary.add_done_callback(lambda _: started.set())
+        started.wait()
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        hedge = self._executor.submit(self._timed, send_once)
+        with self._lock:
+            self._stats['hedged'] += 1
+        logger.debug('請求超過 p%s (%.3fs) 仍未回應，送出備援請求', self.percentile, delay)
+
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # 同時完成時優先採用主請求，讓勝出次數只反映備援真正搶先的情況
+            for future in (primary, hedge):
+                if future in done and future.exception() is None:
+                    return self._settle(future, primary if future is hedge else hedge, hedge)
+        return primary.result()
+
+    def close(self):
+        """停止送出請求的執行緒"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _settle(self, winner: Future, loser: Future, hedge: Future) -> requests.Response:
+        """採用勝出的回應，並安排落敗的請求在完成時關閉回應 (其耗時仍在完成時計入樣本)"""
+        response = winner.result()
+        if winner is hedge:
+            with self._lock:
+                self._stats['hedge_wins'] += 1
+        if not loser.cancel():
+            loser.add_done_callback(_close_response)
+        return response
+
+    def _delay(self) -> float | None:
+        """目前的觸發門檻 (近期延遲的指定百分位，nearest-rank)，呼叫端須持有鎖"""
+        if len(self._latencies) < MIN_SAMPLES:
+            return None
+        return percentile(sorted(self._latencies), self.percentile)
+
+    def _timed(self, send_once: Callable[[], requests.Response], started: threading.Event = None) -> requests.Response:
+        """送出一次請求，成功時把從開始送出起算的耗時計入樣本
+
+        Args:
+            send_once: 同 `send`。
+            started: 開始送出時設定的事件，供 `send` 從此時起算門檻。
+        """
+        if started is not None:
+            started.set()
+        start = time.perf_counter()
+        response = send_once()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._latencies.append(elapsed)
+        return response
+
+
+def _close_response(future: Future):
+    """落敗請求完成時關閉其回應，讓連線回到連線池"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
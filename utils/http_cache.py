@@ -0,0 +1,258 @@
+"""提供 session 層級的 HTTP GET 回應快取
+
+同一輪測試中，許多 fixture 與案例會反覆查詢相同的參考資料 (例如物品清單)。
+快取以 `--http-cache` 開啟，掛在 `ServiceAdapter` 上，對 `BaseRequest` 完全透明:
+
+- 以 URL 加上身分 (Authorization / Cookie) 為 key，不同使用者不會拿到彼此的資料
+- TTL 內直接回傳；過期後若有 ETag / Last-Modified 則發條件式請求，304 時沿用快取
+- 以 LRU 限制筆數
+- 同一 key 同時只有一個請求在路上，其餘併發的相同請求等它的結果 (single-flight)
+
+只快取 200 的 GET，且回應未標示 `Cache-Control: no-store`。呼叫端可帶
+`Cache-Control: no-cache` header 略過快取。對同一 URL 的寫入 (POST / PUT / DELETE / PATCH) 成功後，
+該 URL 在所有身分下的快取一律淘汰 (RFC 9111 §4.4)，之後的 GET 不會拿到寫入前的內容。
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# 構成「身分」的 request headers：同一 URL 在不同身分下可能回應不同內容
+_IDENTITY_HEADERS = ('Authorization', 'Cookie')
+
+# 成功後須淘汰目標 URL 快取的方法 (RFC 9111 §4.4 的 unsafe methods)
+_UNSAFE_METHODS = frozenset({'POST', 'PUT', 'DELETE', 'PATCH'})
+
+
+@dataclass
+class _Entry:
+    """一筆快取的回應，只存組回 `requests.Response` 所需的欄位"""
+
+    status_code: int
+    reason: str
+    headers: dict
+    content: bytes
+    encoding: str | None
+    url: str
+    stored_at: float
+
+    @property
+    def validators(self) -> dict:
+        """發條件式請求要帶上的 headers"""
+        headers = {}
+        if etag := self.headers.get('ETag'):
+            headers['If-None-Match'] = etag
+        if last_modified := self.headers.get('Last-Modified'):
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+
+class _Flight:
+    """一個進行中的請求，供 single-flight 的跟隨者等待結果"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry: _Entry | None = None
+        self.error: BaseException | None = None
+
+
+class ResponseCache:
+    """GET 回應的 LRU 快取，支援條件式重新驗證與 single-flight
+
+    執行緒安全：`BaseRequest.batch` 會從多個執行緒同時查詢。
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        """初始化快取
+
+        Args:
+            ttl: 一筆回應在不經重新驗證下可直接使用的秒數。
+            max_entries: 最多保留的回應筆數，超過時淘汰最久未使用的。
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._flights: dict[tuple, _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(('hits', 'misses', 'revalidated', 'coalesced', 'evictions', 'invalidated'), 0)
+
+    def stats(self) -> dict:
+        """回傳目前的統計
+
+        Returns:
+            包含 hits (TTL 內直接命中)、misses (需完整請求)、revalidated (304 後沿用)、
+            coalesced (搭上他人進行中的請求)、evictions (被 LRU 淘汰)、invalidated (因寫入而淘汰)
+            與 entries (目前筆數) 的 dict。
+        """
+        with self._lock:
+            return {**self._stats, 'entries': len(self._entries)}
+
+    @staticmethod
+    def accepts(request: requests.PreparedRequest) -> bool:
+        """判斷請求是否適用快取：沒有 body 的 GET，且呼叫端沒有要求略過"""
+        return (
+            request.method == 'GET'
+            and not request.body
+            and 'no-cache' not in request.headers.get('Cache-Control', '').lower()
+        )
+
+    def invalidate(self, request: requests.PreparedRequest, response: requests.Response) -> int:
+        """寫入成功後淘汰受影響 URL 在所有身分下的快取 (RFC 9111 §4.4)
+
+        對象是請求的 URL，以及回應 `Location` / `Content-Location` 指向的同源 URL。
+        請求方法不是 unsafe method，或回應不是 2xx / 3xx 時不處理。
+
+        Args:
+            request: 已送出的請求，任何方法皆可。
+            response: 該請求的回應。
+
+        Returns:
+            淘汰的筆數。
+        """
+        if request.method not in _UNSAFE_METHODS or not 200 <= response.status_code < 400:
+            return 0
+        origin = urlsplit(request.url)[:2]
+        urls = {request.url}
+        for name in ('Location', 'Content-Location'):
+            if location := response.headers.get(name):
+                url = urljoin(request.url, location)
+                if urlsplit(url)[:2] == origin:
+                    urls.add(url)
+        with self._lock:
+            keys = [key for key in self._entries if key[0] in urls]
+            for key in keys:
+                del self._entries[key]
+            self._stats['invalidated'] += len(keys)
+        return len(keys)
+
+    def fetch(
+        self,
+        request: requests.PreparedRequest,
+        send: Callable[[requests.PreparedRequest], requests.Response],
+    ) -> requests.Response:
+        """以快取回應請求，必要時透過 `send` 實際送出
+
+        Args:
+            request: 要送出的請求，須先通過 `accepts`。
+            send: 實際送出請求的函式，回傳的 `Response` 須已讀完 body。
+
+        Returns:
+            一個 `requests.Response`。命中快取時是由快取內容組出的新物件，呼叫端可自由修改。
+        """
+        key = self._key(request)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.stored_at < self.ttl:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return self._build_response(entry, request)
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return self._build_response(flight.entry, request)
+
+        try:
+            response = self._refresh(key, entry, request, send)
+            flight.entry = entry if response is None else self._to_entry(response)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return response if response is not None else self._build_response(entry, request)
+
+    def _refresh(
+        self,
+        key: tuple,
+        entry: _Entry | None,
+        request: requests.PreparedRequest,
+        send: Callable[[requests.PreparedRequest], requests.Response],
+    ) -> requests.Response | None:
+        """送出完整或條件式請求並更新快取
+
+        Returns:
+            伺服器回傳的新回應；條件式請求得到 304 時回傳 None，表示沿用快取 (已刷新時間)。
+        """
+        validators = entry.validators if entry is not None else {}
+        if validators:
+            conditional = request.copy()
+            conditional.headers.update(validators)
+            response = send(conditional)
+            if response.status_code == 304:
+                response.close()
+                with self._lock:
+                    entry.stored_at = time.monotonic()
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key)
+                    self._stats['revalidated'] += 1
+                return None
+        else:
+            response = send(request)
+
+        with self._lock:
+            self._stats['misses'] += 1
+            if self._storable(response):
+                self._entries[key] = self._to_entry(response)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats['evictions'] += 1
+            else:
+                self._entries.pop(key, None)
+        return response
+
+    @staticmethod
+    def _key(request: requests.PreparedRequest) -> tuple:
+        """以 URL 與身分組出快取 key；身分只存雜湊，token 不會以明文留在快取裡"""
+        identity = '\n'.join(request.headers.get(name, '') for name in _IDENTITY_HEADERS)
+        return request.url, hashlib.sha256(identity.encode()).hexdigest()
+
+    @staticmethod
+    def _storable(response: requests.Response) -> bool:
+        return response.status_code == 200 and 'no-store' not in response.headers.get('Cache-Control', '').lower()
+
+    @staticmethod
+    def _to_entry(response: requests.Response) -> _Entry:
+        return _Entry(
+            status_code=response.status_code,
+            reason=response.reason,
+            headers=dict(response.headers),
+            content=response.content,
+            encoding=response.encoding,
+            url=response.url,
+            stored_at=time.monotonic(),
+        )
+
+    @staticmethod
+    def _build_response(entry: _Entry, request: requests.PreparedRequest) -> requests.Response:
+        """由快取內容組出一個新的 `requests.Response`，每個呼叫端拿到各自的物件"""
+        response = requests.Response()
+        response.status_code = entry.status_code
+        response.reason = entry.reason
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response._content = entry.content
+        response._content_consumed = True
+        response.encoding = entry.encoding
+        response.url = entry.url
+        response.request = request
+        return response
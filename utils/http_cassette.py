@@ -0,0 +1,352 @@
+"""把 HTTP 請求與回應錄成 cassette 檔，之後不需後端即可重播
+
+`--http-record PATH` 時，每個經過 `ServiceAdapter` / async client 的請求都附加一筆紀錄到
+cassette；`--http-replay PATH` 時改從 cassette 取回應，完全不連線。用於在沒有後端的環境下
+反覆跑測試、量測框架本身的成本。只涵蓋 HTTP：WebSocket 不經過這裡，重播時需要 WS 的測項
+由 testcases/api_test/conftest.py 略過 (WS 另有 `utils/ws_recorder.py`)。
+
+檔案格式 (皆為 msgpack):
+
+- PATH: 開頭是 `MAGIC` 與 header (4 bytes 的長度加上內容，目前只有產生測試資料用的亂數種子 `seed`)，
+  之後是只附加寫入的紀錄串，每筆是 4 bytes 的長度 (big-endian) 加上一個 `Exchange` 的內容
+- PATH.idx: 索引，key 到紀錄位移 (依錄製順序) 的對應，以及錄製完成時主檔的大小。
+  遺失或與主檔大小不符時 (例如錄製中途中斷) 由主檔重建
+
+key 由方法、路徑 (含排序後的 query)、與正規化後的 body 組成，不含 host，同一份 cassette
+可以對著不同環境的 base URL 重播。只有內容完全相同、回應取決於後端狀態的請求 (例如重複註冊同一帳號、
+綁定手機前後各登入一次) 會錄到同一個 key 多次，依錄製順序依次重播，用完後重複最後一筆。
+
+寫入前以 `mask_sensitive` 遮蔽請求與回應中的密碼、token 等欄位；欄位名不敏感、但值是含 token 的
+URL 時 (例如登入回應的 `ws_url=ws://.../ws?token=...`)，以 `_mask_params` 遮蔽字串中 query 形式的
+敏感參數，請求路徑的 query 亦同。錄製結束時檢查整個檔案，遮蔽前的 token 等憑證仍出現在其中就拋出
+`CassetteLeak`，通過檢查的 cassette 才能分享。key 以遮蔽後的內容加上遮蔽前敏感值的 HMAC (以 header 的
+種子為金鑰) 計算：只差在密碼或 token 的請求 (例如登入成功與密碼錯誤) 各有自己的 key，key 本身也不會洩漏這些值。
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import msgpack
+
+from utils.masking import MASK, SENSITIVE_KEYS, mask_sensitive, sensitive_values
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ('record', 'replay')
+
+MAGIC = b'HTTPCAS\x01'
+
+_LENGTH = struct.Struct('>I')
+
+# body 以解壓縮後的內容儲存，這些描述線路上編碼的 headers 不再成立，錄製時去掉
+_TRANSPORT_HEADERS = frozenset({'content-encoding', 'content-length', 'transfer-encoding', 'connection'})
+
+# 字串中 query 形式的敏感參數: 參數名含 `SENSITIVE_KEYS` 任一字 (如 token、access_token)，值到 &、#、
+# 空白或 JSON 字串的結尾為止
+_SENSITIVE_PARAM = re.compile(
+    rb'((?:^|[?&])[^=&#\s"]*(?:' + '|'.join(sorted(SENSITIVE_KEYS)).encode() + rb')[^=&#\s"]*=)([^&#\s"\\]*)',
+    re.IGNORECASE,
+)
+_MASK_BYTES = MASK.encode()
+
+# 錄製結束時檢查是否殘留的欄位: 只檢查伺服器核發的憑證。測試資料的密碼是產生出來的，
+# 反向案例中常與帳號等一般欄位同值，檢查它們只會誤報
+_LEAK_CHECK_KEYS = SENSITIVE_KEYS - {'password'}
+
+
+class CassetteMiss(LookupError):
+    """重播時 cassette 中沒有對應的紀錄"""
+
+
+class CassetteLeak(RuntimeError):
+    """錄製完成的 cassette 中仍有遮蔽前的 token 等憑證"""
+
+
+@dataclass(frozen=True)
+class Exchange:
+    """cassette 中的一筆紀錄
+
+    Attributes:
+        key: 見 `request_key`。
+        method: HTTP 請求方法。
+        path: 請求的路徑 (含 query)。
+        request_body: 遮蔽並正規化後的請求 body，供人工檢視。
+        status: 回應的狀態碼。
+        reason: 回應的狀態說明。
+        headers: 遮蔽後的回應 headers。
+        body: 遮蔽後的回應 body (已解壓縮)。
+    """
+
+    key: str
+    method: str
+    path: str
+    request_body: bytes
+    status: int
+    reason: str
+    headers: list[tuple[str, str]]
+    body: bytes
+
+
+def _mask_params(text: bytes, secrets: set[str] | None = None, keys: frozenset[str] = _LEAK_CHECK_KEYS) -> bytes:
+    """把 text 中 query 形式的敏感參數值換成 `MASK`
+
+    Args:
+        text: 任意位元組，例如序列化後的 JSON 或 URL。
+        secrets: 提供時把遮蔽前的值加入其中。
+        keys: 只收集參數名含其中任一字的值，須為 `SENSITIVE_KEYS` 的子集合。
+    """
+
+    def replace(match: re.Match) -> bytes:
+        name = match[1].decode('utf-8', 'replace').lower()
+        if secrets is not None and match[2] not in (b'', _MASK_BYTES) and any(w in name for w in keys):
+            secrets.add(match[2].decode('utf-8', 'replace'))
+        return match[1] + _MASK_BYTES
+
+    return _SENSITIVE_PARAM.sub(replace, text)
+
+
+def _path_of(url: str) -> str:
+    """取出 URL 的路徑與排序後的 query，不含 scheme 與 host，敏感參數的值已遮蔽"""
+    parts = urlsplit(url)
+    query = '&'.join(sorted(parts.query.split('&'))) if parts.query else ''
+    path = f'{parts.path}?{query}' if query else parts.path
+    return _mask_params(path.encode()).decode()
+
+
+def _mask_body(body, secrets: set[str] | None = None, keys: frozenset[str] = _LEAK_CHECK_KEYS) -> bytes:
+    """遮蔽 body 中的敏感欄位與敏感參數，JSON 另外正規化 (鍵排序、無空白)
+
+    Args:
+        body: 請求或回應的 body (bytes / str / None)。
+        secrets: 提供時把遮蔽前的值加入其中，預設只收集錄製結束時要檢查的憑證。
+        keys: 同 `_mask_params`。
+    """
+    if body is None:
+        return b''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    try:
+        value = json.loads(body)
+    except ValueError:
+        return _mask_params(body, secrets, keys)
+    if secrets is not None:
+        secrets |= sensitive_values(value, keys)
+    text = json.dumps(mask_sensitive(value), sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode()
+    return _mask_params(text, secrets, keys)
+
+
+def _read_header(file) -> dict:
+    """從檔案開頭讀出 header，讀完後檔案位置在第一筆紀錄"""
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f'{file.name} 不是 cassette 檔 (或為不含 header 的舊格式，請重新錄製)')
+    (length,) = _LENGTH.unpack(file.read(_LENGTH.size))
+    return msgpack.unpackb(file.read(length))
+
+
+def cassette_seed(path: str | os.PathLike) -> int | None:
+    """讀出 cassette 錄製時產生測試資料所用的亂數種子，只讀 header
+
+    Args:
+        path: cassette 檔的路徑。
+
+    Raises:
+        FileNotFoundError: 如果 cassette 檔不存在。
+        ValueError: 如果檔案不是 cassette 檔。
+    """
+    with open(path, 'rb') as file:
+        return _read_header(file)['seed']
+
+
+def request_key(method: str, url: str, body, seed: int | None) -> str:
+    """組出請求在 cassette 中的 key
+
+    遮蔽後的 body 看不出密碼、token 的差異，另外混入遮蔽前所有敏感值的 HMAC，
+    以 cassette 的種子為金鑰：錄製與重播產生的測試資料相同時才對得上，且無法由 key 反查這些值。
+
+    Args:
+        method: HTTP 請求方法。
+        url: 請求的完整 URL，只取路徑與 query。
+        body: 請求 body (bytes / str / None)，壓縮前的內容。
+        seed: cassette 的亂數種子 (見 `Cassette.seed`)。
+    """
+    secrets: set[str] = set()
+    _mask_params(urlsplit(url).query.encode(), secrets, SENSITIVE_KEYS)
+    masked_body = _mask_body(body, secrets, SENSITIVE_KEYS)
+    digest = hmac.digest(str(seed).encode(), '\0'.join(sorted(secrets)).encode(), 'sha256')
+    return hashlib.sha1(f'{method} {_path_of(url)}\n'.encode() + masked_body + digest).hexdigest()
+
+
+class Cassette:
+    """一份錄製中或重播中的 cassette
+
+    執行緒安全：`BaseRequest.batch` 與 hedging 會從多個執行緒同時存取。
+    """
+
+    def __init__(self, path: str | os.PathLike, mode: str, seed: int | None = None):
+        """開啟 cassette
+
+        Args:
+            path: cassette 檔的路徑。錄製時會覆蓋既有的檔案。
+            mode: 'record' 或 'replay'。
+            seed: 錄製時產生測試資料所用的亂數種子，寫入 header 供重播時沿用；重播時忽略，
+                改由 header 讀出 (見 `seed` 屬性)。
+
+        Raises:
+            ValueError: 如果 mode 不在 `CASSETTE_MODES` 中，或重播的檔案不是 cassette 檔。
+            FileNotFoundError: 如果重播時 cassette 檔不存在。
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"未知的 cassette 模式 '{mode}'，可用的有: {CASSETTE_MODES}")
+        self.path = Path(path)
+        self.mode = mode
+        self._index_path = self.path.with_name(self.path.name + '.idx')
+        self._lock = threading.Lock()
+        self._index: defaultdict[str, list[int]] = defaultdict(list)
+        self._stats = {'recorded': 0} if mode == 'record' else {'replayed': 0, 'missed': 0}
+        self._mmap = None
+        # 錄製時遮蔽掉的原始值，關閉時確認檔案中沒有殘留
+        self._secrets: set[str] = set()
+        if mode == 'record':
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'wb')
+            self._index_path.unlink(missing_ok=True)
+            self.seed = seed
+            header = msgpack.packb({'seed': seed})
+            self._file.write(MAGIC + _LENGTH.pack(len(header)) + header)
+        else:
+            self._file = open(self.path, 'rb')
+            self.seed = _read_header(self._file)['seed']
+            self._start = self._file.tell()
+            if os.fstat(self._file.fileno()).st_size:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._load_index()
+            self._cursors: dict[str, int] = {}
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    def record(self, method: str, url: str, request_body, status: int, reason: str, headers, body: bytes):
+        """附加一筆紀錄 (錄製模式)，敏感欄位與敏感參數在此遮蔽
+
+        Args:
+            method: HTTP 請求方法。
+            url: 請求的完整 URL。
+            request_body: 請求 body，同 `request_key`。
+            status: 回應的狀態碼。
+            reason: 回應的狀態說明。
+            headers: 回應 headers 的 (名稱, 值)。
+            body: 解壓縮後的回應 body。
+        """
+        secrets: set[str] = set()
+        _mask_params(urlsplit(url).query.encode(), secrets)
+        headers = dict(headers)
+        secrets |= sensitive_values(headers, _LEAK_CHECK_KEYS)
+        exchange = Exchange(
+            key=request_key(method, url, request_body, self.seed),
+            method=method,
+            path=_path_of(url),
+            request_body=_mask_body(request_body, secrets),
+            status=status,
+            reason=reason,
+            headers=[
+                (name, _mask_params(value.encode(), secrets).decode())
+                for name, value in mask_sensitive(headers).items()
+                if name.lower() not in _TRANSPORT_HEADERS
+            ],
+            body=_mask_body(body, secrets),
+        )
+        payload = msgpack.packb(asdict(exchange))
+        with self._lock:
+            self._secrets |= secrets
+            self._index[exchange.key].append(self._file.tell())
+            self._file.write(_LENGTH.pack(len(payload)) + payload)
+            self._stats['recorded'] += 1
+
+    def play(self, method: str, url: str, body) -> Exchange:
+        """取出請求對應的紀錄 (重播模式)
+
+        Args:
+            method: HTTP 請求方法。
+            url: 請求的完整 URL。
+            body: 請求 body，同 `request_key`。
+
+        Raises:
+            CassetteMiss: 如果 cassette 中沒有此請求。
+        """
+        key = request_key(method, url, body, self.seed)
+        with self._lock:
+            offsets = self._index.get(key)
+            if not offsets:
+                self._stats['missed'] += 1
+                raise CassetteMiss(f'cassette {self.path} 中沒有 {method} {_path_of(url)} 的紀錄')
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = min(cursor + 1, len(offsets) - 1)
+            self._stats['replayed'] += 1
+        return self._read(offsets[cursor])
+
+    def stats(self) -> dict:
+        """回傳模式與錄製 / 重播 / 未命中的筆數"""
+        with self._lock:
+            return {'mode': self.mode, **self._stats}
+
+    def close(self):
+        """關閉 cassette，錄製模式下寫出索引並檢查是否殘留敏感值
+
+        Raises:
+            CassetteLeak: 如果錄製時遮蔽掉的 token 等憑證仍出現在 cassette 或索引中。
+        """
+        if self.mode == 'record':
+            self._file.close()
+            index = {'size': self.path.stat().st_size, 'keys': dict(self._index)}
+            self._index_path.write_bytes(msgpack.packb(index))
+            logger.info('cassette 已寫入 %s (%s 筆)', self.path, self._stats['recorded'])
+            leaks = self.find_leaks()
+            if leaks:
+                # 不在訊息中列出值本身，避免敏感值轉而出現在 log 與報告中
+                raise CassetteLeak(f'cassette {self.path} 中仍有 {leaks} 個未遮蔽的 token，請勿分享此檔案')
+            return
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def find_leaks(self) -> int:
+        """回傳錄製時遮蔽掉的憑證中，仍出現在 cassette 或索引檔中的數量 (錄製模式，關閉後呼叫)"""
+        content = self.path.read_bytes() + self._index_path.read_bytes()
+        return sum(secret.encode() in content for secret in self._secrets)
+
+    def _read(self, offset: int) -> Exchange:
+        (length,) = _LENGTH.unpack_from(self._mmap, offset)
+        start = offset + _LENGTH.size
+        fields = msgpack.unpackb(self._mmap[start : start + length])
+        fields['headers'] = [tuple(header) for header in fields['headers']]
+        return Exchange(**fields)
+
+    def _load_index(self):
+        """讀取索引，遺失或過期時掃描主檔重建"""
+        size = len(self._mmap) if self._mmap is not None else 0
+        if self._index_path.exists():
+            index = msgpack.unpackb(self._index_path.read_bytes())
+            if index['size'] == size:
+                self._index.update(index['keys'])
+                return
+        logger.warning('cassette 索引 %s 遺失或與主檔不符，由主檔重建', self._index_path)
+        offset = self._start
+        while offset + _LENGTH.size <= size:
+            (length,) = _LENGTH.unpack_from(self._mmap, offset)
+            if offset + _LENGTH.size + length > size:
+                # 錄製中斷留下的不完整紀錄
+                break
+            self._index[self._read(offset).key].append(offset)
+            offset += _LENGTH.size + length
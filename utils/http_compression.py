@@ -0,0 +1,131 @@
+"""HTTP 請求 body 的壓縮，以及 Accept-Encoding 的檢查
+
+對遠端環境跑測試時，大型 JSON body 與清單回應受頻寬限制。各服務可在 secrets.yml 的
+'services' 區塊設定 (見 `ServiceSettings`):
+
+- request_compression: 超過 `compression_threshold` 位元組的請求 body 以此編碼壓縮
+- accept_encoding: 覆蓋 requests / httpx 預設的 `Accept-Encoding`
+
+同步的 requests session 由 `compress_request`、非同步的 httpx client 由 `compress_httpx_request` 處理。
+
+brotli (`br`) 與 zstd 為選用套件，需自行安裝:
+
+    uv pip install brotli
+"""
+
+import gzip
+import importlib
+import importlib.util
+import zlib
+from typing import Callable
+
+import httpx
+import requests
+
+# 編碼名稱 -> 回傳壓縮函式的建構器。建構器延後到選用時才執行，未安裝的選用套件不影響其他編碼
+_COMPRESSOR_FACTORIES: dict[str, Callable[[], Callable[[bytes], bytes]]] = {
+    'gzip': lambda: gzip.compress,
+    # HTTP 的 deflate 指的是 zlib 格式 (RFC 1950)，而非裸的 deflate 串流
+    'deflate': lambda: zlib.compress,
+    'br': lambda: importlib.import_module('brotli').compress,
+}
+
+REQUEST_ENCODINGS = tuple(_COMPRESSOR_FACTORIES)
+
+# 回應解壓縮需要選用套件的編碼 -> urllib3 接受的套件 (任一個即可)
+_DECODER_PACKAGES = {'br': ('brotli', 'brotlicffi'), 'zstd': ('zstandard',)}
+
+
+def get_compressor(encoding: str) -> Callable[[bytes], bytes]:
+    """取得指定編碼的壓縮函式
+
+    Args:
+        encoding: 編碼名稱，須為 `REQUEST_ENCODINGS` 之一。
+
+    Raises:
+        ValueError: 如果編碼不在 `REQUEST_ENCODINGS` 中。
+        ImportError: 如果該編碼需要的套件未安裝。
+    """
+    if encoding not in _COMPRESSOR_FACTORIES:
+        raise ValueError(f"未知的請求壓縮編碼 '{encoding}'，可用的有: {REQUEST_ENCODINGS}")
+    try:
+        return _COMPRESSOR_FACTORIES[encoding]()
+    except ImportError as e:
+        raise ImportError(f"請求壓縮編碼 '{encoding}' 需要先安裝對應的套件: uv pip install brotli") from e
+
+
+def check_accept_encoding(value: str):
+    """確認 Accept-Encoding 中的每個編碼都能被解壓縮
+
+    伺服器依 Accept-Encoding 選擇編碼，若宣告了 urllib3 無法解壓縮的編碼，回應會以
+    壓縮後的位元組原樣交給 JSON 解碼器，錯誤訊息與根因相距甚遠，因此在建立 session 時就擋下。
+
+    Args:
+        value: Accept-Encoding header 的值，例如 'gzip, br;q=0.9'。
+
+    Raises:
+        ImportError: 如果其中的編碼需要的套件未安裝。
+    """
+    for token in value.split(','):
+        encoding = token.split(';', 1)[0].strip().lower()
+        packages = _DECODER_PACKAGES.get(encoding)
+        if packages and not any(importlib.util.find_spec(package) for package in packages):
+            raise ImportError(f"Accept-Encoding 中的 '{encoding}' 需要先安裝對應的套件: uv pip install {packages[0]}")
+
+
+def compress_request(
+    request: requests.PreparedRequest, compress: Callable[[bytes], bytes] | None, encoding: str, threshold: int
+) -> tuple[int, int]:
+    """body 達到門檻時就地壓縮請求，並更新 Content-Encoding 與 Content-Length
+
+    已帶 Content-Encoding 的請求 (呼叫端自行壓縮，或重導向時重送的請求) 與串流 body 不處理。
+
+    Args:
+        request: 要送出的請求。
+        compress: `get_compressor` 取得的壓縮函式，None 表示不壓縮 (只計算位元組數)。
+        encoding: 編碼名稱，寫入 Content-Encoding。
+        threshold: 觸發壓縮的最小 body 位元組數。
+
+    Returns:
+        (實際送出的 body 位元組數, 壓縮前的 body 位元組數)。body 無法計算長度時皆為 0。
+    """
+    body = request.body
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    if not isinstance(body, bytes):
+        return 0, 0
+    if compress is None or len(body) < threshold or 'Content-Encoding' in request.headers:
+        return len(body), len(body)
+    compressed = compress(body)
+    request.body = compressed
+    request.headers['Content-Encoding'] = encoding
+    request.headers['Content-Length'] = str(len(compressed))
+    return len(compressed), len(body)
+
+
+def compress_httpx_request(
+    request: httpx.Request, compress: Callable[[bytes], bytes] | None, encoding: str, threshold: int
+) -> tuple[int, int]:
+    """`compress_request` 的 httpx 版本，規則與回傳值相同
+
+    Args:
+        request: 要送出的 `httpx.Request`。
+        compress: 同 `compress_request`。
+        encoding: 同 `compress_request`。
+        threshold: 同 `compress_request`。
+
+    Returns:
+        同 `compress_request`。
+    """
+    if not isinstance(request.stream, httpx.ByteStream):
+        return 0, 0
+    body = request.content
+    if compress is None or len(body) < threshold or 'Content-Encoding' in request.headers:
+        return len(body), len(body)
+    compressed = compress(body)
+    request.stream = httpx.ByteStream(compressed)
+    # httpx 沒有替換 body 的公開方法，`content` 讀的是建構時讀好的這個屬性
+    request._content = compressed
+    request.headers['Content-Encoding'] = encoding
+    request.headers['Content-Length'] = str(len(compressed))
+    return len(compressed), len(body)
@@ -0,0 +1,659 @@
+"""建立 API 測試共用的 `requests.Session`，並依服務套用各自的連線池設定
+
+requests 依 URL 前綴挑選 adapter，因此每個服務的 base URL 掛一個自己的 `ServiceAdapter`，
+連線池大小、阻塞行為與統計就能按服務區分，而 `BaseRequest` 與 `ApiClientProvider`
+完全不需要知道這些設定的存在。掛載點是 api_test conftest 的 `shared_session` fixture。
+
+服務的 `transport` 設為 'http2' 時改掛 `Http2Adapter`，由 httpx 送出請求，併發請求在同一條
+連線上多工，呼叫端一樣拿到 `requests.Response`。
+
+非同步的 `httpx.AsyncClient` 以同樣的方式依服務掛載 transport，套用連線池、HTTP/2、timeout 與
+請求壓縮 / Accept-Encoding 設定，但不經過 `ServiceAdapter.send` 的 GET 快取與 hedging，見 `build_async_client`。
+
+提供 `Cassette` 時，同步與非同步的請求都會被錄進 cassette 或改由 cassette 重播 (見 `utils/http_cassette.py`)。
+"""
+
+import io
+import logging
+import os
+import ssl
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import DEFAULT_CA_BUNDLE_PATH, get_encoding_from_headers, select_proxy
+
+from api.service_names import Service
+from utils import deadline
+from utils.config_loader import Config, ConfigError, ServiceSettings
+from utils.hedging import HEDGE_METHODS, Hedger
+from utils.http_cache import ResponseCache
+from utils.http_cassette import Cassette, Exchange
+from utils.http_compression import (
+    REQUEST_ENCODINGS,
+    check_accept_encoding,
+    compress_httpx_request,
+    compress_request,
+    get_compressor,
+)
+from utils.http_timing import TIMED_POOL_CLASSES, HttpxTracer, connect_time_since
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceAdapter(HTTPAdapter):
+    """依單一服務的 `ServiceSettings` 建立連線池的 adapter
+
+    所有經過 session 的請求都會走到 `send`，因此 timeout、快取、hedging、壓縮、網路階段計時、
+    傳輸量統計與 cassette 錄製 / 重播這類對 `BaseRequest` 透明的傳輸層功能都掛在這裡。
+    """
+
+    def __init__(self, settings: ServiceSettings, cache: ResponseCache = None, cassette: Cassette = None):
+        """初始化 adapter
+
+        Args:
+            settings: 此服務的連線設定。
+            cache: 整個 session 共用的 GET 回應快取，未提供時不快取。
+            cassette: 整個 session 共用的 cassette，未提供時不錄製也不重播。
+
+        Raises:
+            ImportError: 如果設定的壓縮或 Accept-Encoding 編碼需要的套件未安裝。
+        """
+        self.settings = settings
+        self.cache = cache
+        self.cassette = cassette
+        self._compress = get_compressor(settings.request_compression) if settings.request_compression else None
+        check_accept_encoding(settings.accept_encoding)
+        self.hedger = None
+        if settings.hedge_percentile:
+            # 主請求與備援請求各占一條執行緒；連線池本身的上限仍由 pool_maxsize 控制
+            self.hedger = Hedger(
+                settings.hedge_percentile, settings.hedge_window, max_workers=settings.pool_maxsize * 2
+            )
+        super().__init__(
+            pool_connections=settings.pool_connections,
+            pool_maxsize=settings.pool_maxsize,
+            pool_block=settings.pool_block,
+        )
+
+    def init_poolmanager(self, *args, **kwargs):
+        """建立連線池管理器，並改用會記錄連線建立耗時的連線類別"""
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = TIMED_POOL_CLASSES
+
+    def send(self, request: requests.PreparedRequest, stream=False, **kwargs) -> requests.Response:
+        """送出請求，適用時先經過回應快取
+
+        串流請求不快取：呼叫端要的是逐段讀取，快取卻得先把整個 body 讀完。
+        寫入類的請求成功後淘汰同一 URL 的快取，見 `ResponseCache.invalidate`。
+
+        非串流請求的 body 在此讀完並計時 (session 原本也會在 adapter 回傳後立刻讀完)，
+        回應的 `phase_timings` 因此含 connect、ttfb 與 download，`transfer_sizes` 則記錄
+        請求與回應在線路上與解壓縮後的位元組數，見 `utils/http_timing.py`。
+
+        請求 body 依服務設定壓縮，Accept-Encoding 有設定時覆蓋 session 的預設值。
+        timeout 見 `_timeout`。
+
+        重播 cassette 時不經過上述任何一步，直接由 cassette 產生回應；錄製時串流請求的 body
+        也會先整個讀完 (之後的 `iter_content` 從已讀的內容切出)。
+
+        Raises:
+            DeadlineExceeded: 如果所在的 deadline 已用完，請求不會送出。
+            CassetteMiss: 如果重播的 cassette 中沒有此請求。
+        """
+        cassette = self.cassette
+        if cassette is not None and cassette.replaying:
+            return _replayed_response(request, cassette.play(request.method, request.url, request.body), self)
+        # 錄進 cassette 的是壓縮前的 body
+        body = request.body
+        settings = self.settings
+        kwargs['timeout'] = self._timeout(kwargs.get('timeout'))
+        sent, uncompressed = compress_request(
+            request, self._compress, settings.request_compression, settings.compression_threshold
+        )
+        if settings.accept_encoding:
+            request.headers['Accept-Encoding'] = settings.accept_encoding
+        if stream:
+            response = self._transmit(request, stream=True, **kwargs)
+            if self.cache is not None:
+                self.cache.invalidate(request, response)
+            if cassette is not None:
+                self._record(request, body, response)
+            return response
+        if self.cache is None or not self.cache.accepts(request):
+            response = self._read_body(self._transmit(request, stream=False, **kwargs))
+            if self.cache is not None:
+                self.cache.invalidate(request, response)
+        else:
+            response = self.cache.fetch(
+                request, lambda prepared: self._read_body(self._transmit(prepared, stream=False, **kwargs))
+            )
+        # 快取命中的回應沒有 raw，線路上的位元組數為 0
+        tell = getattr(response.raw, 'tell', None)
+        response.transfer_sizes = {
+            'request_sent': sent,
+            'request_uncompressed': uncompressed,
+            'response_received': tell() if tell else 0,
+            'response_decompressed': len(response.content),
+        }
+        if cassette is not None:
+            self._record(request, body, response)
+        return response
+
+    def _record(self, request: requests.PreparedRequest, body, response: requests.Response):
+        """把一次往返錄進 cassette"""
+        self.cassette.record(
+            request.method,
+            request.url,
+            body,
+            response.status_code,
+            response.reason,
+            response.headers.items(),
+            response.content,
+        )
+
+    def _timeout(self, timeout) -> tuple[float | None, float | None]:
+        """決定本次請求的 (connect, read) timeout
+
+        呼叫端沒有指定時採用服務設定，再依所在的 deadline 縮到剩餘預算以內。
+        """
+        if timeout is None:
+            timeout = (self.settings.connect_timeout, self.settings.read_timeout)
+        elif not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+        return deadline.clamp(timeout[0]), deadline.clamp(timeout[1])
+
+    def _transmit(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        """實際送出請求，冪等方法在啟用 hedging 時交給 `Hedger`"""
+        if self.hedger is None or request.method not in HEDGE_METHODS:
+            return self._send_once(request, **kwargs)
+        return self.hedger.send(lambda: self._send_once(request, **kwargs))
+
+    def _send_once(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        """送出一次請求，並在回應上記下 connect 與 ttfb (可能在 hedging 的執行緒中執行)"""
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        elapsed = time.perf_counter() - start
+        # body 尚未讀取，連線仍掛在 urllib3 的回應上
+        connect = connect_time_since(getattr(response.raw, 'connection', None), start)
+        response.phase_timings = {'connect': connect, 'ttfb': elapsed - connect, 'download': 0.0}
+        return response
+
+    @staticmethod
+    def _read_body(response: requests.Response) -> requests.Response:
+        """讀完 body 並記下 download 耗時"""
+        start = time.perf_counter()
+        response.content
+        response.phase_timings['download'] = time.perf_counter() - start
+        return response
+
+    def close(self):
+        """關閉連線池與 hedging 的執行緒"""
+        if self.hedger is not None:
+            self.hedger.close()
+        super().close()
+
+    def pool_stats(self) -> dict:
+        """統計此 adapter 底下所有連線池的命中情形
+
+        urllib3 的連線池本身就會累計請求數與新建的連線數，每條新建的連線都代表一次
+        「池裡沒有可用連線」，其餘請求則是重用了既有連線。因此命中數由兩者相減而得，
+        不需要另外攔截連線的取用與歸還。預熱開出的連線同樣計入。
+
+        Returns:
+            包含 requests (請求數)、hits (重用連線)、misses (新建連線) 的 dict。
+            啟用 hedging 時另含 `Hedger.stats` 的欄位。
+        """
+        pools = [self.poolmanager.pools[key] for key in self.poolmanager.pools.keys()]
+        total_requests = sum(pool.num_requests for pool in pools)
+        misses = sum(pool.num_connections for pool in pools)
+        stats = {'requests': total_requests, 'hits': total_requests - misses, 'misses': misses}
+        if self.hedger is not None:
+            stats.update(self.hedger.stats())
+        return stats
+
+    def warm_up(self, session: requests.Session, base_url: str) -> int:
+        """預先對 base URL 開啟 keep-alive 連線並放回連線池
+
+        讓測試中第一個請求不必在計時範圍內付出 TCP/TLS 的建立成本。每個請求都以
+        `release_conn=False` 占住連線，下一個請求才會另開一條，全部送完再一起歸還，
+        如此才能得到 N 條不同的連線，而非同一條連線重複使用 N 次。
+
+        預熱只是最佳化，失敗時記錄警告而不讓 session 建立失敗——服務若真的連不上，
+        第一個測試自然會以正確的錯誤失敗。
+
+        Args:
+            session: 掛載此 adapter 的 session，用於取得與實際請求相同的 TLS 與 proxy 設定。
+            base_url: 服務的 base URL。
+
+        Returns:
+            實際開啟的連線數。
+        """
+        count = min(self.settings.warmup_connections, self.settings.pool_maxsize)
+        # 連線池的 key 含 TLS 參數 (即使是 http)，而 verify 會被 REQUESTS_CA_BUNDLE 等環境變數
+        # 改寫。必須與實際請求走同一套合併規則再挑池，否則會預熱到一個 requests 永遠不會用到的池
+        env = session.merge_environment_settings(base_url, {}, None, None, None)
+        pool = self.get_connection_with_tls_context(
+            requests.Request('HEAD', base_url).prepare(), verify=env['verify'], proxies=env['proxies'], cert=env['cert']
+        )
+        path = urlsplit(base_url).path or '/'
+        responses = []
+        try:
+            for _ in range(count):
+                responses.append(pool.urlopen('HEAD', path, release_conn=False, preload_content=False, retries=False))
+        except Exception as e:
+            logger.warning('預熱 %s 的連線時發生錯誤，已開啟 %s 條: %s', base_url, len(responses), e)
+        finally:
+            for response in responses:
+                response.release_conn()
+        return len(responses)
+
+
+# HTTP/1.1 的逐跳 headers。requests 會自動帶上 `Connection: keep-alive`，但 HTTP/2 禁止這類 header
+_HOP_BY_HOP_HEADERS = frozenset({'connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade'})
+
+
+class Http2Adapter(ServiceAdapter):
+    """以 httpx 送出請求、支援 HTTP/2 的 adapter
+
+    requests 只會說 HTTP/1.1，每個併發請求都要占一條 TCP 連線；HTTP/2 則能在同一條連線上
+    多工。此 adapter 只替換 `ServiceAdapter` 中「實際送出一次請求」的部分，把 httpx 的回應
+    轉成 `requests.Response`，因此快取、hedging、計時，以及 `BaseRequest` 的介面與
+    `normalize_response` 的結果都與 HTTP/1.1 相同。
+
+    httpx 的 TLS 與 proxy 設定綁在 client 上，而 requests 是逐請求傳入，因此依
+    (scheme, verify, cert, proxy) 各建一個 `httpx.Client`，實務上只會有一個。
+    """
+
+    def __init__(self, settings: ServiceSettings, cache: ResponseCache = None, cassette: Cassette = None):
+        """初始化 adapter，參數同 `ServiceAdapter`"""
+        super().__init__(settings, cache=cache, cassette=cassette)
+        self._clients: dict[tuple, httpx.Client] = {}
+        self._lock = threading.Lock()
+        self._counts = {'requests': 0, 'misses': 0}
+
+    def _send_once(
+        self, request: requests.PreparedRequest, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ) -> requests.Response:
+        """以 httpx 送出一次請求，回傳尚未讀取 body 的 `requests.Response`"""
+        client = self._client(urlsplit(request.url).scheme, verify, cert, select_proxy(request.url, proxies))
+        headers = [(name, value) for name, value in request.headers.items() if name.lower() not in _HOP_BY_HOP_HEADERS]
+        tracer = HttpxTracer()
+        try:
+            httpx_request = client.build_request(
+                request.method,
+                request.url,
+                headers=headers,
+                content=request.body,
+                timeout=_httpx_timeout(timeout),
+                extensions={'trace': tracer.record},
+            )
+            httpx_response = client.send(httpx_request, stream=True)
+        except httpx.TimeoutException as e:
+            error = requests.ConnectTimeout if isinstance(e, httpx.ConnectTimeout) else requests.ReadTimeout
+            raise error(e, request=request) from e
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(e, request=request) from e
+
+        with self._lock:
+            self._counts['requests'] += 1
+            self._counts['misses'] += tracer.connected
+        response = requests.Response()
+        response.status_code = httpx_response.status_code
+        response.reason = httpx_response.reason_phrase
+        response.headers = CaseInsensitiveDict(httpx_response.headers.items())
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = _HttpxRaw(httpx_response)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        timings = tracer.phase_timings()
+        response.phase_timings = {'connect': timings['connect'], 'ttfb': timings['ttfb'], 'download': 0.0}
+        return response
+
+    def _client(self, scheme: str, verify, cert, proxy: str | None) -> httpx.Client:
+        """取得對應 TLS 與 proxy 設定的 `httpx.Client`，沒有時建立"""
+        key = (scheme, verify, cert if not isinstance(cert, list) else tuple(cert), proxy)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = httpx.Client(
+                    http1=scheme == 'https',
+                    http2=True,
+                    verify=_ssl_context(verify, cert),
+                    proxy=proxy,
+                    limits=_httpx_limits(self.settings),
+                    trust_env=False,
+                )
+            return client
+
+    def pool_stats(self) -> dict:
+        """統計連線的重用情形，欄位同 `ServiceAdapter.pool_stats`
+
+        httpx 不累計這些數字，因此由 trace 事件自行計數：有 TCP 連線事件的請求即為 miss。
+        """
+        with self._lock:
+            stats = {**self._counts, 'hits': self._counts['requests'] - self._counts['misses']}
+        if self.hedger is not None:
+            stats.update(self.hedger.stats())
+        return stats
+
+    def warm_up(self, session: requests.Session, base_url: str) -> int:
+        """預先建立連線。HTTP/2 的請求共用一條連線，因此不論設定多少都只開一條"""
+        env = session.merge_environment_settings(base_url, {}, None, None, None)
+        client = self._client(
+            urlsplit(base_url).scheme, env['verify'], env['cert'], select_proxy(base_url, env['proxies'])
+        )
+        try:
+            client.head(base_url)
+        except httpx.HTTPError as e:
+            logger.warning('預熱 %s 的連線時發生錯誤: %s', base_url, e)
+            return 0
+        return 1
+
+    def close(self):
+        """關閉所有 httpx client"""
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.close()
+        super().close()
+
+
+class _HttpxRaw:
+    """讓 `requests.Response` 從 httpx 的串流回應讀取 body (取代 urllib3 的 `HTTPResponse`)
+
+    `requests.Response.iter_content` 與 `.content` 只會用到 `stream`；關閉時用到 `close` 與 `release_conn`；
+    傳輸量統計用到 `tell`。
+    """
+
+    def __init__(self, response: httpx.Response):
+        self._response = response
+
+    def stream(self, chunk_size: int = None, decode_content: bool = True):
+        # requests 一律要求解壓縮，httpx 的 iter_bytes 依 Content-Encoding 解壓縮
+        yield from self._response.iter_bytes(chunk_size)
+
+    def tell(self) -> int:
+        """已從線路上讀取的位元組數 (解壓縮前)，同 urllib3 的 `HTTPResponse.tell`"""
+        return self._response.num_bytes_downloaded
+
+    def close(self):
+        self._response.close()
+
+    def release_conn(self):
+        self._response.close()
+
+
+class EncodingTransport(httpx.AsyncBaseTransport):
+    """`httpx.AsyncClient` 的 transport 包裝，依服務設定壓縮請求 body 並覆蓋 Accept-Encoding
+
+    規則與 `ServiceAdapter.send` 相同，由 `build_async_client` 掛在各服務的 transport 外層、`CassetteTransport` 內層：
+    cassette 錄到的是壓縮前的 body，重播時也不壓縮。
+    """
+
+    def __init__(self, settings: ServiceSettings, transport: httpx.AsyncBaseTransport):
+        """初始化 EncodingTransport
+
+        Args:
+            settings: 此服務的連線設定。
+            transport: 實際送出請求的 transport。
+
+        Raises:
+            ImportError: 如果設定的壓縮或 Accept-Encoding 編碼需要的套件未安裝。
+        """
+        self.settings = settings
+        self._compress = get_compressor(settings.request_compression) if settings.request_compression else None
+        check_accept_encoding(settings.accept_encoding)
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        settings = self.settings
+        compress_httpx_request(request, self._compress, settings.request_compression, settings.compression_threshold)
+        if settings.accept_encoding:
+            request.headers['Accept-Encoding'] = settings.accept_encoding
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """`httpx.AsyncClient` 的 transport 包裝，把請求錄進 cassette 或由 cassette 重播
+
+    行為與 `ServiceAdapter` 的 cassette 處理相同，由 `build_async_client` 掛在各服務的 transport 外層。
+    """
+
+    def __init__(self, cassette: Cassette, transport: httpx.AsyncBaseTransport):
+        """初始化 CassetteTransport
+
+        Args:
+            cassette: 整個 session 共用的 cassette。
+            transport: 錄製時實際送出請求的 transport。
+        """
+        self.cassette = cassette
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        # 錄進 cassette 的是壓縮前的 body (內層的 `EncodingTransport` 會就地壓縮)
+        body = request.content
+        if self.cassette.replaying:
+            exchange = self.cassette.play(request.method, url, body)
+            return httpx.Response(
+                exchange.status,
+                headers=exchange.headers,
+                content=exchange.body,
+                extensions={'reason_phrase': exchange.reason.encode()},
+            )
+        response = await self._transport.handle_async_request(request)
+        # 讀完後串流即關閉；回應 body 已解壓縮，回傳的回應改以讀好的內容重建
+        content = await httpx.Response(response.status_code, headers=response.headers, stream=response.stream).aread()
+        self.cassette.record(
+            request.method,
+            url,
+            body,
+            response.status_code,
+            response.reason_phrase,
+            response.headers.multi_items(),
+            content,
+        )
+        headers = [
+            (name, value)
+            for name, value in response.headers.multi_items()
+            if name.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')
+        ]
+        return httpx.Response(response.status_code, headers=headers, content=content, extensions=response.extensions)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def _replayed_response(
+    request: requests.PreparedRequest, exchange: Exchange, adapter: ServiceAdapter
+) -> requests.Response:
+    """由 cassette 的紀錄組出 `requests.Response`"""
+    response = requests.Response()
+    response.status_code = exchange.status
+    response.reason = exchange.reason
+    response.headers = CaseInsensitiveDict(exchange.headers)
+    response.headers['Content-Length'] = str(len(exchange.body))
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.raw = io.BytesIO(exchange.body)
+    response.url = request.url
+    response.request = request
+    response.connection = adapter
+    return response
+
+
+def _httpx_timeout(timeout) -> httpx.Timeout:
+    """把 requests 的 timeout (秒數或 (connect, read)) 轉成 `httpx.Timeout`"""
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+def _httpx_limits(settings: ServiceSettings) -> httpx.Limits:
+    """依服務設定組出 httpx 的連線上限，對應方式見 `build_async_client`"""
+    return httpx.Limits(
+        max_connections=settings.pool_maxsize if settings.pool_block else None,
+        max_keepalive_connections=settings.pool_maxsize,
+    )
+
+
+def _ssl_context(verify, cert) -> ssl.SSLContext | bool:
+    """依 requests 的 verify / cert 參數建立 httpx 用的 SSL context
+
+    verify 為 True 時與 requests 一樣使用 certifi 的 CA bundle。
+    """
+    if verify is False:
+        return False
+    ca = DEFAULT_CA_BUNDLE_PATH if verify is True else verify
+    context = ssl.create_default_context(capath=ca) if os.path.isdir(ca) else ssl.create_default_context(cafile=ca)
+    if cert:
+        context.load_cert_chain(*((cert,) if isinstance(cert, str) else cert))
+    return context
+
+
+def build_session(config: Config, cache: ResponseCache = None, cassette: Cassette = None) -> requests.Session:
+    """建立一個依服務掛好 `ServiceAdapter` 的 `requests.Session`
+
+    只處理 `Service` 列舉的服務：`urls` 底下的其他項目 (例如 UI 站台) 不經過
+    `ApiClientProvider`，不會用到這個 session。
+
+    Args:
+        config: 當前環境的測試設定。
+        cache: 所有服務共用的 GET 回應快取，未提供時不快取。
+        cassette: 所有服務共用的 cassette，未提供時不錄製也不重播。
+
+    Returns:
+        一個已掛好各服務 adapter 的 `requests.Session`。
+
+    Raises:
+        ConfigError: 如果服務的 `request_compression` 不是支援的編碼。
+    """
+    session = requests.Session()
+    for service in Service:
+        base_url = config.urls.get(service.value)
+        if base_url:
+            settings = _checked_service(config, service.value)
+            adapter_class = Http2Adapter if settings.transport == 'http2' else ServiceAdapter
+            session.mount(base_url, adapter_class(settings, cache=cache, cassette=cassette))
+    return session
+
+
+def build_async_client(config: Config, cassette: Cassette = None) -> httpx.AsyncClient:
+    """建立一個依服務套用連線池設定的 `httpx.AsyncClient`，供 `AsyncBaseRequest` 共用
+
+    設定對應方式與 `ServiceAdapter` 相同：`pool_maxsize` 是保留的 keep-alive 連線數；
+    `pool_block` 為 True 時它同時是連線總數上限，超過就等待歸還，否則與 requests
+    一樣另開連線、用完即丟。httpx 沒有「快取多少個 host」的概念，`pool_connections` 不適用。
+    `transport` 為 'http2' 的服務開啟 HTTP/2，規則與 `Http2Adapter` 相同。
+
+    timeout 的規則也與 `ServiceAdapter` 相同：httpx 的 timeout 綁在 client 而非 transport 上，
+    因此 client 本身不設 timeout，改由 request hook 依 URL 套用服務的設定並縮到 deadline 以內。
+
+    請求壓縮與 Accept-Encoding 由各服務 transport 外層的 `EncodingTransport` 套用，規則同 `ServiceAdapter.send`。
+    其餘的處理不適用於此 client：
+
+    - 不經過 `--http-cache` 的 `ResponseCache`，相同的 GET 每次都連線，也不帶 If-None-Match 重新驗證
+    - 不做 hedging
+
+    `ResponseCache` 以 `requests.PreparedRequest` 為對象，async 測試目前只有註冊、登入等少量請求，
+    因此沒有另做一份。以上行為由 testcases/api_test/http/test_async_client.py 固定，之後補上時須一併更新。
+
+    Args:
+        config: 當前環境的測試設定。
+        cassette: 與 `build_session` 共用的 cassette，各服務的 transport 最外層會包上 `CassetteTransport`。
+
+    Returns:
+        一個尚未開啟的 `httpx.AsyncClient`，請以 `async with` 管理其生命週期。
+
+    Raises:
+        ConfigError: 如果服務的 `request_compression` 不是支援的編碼。
+        ImportError: 如果設定的壓縮或 Accept-Encoding 編碼需要的套件未安裝。
+    """
+    mounts = {}
+    service_settings = {}
+    for service in Service:
+        base_url = config.urls.get(service.value)
+        if base_url:
+            settings = _checked_service(config, service.value)
+            http2 = settings.transport == 'http2'
+            transport = EncodingTransport(
+                settings,
+                httpx.AsyncHTTPTransport(
+                    limits=_httpx_limits(settings),
+                    http1=not http2 or urlsplit(base_url).scheme == 'https',
+                    http2=http2,
+                ),
+            )
+            mounts[base_url] = CassetteTransport(cassette, transport) if cassette is not None else transport
+            service_settings[base_url] = settings
+
+    async def apply_timeout(request: httpx.Request):
+        timeout = request.extensions['timeout']
+        if all(value is None for value in timeout.values()):
+            url = str(request.url)
+            settings = next(
+                (value for base_url, value in service_settings.items() if url.startswith(base_url)), ServiceSettings()
+            )
+            timeout = {'connect': settings.connect_timeout, 'read': settings.read_timeout, 'write': None, 'pool': None}
+        request.extensions['timeout'] = {name: deadline.clamp(value) for name, value in timeout.items()}
+
+    return httpx.AsyncClient(mounts=mounts, timeout=None, event_hooks={'request': [apply_timeout]})
+
+
+def _checked_service(config: Config, name: str) -> ServiceSettings:
+    """取出服務的設定，並確認 `request_compression` 是支援的編碼
+
+    在建立 session / client 時才檢查而非載入設定時，`utils.config_loader` 才不必為此 import requests。
+    """
+    settings = config.service(name)
+    if settings.request_compression and settings.request_compression not in REQUEST_ENCODINGS:
+        raise ConfigError(
+            f"環境 '{config.env}' 的服務 '{name}' 的 request_compression '{settings.request_compression}' 不支援，"
+            f'可用的有: {REQUEST_ENCODINGS}'
+        )
+    return settings
+
+
+def service_adapters(session: requests.Session) -> dict[str, ServiceAdapter]:
+    """取出 session 上由 `build_session` 掛載的 adapter
+
+    Args:
+        session: `build_session` 建立的 session。
+
+    Returns:
+        base URL 到 `ServiceAdapter` 的對應。
+    """
+    return {prefix: adapter for prefix, adapter in session.adapters.items() if isinstance(adapter, ServiceAdapter)}
+
+
+def warm_up_session(session: requests.Session):
+    """對 session 上每個服務開啟其設定的預熱連線數
+
+    Args:
+        session: `build_session` 建立的 session。
+    """
+    for base_url, adapter in service_adapters(session).items():
+        if adapter.settings.warmup_connections > 0:
+            opened = adapter.warm_up(session, base_url)
+            logger.info('已預熱 %s 的 %s 條連線', base_url, opened)
+
+
+def session_pool_stats(session: requests.Session) -> dict[str, dict]:
+    """彙整 session 上每個服務的連線池統計
+
+    Args:
+        session: `build_session` 建立的 session。
+
+    Returns:
+        base URL 到該服務 `ServiceAdapter.pool_stats` 的對應。
+    """
+    return {base_url: adapter.pool_stats() for base_url, adapter in service_adapters(session).items()}
@@ -0,0 +1,261 @@
+"""量測每個 HTTP 請求各階段的耗時，並彙整成依端點的統計
+
+測試變慢時，要能分辨是網路、伺服器還是我們自己 (日誌、遮蔽、正規化) 變慢，因此每個請求
+拆成五個階段 (單位皆為秒，以 `time.perf_counter` 量測):
+
+- connect: DNS 查詢 + TCP 連線 + TLS 交握。重用 keep-alive 連線時為 0
+- ttfb: 送出請求到收到回應 headers (扣除 connect)，主要反映伺服器處理時間
+- download: 讀取回應 body
+- decode: JSON 解碼
+- overhead: 其餘的框架成本 (組請求、日誌、遮蔽、正規化、requests 本身)
+
+前三者由傳輸層量測並掛在 response 的 `phase_timings` 上——同步請求由 `ServiceAdapter`
+搭配本模組的計時連線類別，非同步請求由 httpx 的 trace extension；後兩者由
+`BaseRequest` / `AsyncBaseRequest` 量測後呼叫 `record_timing` 收齊。
+
+傳輸層另在 response 的 `transfer_sizes` 記下位元組數 (見 `TRANSFER_FIELDS`)，壓縮前後各一，
+同樣由 `record_timing` 依端點累計。
+"""
+
+import json
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+
+import allure
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+PHASES = ('connect', 'ttfb', 'download', 'decode', 'overhead')
+
+# `transfer_sizes` 的欄位：請求 body 實際送出 / 壓縮前、回應 body 實際收到 / 解壓縮後的位元組數
+TRANSFER_FIELDS = ('request_sent', 'request_uncompressed', 'response_received', 'response_decompressed')
+
+# 統計報表中的百分位
+PERCENTILES = (50, 95, 99)
+
+# 路徑中的數字段 (例如物品 id) 換成佔位符，同一端點的請求才會彙整在一起
+_NUMERIC_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+class _TimedConnectionMixin:
+    """記錄連線建立耗時的 urllib3 連線
+
+    connect 只在新連線上發生，且可能發生在 urllib3 內部的任何時間點 (HTTPS 在挑選連線時、
+    HTTP 在第一次送出時)，因此記在連線自身，由傳輸層在請求結束後以 `connected_at` 判斷
+    這次連線是否建立於本次請求期間——預熱開出的連線就不會被算進第一個請求。
+    """
+
+    connect_time = 0.0
+    connected_at = -math.inf
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            self.connected_at = time.perf_counter()
+            self.connect_time = self.connected_at - start
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+# 供 `PoolManager.pool_classes_by_scheme` 使用
+TIMED_POOL_CLASSES = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+
+def connect_time_since(connection, start: float) -> float:
+    """取得連線在 `start` 之後建立所花的時間
+
+    Args:
+        connection: urllib3 的連線物件，非本模組的計時連線時視為沒有量測。
+        start: 請求開始的 `time.perf_counter` 值。
+
+    Returns:
+        連線建立於 `start` 之後時為其耗時，否則 (重用既有連線) 為 0。
+    """
+    if getattr(connection, 'connected_at', -math.inf) < start:
+        return 0.0
+    return connection.connect_time
+
+
+class HttpxTracer:
+    """由 httpx 的 trace 事件推算請求的網路階段
+
+    每個請求建立一個，以 `extensions={'trace': tracer}` 傳給 `httpx.AsyncClient`:
+
+        tracer = HttpxTracer()
+        response = await client.request(..., extensions={'trace': tracer})
+        response.phase_timings = tracer.phase_timings()
+
+    同步的 `httpx.Client` 要求 trace 是一般函式，改傳 `tracer.record`。
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._events: dict[str, float] = {}
+
+    async def __call__(self, event_name: str, info: dict):
+        self.record(event_name, info)
+
+    def record(self, event_name: str, info: dict):
+        """記下事件發生的時間"""
+        # 事件名稱形如 'connection.connect_tcp.started'、'http11.receive_response_headers.complete'，
+        # 去掉協定前綴後 HTTP/1.1 與 HTTP/2 可以共用同一套計算
+        self._events[event_name.split('.', 1)[1]] = time.perf_counter()
+
+    @property
+    def connected(self) -> bool:
+        """此請求是否新建了連線"""
+        return 'connect_tcp.complete' in self._events
+
+    def phase_timings(self) -> dict[str, float]:
+        """回傳 connect / ttfb / download 三個階段的耗時 (秒)，須在讀完 body 後呼叫"""
+        connect = self._span('connect_tcp') + self._span('start_tls')
+        headers_done = self._events.get('receive_response_headers.complete', self.start)
+        return {
+            'connect': connect,
+            'ttfb': max(headers_done - self.start - connect, 0.0),
+            'download': self._span('receive_response_body'),
+        }
+
+    def _span(self, name: str) -> float:
+        started = self._events.get(f'{name}.started')
+        complete = self._events.get(f'{name}.complete')
+        return complete - started if started is not None and complete is not None else 0.0
+
+
+@dataclass(frozen=True)
+class RequestTiming:
+    """一個請求各階段的耗時 (秒)，欄位見模組說明"""
+
+    connect: float
+    ttfb: float
+    download: float
+    decode: float
+    overhead: float
+
+    @property
+    def total(self) -> float:
+        return self.connect + self.ttfb + self.download + self.decode + self.overhead
+
+    def as_ms(self) -> dict[str, float]:
+        """轉成以毫秒為單位、含 total 的 dict，供 log 與 Allure 附件使用"""
+        return {name: round(value * 1000, 3) for name, value in {**asdict(self), 'total': self.total}.items()}
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    """以 nearest-rank 取已排序數列的百分位
+
+    Args:
+        ordered: 已由小到大排序、非空的數列。
+        p: 百分位 (0 < p <= 100)。
+    """
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+def endpoint_of(method: str, path: str) -> str:
+    """組出統計用的端點名稱，數字路徑段換成 `{id}`，例如 'GET /items/{id}'"""
+    return f'{method} {_NUMERIC_SEGMENT.sub("/{id}", path.split("?", 1)[0])}'
+
+
+class TimingCollector:
+    """依端點累積 `RequestTiming`，於測試結束時產生統計
+
+    執行緒安全：`BaseRequest.batch` 與 async 測試可能同時記錄。
+    """
+
+    def __init__(self):
+        self._samples: defaultdict[str, list[RequestTiming]] = defaultdict(list)
+        self._bytes: defaultdict[str, dict[str, int]] = defaultdict(lambda: dict.fromkeys(TRANSFER_FIELDS, 0))
+        self._lock = threading.Lock()
+
+    def add(self, endpoint: str, timing: RequestTiming, transfer_sizes: dict[str, int]):
+        with self._lock:
+            self._samples[endpoint].append(timing)
+            totals = self._bytes[endpoint]
+            for name in TRANSFER_FIELDS:
+                totals[name] += transfer_sizes.get(name, 0)
+
+    def summary(self) -> dict[str, dict]:
+        """產生依端點的統計
+
+        Returns:
+            端點名稱到統計的對應，依請求數由多到少排序。每個端點含 count、total 與
+            各階段的 p50 / p95 / p99 / max (毫秒)，以及 bytes (`TRANSFER_FIELDS` 各欄的總和)。
+        """
+        with self._lock:
+            samples = {endpoint: list(timings) for endpoint, timings in self._samples.items()}
+            byte_totals = {endpoint: dict(totals) for endpoint, totals in self._bytes.items()}
+        result = {}
+        for endpoint, timings in sorted(samples.items(), key=lambda item: -len(item[1])):
+            stats = {'count': len(timings)}
+            for name in ('total', *PHASES):
+                ordered = sorted(getattr(timing, name) for timing in timings)
+                stats[name] = {
+                    **{f'p{p}': round(percentile(ordered, p) * 1000, 3) for p in PERCENTILES},
+                    'max': round(ordered[-1] * 1000, 3),
+                }
+            stats['bytes'] = byte_totals[endpoint]
+            result[endpoint] = stats
+        return result
+
+
+_collector = TimingCollector()
+
+
+def record_timing(method: str, path: str, response, decode: float, total: float) -> RequestTiming:
+    """組出一個請求的 `RequestTiming`，連同傳輸量附到目前的 Allure step 並計入統計
+
+    須在該請求的 Allure step 內呼叫。
+
+    Args:
+        method: HTTP 請求方法。
+        path: API 的路徑，數字段會被彙整 (見 `endpoint_of`)。
+        response: `requests.Response` 或 `httpx.Response`。傳輸層量測過時帶有 `phase_timings`
+            與 `transfer_sizes`，沒有時 (例如未經 `ServiceAdapter` 的 session) 視為 0。
+        decode: JSON 解碼的耗時 (秒)。
+        total: 從開始處理請求到正規化完成的總耗時 (秒)，扣掉其他階段即為 overhead。
+
+    Returns:
+        此請求的 `RequestTiming`。
+    """
+    network = getattr(response, 'phase_timings', {})
+    connect, ttfb, download = (network.get(name, 0.0) for name in ('connect', 'ttfb', 'download'))
+    timing = RequestTiming(
+        connect=connect,
+        ttfb=ttfb,
+        download=download,
+        decode=decode,
+        overhead=max(total - connect - ttfb - download - decode, 0.0),
+    )
+    transfer_sizes = getattr(response, 'transfer_sizes', {})
+    _collector.add(endpoint_of(method, path), timing, transfer_sizes)
+    allure.attach(
+        json.dumps({'ms': timing.as_ms(), 'bytes': transfer_sizes}),
+        name='耗時與傳輸量',
+        attachment_type=allure.attachment_type.JSON,
+    )
+    return timing
+
+
+def timing_summary() -> dict[str, dict]:
+    """回傳本次執行所有請求的依端點耗時與傳輸量統計，見 `TimingCollector.summary`"""
+    return _collector.summary()
@@ -0,0 +1,59 @@
+"""提供可於執行時切換的 JSON 解碼器
+
+預設使用標準函式庫的 `json`。大型回應 (例如 `/items/` 的完整清單) 的解碼成本在壓測時
+相當可觀，可透過 `--json-decoder` 改用 orjson 或 msgspec——兩者皆為選用套件，需自行安裝:
+
+    uv pip install orjson
+    uv run pytest --env qa --json-decoder orjson
+
+三者的解碼失敗都是 `ValueError` 的子類別，呼叫端不需要依後端區分例外。
+"""
+
+import importlib
+import json
+from typing import Any, Callable
+
+# 解碼器名稱 -> 回傳 loads 函式的建構器。建構器延後到選用時才執行，未安裝的選用套件不影響預設值
+_DECODER_FACTORIES: dict[str, Callable[[], Callable[[bytes], Any]]] = {
+    'json': lambda: json.loads,
+    'orjson': lambda: importlib.import_module('orjson').loads,
+    'msgspec': lambda: importlib.import_module('msgspec.json').Decoder().decode,
+}
+
+JSON_DECODERS = tuple(_DECODER_FACTORIES)
+
+_loads: Callable[[bytes], Any] = json.loads
+
+
+def set_json_decoder(name: str):
+    """設定本次執行要使用的 JSON 解碼器 (由 conftest.py 呼叫)
+
+    Args:
+        name: 解碼器名稱，須為 `JSON_DECODERS` 之一。
+
+    Raises:
+        ValueError: 如果名稱不在 `JSON_DECODERS` 中。
+        ImportError: 如果選用的解碼器套件未安裝。
+    """
+    global _loads
+    if name not in _DECODER_FACTORIES:
+        raise ValueError(f"未知的 JSON 解碼器 '{name}'，可用的有: {JSON_DECODERS}")
+    try:
+        _loads = _DECODER_FACTORIES[name]()
+    except ImportError as e:
+        raise ImportError(f"JSON 解碼器 '{name}' 需要先安裝對應的套件: uv pip install {name}") from e
+
+
+def json_loads(data: bytes | str) -> Any:
+    """以目前選用的解碼器解碼 JSON
+
+    Args:
+        data: JSON 的原始內容。
+
+    Returns:
+        解碼後的 Python 物件。
+
+    Raises:
+        ValueError: 如果內容不是合法的 JSON。
+    """
+    return _loads(data)
@@ -0,0 +1,237 @@
+"""逐筆解析大型清單回應，記憶體用量與清單長度無關
+
+`/items/` 這類回應的形狀是 `{"code": 0, "data": [...上萬筆...]}`。一般的流程要把整個 body
+讀進記憶體、解碼、decamelize 後才能驗證，清單一大就是數百 MB 與數秒 CPU。這裡改為邊從
+socket 讀取邊解析 `data` 陣列，每解析出一筆就交給呼叫端，處理完即可丟棄:
+
+    with item_api.stream_all_items(schema=HTTP.Item.Schemas.GET_ITEM_LIST) as items:
+        total = sum(1 for _ in items)
+    assert_result(items.envelope, HTTP.Common.SUCCESS)
+
+每筆元素以標準函式庫的 `json.JSONDecoder.raw_decode` 解析 (`--json-decoder` 選的 orjson /
+msgspec 只能解碼完整文件，不支援從中途開始解析)。
+"""
+
+import codecs
+import json
+import logging
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+import allure
+import requests
+
+from utils.case_verify_tool import check_structure, verify_value
+from utils.masking import MaskedLog
+from utils.response import decamelize
+
+logger = logging.getLogger(__name__)
+
+# 每次從 socket 讀取的位元組數，也就是解析緩衝區的大約上限
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+# 一個 JSON 值之後可能出現的字元
+_DELIMITERS = _WHITESPACE + ',:]}'
+
+
+class JsonArrayStream:
+    """從位元組串流中逐筆解析 JSON 物件裡某個鍵的陣列
+
+    陣列以外的欄位 (例如 `code`、`msg`) 視為外層資訊，完整解析後放在 `envelope`，
+    陣列在物件中的位置不限。只有陣列的元素是逐筆交出的，其他欄位須能整個放進記憶體。
+    """
+
+    def __init__(self, chunks: Iterable[bytes], array_key: str):
+        """初始化解析器
+
+        Args:
+            chunks: body 的位元組片段 (已解壓縮)，例如 `response.iter_content(CHUNK_SIZE)`。
+            array_key: 要逐筆解析的陣列所在的鍵。
+        """
+        self.array_key = array_key
+        self.envelope: dict[str, Any] = {}
+        # 是否在 body 中找到 `array_key` 且其值為陣列
+        self.array_found = False
+        self._chunks = iter(chunks)
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def __iter__(self) -> Iterator[Any]:
+        """逐筆交出陣列元素，走完後 `envelope` 才完整
+
+        Raises:
+            ValueError: 如果 body 不是 JSON 物件，或 JSON 格式不合法。
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+        else:
+            while True:
+                key = self._value()
+                if not isinstance(key, str):
+                    raise ValueError(f'JSON 物件的鍵應為字串，位置 {self._pos}')
+                self._expect(':')
+                if key == self.array_key and self._peek() == '[':
+                    self.array_found = True
+                    yield from self._array()
+                else:
+                    self.envelope[key] = self._value()
+                if self._separator('}'):
+                    break
+        self._skip_whitespace()
+        if self._pos < len(self._buffer):
+            raise ValueError(f'JSON 文件結尾後還有多餘的內容，位置 {self._pos}')
+
+    def _array(self) -> Iterator[Any]:
+        self._pos += 1
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._separator(']'):
+                return
+
+    def _separator(self, closing: str) -> bool:
+        """消耗一個 ',' 或結尾字元，遇到結尾字元時回傳 True"""
+        char = self._peek()
+        self._pos += 1
+        if char == closing:
+            return True
+        if char != ',':
+            raise ValueError(f"JSON 格式不合法，預期 ',' 或 '{closing}'，實際是 {char!r}，位置 {self._pos - 1}")
+        return False
+
+    def _value(self) -> Any:
+        """從目前位置解析一個完整的 JSON 值，緩衝區不夠時繼續讀取"""
+        self._peek()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # 值之後必定是分隔字元。不是的話代表數字被片段切斷 (例如 '12' 或 '12.' 後面還有位數)，
+            # 要再讀一段重新解析
+            if (end == len(self._buffer) or self._buffer[end] not in _DELIMITERS) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _expect(self, char: str):
+        if self._peek() != char:
+            raise ValueError(f'JSON 格式不合法，預期 {char!r}，位置 {self._pos}')
+        self._pos += 1
+
+    def _peek(self) -> str:
+        """跳過空白並回傳下一個字元 (不消耗)"""
+        self._skip_whitespace()
+        if self._pos >= len(self._buffer):
+            raise ValueError('JSON 在結構完整前就結束了')
+        return self._buffer[self._pos]
+
+    def _skip_whitespace(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill():
+                return
+
+    def _fill(self) -> bool:
+        """讀取下一個片段並丟掉已解析的部分，串流已結束時回傳 False"""
+        if self._eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            text = self._text_decoder.decode(b'', final=True)
+        else:
+            text = self._text_decoder.decode(chunk)
+        self._buffer = self._buffer[self._pos :] + text
+        self._pos = 0
+        return chunk is not None or bool(text)
+
+
+class ListStream:
+    """以串流方式消費清單回應的迭代器，由 `BaseRequest.stream_list` 建立
+
+    迭代時逐筆交出 decamelize 後的元素，提供 schema 時每筆在交出前先驗證結構 (不逐筆開
+    Allure step，數十萬筆的 step 會讓報告無法開啟)。走完後 `envelope` 是其餘欄位的正規化
+    結果 (與 `normalize_response` 相同，只是少了陣列)，並以一個 step 驗證其結構。
+
+    請以 `with` 使用，提前中斷時連線才會被正確關閉。
+    """
+
+    def __init__(self, response: requests.Response, array_key: str = 'data', schema: dict = None):
+        """初始化 ListStream
+
+        Args:
+            response: 以 `stream=True` 取得、尚未讀取 body 的回應。
+            array_key: 要逐筆解析的陣列所在的鍵。
+            schema: 整個回應的 schema (例如 `HTTP.Item.Schemas.GET_ITEM_LIST`)，可選。
+                陣列的元素依 `schema[array_key][0]` 逐筆驗證，其餘欄位於走完後驗證。
+        """
+        self.response = response
+        self.array_key = array_key
+        self.count = 0
+        self._schema = schema
+        self._item_schema = schema[array_key][0] if schema and schema.get(array_key) else None
+        self._parser = JsonArrayStream(response.iter_content(CHUNK_SIZE), array_key)
+        self._envelope = None
+
+    def __iter__(self) -> Iterator[Any]:
+        for raw_item in self._parser:
+            item = decamelize(raw_item)
+            if self._item_schema is not None:
+                verify_value(self._item_schema, f'{self.array_key}[{self.count}]', item)
+            self.count += 1
+            yield item
+        self._finish()
+
+    def __enter__(self) -> 'ListStream':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def envelope(self) -> dict:
+        """陣列以外的欄位，帶有 `status_code`
+
+        Raises:
+            RuntimeError: 如果串流還沒走完。
+        """
+        if self._envelope is None:
+            raise RuntimeError('串流尚未走完，envelope 還不完整')
+        return self._envelope
+
+    def drain(self) -> int:
+        """走完串流但不保留元素 (只需要外層欄位或筆數時使用)
+
+        Returns:
+            元素筆數。
+        """
+        for _ in self:
+            pass
+        return self.count
+
+    def close(self):
+        """關閉回應，歸還或關閉連線"""
+        self.response.close()
+
+    def _finish(self):
+        envelope = {'status_code': self.response.status_code, **decamelize(self._parser.envelope)}
+        logger.info('Response (串流，%s 共 %s 筆) => %s', self.array_key, self.count, MaskedLog(envelope))
+        if self._schema:
+            # 找到陣列時其元素已逐筆驗證過；沒找到時保留該鍵，讓缺少陣列的回應驗證失敗
+            schema = {k: v for k, v in self._schema.items() if not (k == self.array_key and self._parser.array_found)}
+            with allure.step(f'驗證串流回應的結構 ({self.array_key} 共 {self.count} 筆)'):
+                check_structure(envelope, schema)
+        self._envelope = envelope
+        self.close()
@@ -0,0 +1,63 @@
+"""量測事件迴圈的延遲 (loop lag)
+
+迴圈上任何一段同步程式 (例如大型 WS frame 的壓縮與解包) 執行期間，其他 task 都在等待；
+同一個迴圈上有多條 WS 連線時，一條連線的大型訊息就會拖慢所有連線的心跳與收訊。
+`LoopLagMonitor` 在背景每隔 `interval` 秒醒來一次，醒來時比預定晚了多久即為當下的延遲:
+
+    async with LoopLagMonitor() as monitor:
+        ...
+    monitor.stats()  # {'samples': ..., 'p50': ..., 'p95': ..., 'p99': ..., 'max': ...} (毫秒)
+"""
+
+import asyncio
+import time
+
+from utils.http_timing import PERCENTILES, percentile
+
+
+class LoopLagMonitor:
+    """以背景 task 取樣所在事件迴圈的延遲"""
+
+    def __init__(self, interval: float = 0.01):
+        """初始化 LoopLagMonitor
+
+        Args:
+            interval: 取樣間隔 (秒)。越短越能捕捉到短暫的阻塞，但取樣本身也占用迴圈。
+        """
+        self.interval = interval
+        self._samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def __aenter__(self) -> 'LoopLagMonitor':
+        """在目前的事件迴圈上開始取樣"""
+        self._task = asyncio.create_task(self._sample())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        """停止取樣"""
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _sample(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self._samples.append(max(time.perf_counter() - start - self.interval, 0.0))
+
+    def stats(self) -> dict:
+        """回傳延遲的統計
+
+        Returns:
+            包含 samples (取樣數) 與 p50 / p95 / p99 / max (毫秒) 的 dict，沒有取樣時只有 samples。
+        """
+        ordered = sorted(self._samples)
+        if not ordered:
+            return {'samples': 0}
+        return {
+            'samples': len(ordered),
+            **{f'p{p}': round(percentile(ordered, p) * 1000, 3) for p in PERCENTILES},
+            'max': round(ordered[-1] * 1000, 3),
+        }
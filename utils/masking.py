@@ -0,0 +1,134 @@
+"""遮蔽敏感欄位，避免密碼與 token 寫進 log 與 Allure 報告
+
+每個 HTTP 請求都會對 request kwargs、兩組 headers 與整個 response body 做遮蔽，
+大型回應下這是每請求的固定成本，因此這裡的實作以「能不做就不做」為原則:
+
+- 欄位名是否敏感的判斷有快取，同一個鍵只做一次子字串比對
+- 子樹中沒有敏感欄位時原樣回傳，不複製
+- 寫 log 時用 `MaskedLog` 包裝，只有真的輸出時才遮蔽與格式化，且輸出長度有上限
+"""
+
+import functools
+from collections.abc import Mapping
+
+SENSITIVE_KEYS = frozenset({'password', 'token', 'authorization', 'cookie'})
+
+MASK = '***'
+
+# `MaskedLog` 輸出的字元數上限，超過的部分截斷，避免數十萬筆的清單把 log 檔撐爆
+MAX_LOG_CHARS = 10_000
+
+# `MaskedLog` 對每個 list 最多展開的元素數。只截斷字串的話整棵樹仍要先遮蔽、格式化一次，
+# 先限制元素數才能讓大型 body 的成本與大小無關
+MAX_LOG_ITEMS = 100
+
+
+@functools.lru_cache(maxsize=4096)
+def _is_sensitive(key: str) -> bool:
+    """判斷欄位名是否屬於敏感欄位
+
+    用子字串比對而非整鍵比對——測試資料的欄位名有 `initial_password`、
+    `new_password`、`access_token` 這類變體，整鍵比對會漏掉。
+    欄位名的種類有限而出現次數極多，結果以 LRU 快取。
+    """
+    key = key.lower()
+    return any(word in key for word in SENSITIVE_KEYS)
+
+
+def _mask(value, max_items: int | None):
+    """`mask_sensitive` 的實作，多一個限制 list 展開數量的參數 (供 `MaskedLog` 使用)"""
+    if isinstance(value, Mapping):
+        masked_dict = None
+        for index, (k, v) in enumerate(value.items()):
+            new = MASK if isinstance(k, str) and _is_sensitive(k) else _mask(v, max_items)
+            if masked_dict is None and new is not v:
+                # 第一次出現差異時才複製，之前的鍵值原樣搬過去
+                masked_dict = dict(list(value.items())[:index])
+            if masked_dict is not None:
+                masked_dict[k] = new
+        if masked_dict is not None:
+            return masked_dict
+        # requests 的 CaseInsensitiveDict、httpx 的 Headers 等非 dict 的 Mapping 一律轉成 dict，
+        # log 的格式才不會隨函式庫而不同
+        return value if type(value) is dict else dict(value)
+    if isinstance(value, list):
+        items = value if max_items is None or len(value) <= max_items else value[:max_items]
+        masked_list = [_mask(v, max_items) for v in items]
+        if len(items) < len(value):
+            masked_list.append(f'...(其餘 {len(value) - len(items)} 筆略過)')
+            return masked_list
+        return value if all(new is old for new, old in zip(masked_list, value)) else masked_list
+    return value
+
+
+def mask_sensitive(value):
+    """遮蔽敏感欄位的值，避免密碼與 token 寫進 log 與 Allure 附件
+
+    比對 `Mapping` 而非 `dict`，因為 requests 的 headers 是 `CaseInsensitiveDict`，
+    不是 `dict` 的子類別，只比對 `dict` 會讓 Authorization 整包漏掉。
+
+    沒有敏感欄位的子樹會原樣沿用，不複製——回傳值可能與輸入共用物件，呼叫端不可修改。
+
+    Args:
+        value: 任意可能含敏感欄位的資料，dict 與 list 會遞迴處理
+
+    Returns:
+        同結構的資料，敏感欄位的值換成 '***'
+    """
+    return _mask(value, max_items=None)
+
+
+def sensitive_values(value, keys: frozenset[str] = SENSITIVE_KEYS) -> set[str]:
+    """收集敏感欄位遮蔽前的字串值，供檢查遮蔽後的輸出是否仍殘留這些值
+
+    Args:
+        value: 同 `mask_sensitive`。
+        keys: 只收集欄位名含其中任一字的欄位，須為 `SENSITIVE_KEYS` 的子集合。
+
+    Returns:
+        符合的敏感欄位中非空的字串值。
+    """
+    found = set()
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, Mapping):
+            for k, v in item.items():
+                if isinstance(k, str) and _is_sensitive(k):
+                    if isinstance(v, str) and v and v != MASK and any(word in k.lower() for word in keys):
+                        found.add(v)
+                else:
+                    stack.append(v)
+        elif isinstance(item, list):
+            stack.extend(item)
+    return found
+
+
+class MaskedLog:
+    """延後到 log 真的輸出時才遮蔽並格式化的包裝
+
+    logging 只有在紀錄會被輸出時才對參數呼叫 `str()`，因此 log 等級關閉時
+    完全不會付出遮蔽的成本。同一筆紀錄會被多個 handler (console、檔案) 各格式化一次，
+    結果在第一次產生後快取。
+
+        logger.info('Response => %s', MaskedLog(body))
+    """
+
+    __slots__ = ('_value', '_text')
+
+    def __init__(self, value):
+        """包裝要寫進 log 的值
+
+        Args:
+            value: 任意可能含敏感欄位的資料。
+        """
+        self._value = value
+        self._text = None
+
+    def __str__(self) -> str:
+        if self._text is None:
+            text = str(_mask(self._value, max_items=MAX_LOG_ITEMS))
+            if len(text) > MAX_LOG_CHARS:
+                text = f'{text[:MAX_LOG_CHARS]}...(共 {len(text)} 字元，已截斷)'
+            self._text = text
+        return self._text
@@ -0,0 +1,587 @@
+"""在行程內以 asyncio 實作的模擬後端，不需外部的 mock-server 即可跑 API 測試與各項 benchmark
+
+實作 `AuthAPI` / `ItemAPI` 用到的 HTTP 端點與 `OpCode`、`PlayerFlow`、`ItemFlow` 定義的 WebSocket
+協定 (1 byte 壓縮旗標 + msgpack，`data` 為巢狀的 msgpack)，錯誤碼取自
+`test_data/common/expectations.py`，行為以測試案例的預期為準:
+
+- POST /auth/register、POST /auth/login、PUT /user/password (需 Bearer token)
+- GET /items/、GET /items/{id} (帶 ETag / Last-Modified，支援條件式請求)
+- GET /docs: 健康檢查
+- WS /ws?token=...: 連線後先推送一則玩家資訊，之後回應 ping 與 PlayerFlow / ItemFlow 的請求
+
+HTTP 支援 keep-alive、請求 body 的 gzip / deflate / br 解壓縮、依 Accept-Encoding 壓縮回應，
+以及 `transport: http2` 使用的 HTTP/2 (h2c，prior knowledge)；WS 的請求可用 `WsCodec` 認得的任何
+壓縮旗標，回應以 `compression` 編碼。資料全在記憶體中，行程結束即消失。
+
+資料量與延遲可調：`item_count` 決定物品清單的大小，每個回應 (含 pong) 送出前延遲
+`latency` 秒再加上 0 ~ `jitter` 秒的亂數。同一條 WS 連線的回應依請求順序送出，延遲不會讓回應錯序。
+
+pytest 以 `--mock-backend` 在背景執行緒啟動並把 front 服務指向它 (見 conftest.py)；
+其他腳本可用 `scripts/mock_backend.py` 單獨啟動。
+"""
+
+import asyncio
+import gzip
+import hashlib
+import importlib
+import itertools
+import json
+import logging
+import random
+import re
+import secrets
+import threading
+import time
+import zlib
+from collections.abc import Iterable
+from dataclasses import dataclass
+from email.utils import formatdate
+from http import HTTPStatus
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+import h11
+from h2.config import H2Configuration
+from h2.connection import H2Connection
+from h2.events import ConnectionTerminated, DataReceived, RequestReceived, StreamEnded, StreamReset, WindowUpdated
+from websockets.asyncio.server import ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+
+from api.ws_constants import ItemFlow, OpCode, PlayerFlow
+from test_data.common.expectations import HTTP, WebSocket
+from utils.config_loader import Config, ConfigError, User, get_config
+from utils.ws_codec import WsCodec
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ITEM_COUNT = 100
+
+# 沒有 secrets.yml 時使用的測試帳號，涵蓋 API 測試用到的 user key
+DEFAULT_USERS = {
+    'default_user': User(account='mockUser01', password='mockPass01'),
+    'change_password_user': User(account='mockUser02', password='mockPass02'),
+    'duplicate_phone_user': User(account='mockUser03', password='mockPass03', phone='0911000000'),
+}
+
+# expectations.py 沒有定義未授權的情境，沿用 HTTP 狀態碼
+UNAUTHORIZED = {'code': 401, 'status_code': 401}
+INVALID_REQUEST = {'code': 422, 'status_code': 422}
+
+_WS_ERROR_MESSAGES = {
+    WebSocket.User.TELEPHONE_NOT_PROVIDED['error_code']: '未提供手機號碼',
+    WebSocket.User.INVALID_TELEPHONE_FORMAT['error_code']: '手機號碼須為 09 開頭的 10 碼數字',
+    WebSocket.User.TELEPHONE_ALREADY_REGISTERED['error_code']: '手機號碼已被註冊',
+    WebSocket.User.INVALID_USERNAME_FORMAT['error_code']: '名稱須為 3~12 碼中英數字',
+    WebSocket.Item.ITEM_ID_NOT_PROVIDED['error_code']: '未提供 item_id',
+    WebSocket.Item.ITEM_NOT_FOUND['error_code']: '物品不存在',
+}
+
+_ACCOUNT = re.compile(r'[A-Za-z0-9]{5,20}')
+_PASSWORD = re.compile(r'(?=.*[A-Za-z])(?=.*\d)[A-Za-z0-9]{7,20}')
+_USERNAME = re.compile(r'[一-鿿A-Za-z0-9]{3,12}')
+_TELEPHONE = re.compile(r'09\d{8}')
+
+_HTTP2_PREFACE = b'PRI * HTTP/2.0'
+
+# 回應 body 達到此位元組數才依 Accept-Encoding 壓縮
+_COMPRESS_MIN_SIZE = 1024
+
+_RESPONSE_ENCODERS = {'gzip': gzip.compress, 'deflate': zlib.compress}
+_REQUEST_DECODERS = {
+    'gzip': gzip.decompress,
+    'deflate': zlib.decompress,
+    'br': lambda body: importlib.import_module('brotli').decompress(body),
+}
+
+
+def base_config(env: str) -> Config:
+    """回傳模擬後端的基礎設定：有 secrets.yml 時為其中的設定，否則只含 `DEFAULT_USERS`
+
+    Args:
+        env: 環境名稱，須已由 `set_current_env` 設定。
+    """
+    try:
+        return get_config()
+    except ConfigError:
+        return Config(env=env, urls={}, users=DEFAULT_USERS)
+
+
+class _Reply(Exception):
+    """處理請求途中以錯誤回應結束，由 `_handle_http` 轉成回應"""
+
+    def __init__(self, expectation: dict, msg: str):
+        super().__init__(msg)
+        self.expectation = expectation
+        self.msg = msg
+
+
+@dataclass
+class _Player:
+    """一個註冊過的使用者"""
+
+    id: int
+    account: str
+    password: str
+    username: str
+    telephone: str | None = None
+
+    def info(self) -> dict:
+        return {'username': self.username, 'telephone': self.telephone}
+
+
+class MockBackend:
+    """模擬後端，以 async context manager 或 `start_in_thread` 啟動:
+
+        async with MockBackend(item_count=10_000, latency=0.02) as backend:
+            ...
+
+    兩個埠號預設由系統挑選，啟動後由 `base_url` / `ws_base_url` 取得。
+    """
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        http_port: int = 0,
+        ws_port: int = 0,
+        item_count: int = DEFAULT_ITEM_COUNT,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        compression: str = 'gzip',
+        users: Iterable[User] = (),
+        seed: int = 0,
+    ):
+        """初始化模擬後端
+
+        Args:
+            host: 監聽的位址。
+            http_port: HTTP 的埠號，0 表示由系統挑選。
+            ws_port: WebSocket 的埠號，0 表示由系統挑選。
+            item_count: 物品清單的筆數。
+            latency: 每個回應送出前固定延遲的秒數。
+            jitter: 額外延遲的上限 (秒)，每個回應各取 0 ~ jitter 的亂數。
+            compression: WS 回應的壓縮方式，須為 `WS_COMPRESSIONS` 之一。
+            users: 預先註冊的使用者 (例如設定檔中的測試帳號)，不做格式檢查。
+            seed: 延遲亂數的種子，同樣的設定重跑可得到同樣的延遲序列。
+        """
+        self.host = host
+        self.http_port = http_port
+        self.ws_port = ws_port
+        self.latency = latency
+        self.jitter = jitter
+        self.codec = WsCodec(compression)
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._players: dict[str, _Player] = {}
+        self._tokens: dict[str, _Player] = {}
+        self._items = [
+            {'id': i, 'name': f'item-{i}', 'description': f'description of item {i}'} for i in range(1, item_count + 1)
+        ]
+        self._items_by_id = {item['id']: item for item in self._items}
+        self._last_modified = formatdate(time.time(), usegmt=True)
+        for user in users:
+            self._add_player(user.account, user.password, user.phone)
+        self._servers: list = []
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopped: asyncio.Event | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f'http://{self.host}:{self.http_port}'
+
+    @property
+    def ws_base_url(self) -> str:
+        return f'ws://{self.host}:{self.ws_port}/ws'
+
+    async def __aenter__(self) -> 'MockBackend':
+        """在目前的事件迴圈上開始監聽，埠號為 0 時改為實際的埠號"""
+        http_server = await asyncio.start_server(self._serve_http, self.host, self.http_port)
+        ws_server = await serve(
+            self._serve_ws, self.host, self.ws_port, process_request=self._authorize_ws, max_size=None
+        )
+        self._servers = [http_server, ws_server]
+        self.http_port = http_server.sockets[0].getsockname()[1]
+        self.ws_port = ws_server.sockets[0].getsockname()[1]
+        logger.info('模擬後端已啟動: %s、%s', self.base_url, self.ws_base_url)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        """停止監聽並關閉所有連線"""
+        for server in self._servers:
+            server.close()
+        for server in self._servers:
+            await server.wait_closed()
+        logger.info('模擬後端已關閉')
+
+    def start_in_thread(self) -> 'MockBackend':
+        """在背景執行緒的事件迴圈上啟動，監聽開始後才返回，供同步的呼叫端 (例如 pytest hook) 使用"""
+        started = threading.Event()
+        errors: list[BaseException] = []
+
+        async def run():
+            self._loop = asyncio.get_running_loop()
+            self._stopped = asyncio.Event()
+            try:
+                async with self:
+                    started.set()
+                    await self._stopped.wait()
+            except Exception as e:
+                errors.append(e)
+                started.set()
+
+        self._thread = threading.Thread(target=asyncio.run, args=(run(),), name='mock-backend', daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop_thread(self):
+        """停止 `start_in_thread` 啟動的後端並等待執行緒結束"""
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join()
+        self._thread = None
+
+    def config(self, base: Config) -> Config:
+        """回傳把 base 的 front 服務指向此後端的設定，使用者與連線設定沿用 base
+
+        Args:
+            base: 原本的設定，通常來自 `base_config`。
+        """
+        return Config(
+            env=base.env, urls={**base.urls, 'front': self.base_url}, users=base.users, services=base.services
+        )
+
+    # --- 業務邏輯 ---
+
+    def _add_player(self, account: str, password: str, telephone: str | None = None) -> _Player:
+        player = _Player(next(self._ids), account, password, username=account, telephone=telephone)
+        self._players[account] = player
+        return player
+
+    def _issue_token(self, player: _Player) -> str:
+        token = secrets.token_urlsafe(24)
+        self._tokens[token] = player
+        return token
+
+    def _register(self, body: dict) -> tuple[dict, Any]:
+        account, password = body.get('account'), body.get('password')
+        if not isinstance(account, str) or not _ACCOUNT.fullmatch(account):
+            raise _Reply(HTTP.Auth.Validation.ACCOUNT_FORMAT_ERROR, '帳號須為 5~20 碼英數字')
+        if not isinstance(password, str) or not _PASSWORD.fullmatch(password):
+            raise _Reply(HTTP.Auth.Validation.PASSWORD_FORMAT_ERROR, '密碼須為 7~20 碼且同時包含英文與數字')
+        if account in self._players:
+            raise _Reply(HTTP.Auth.Register.REPEATED_ACCOUNT, '帳號已存在')
+        player = self._add_player(account, password)
+        return HTTP.Auth.Register.SUCCESS, {
+            'account': account,
+            'username': player.username,
+            'telephone': None,
+            'id': player.id,
+        }
+
+    def _login(self, body: dict) -> tuple[dict, Any]:
+        player = self._players.get(body.get('account'))
+        if player is None:
+            raise _Reply(HTTP.Auth.Login.ACCOUNT_ERROR, '帳號不存在')
+        if body.get('password') != player.password:
+            raise _Reply(HTTP.Auth.Login.PASSWORD_ERROR, '密碼錯誤')
+        token = self._issue_token(player)
+        data = {'access_token': token, 'ws_url': f'{self.ws_base_url}?token={token}', 'player_info': player.info()}
+        return HTTP.Common.SUCCESS, data
+
+    def _change_password(self, player: _Player, body: dict) -> tuple[dict, Any]:
+        if body.get('old_password') != player.password:
+            raise _Reply(HTTP.Auth.Login.PASSWORD_ERROR, '舊密碼錯誤')
+        new_password = body.get('new_password')
+        if not isinstance(new_password, str) or not _PASSWORD.fullmatch(new_password):
+            raise _Reply(HTTP.Auth.Validation.PASSWORD_FORMAT_ERROR, '密碼須為 7~20 碼且同時包含英文與數字')
+        player.password = new_password
+        return HTTP.Common.SUCCESS, None
+
+    def _get_item(self, item_id: str) -> tuple[dict, Any]:
+        item = self._items_by_id.get(int(item_id)) if item_id.isdigit() else None
+        if item is None:
+            raise _Reply(HTTP.Item.GetItem.NOT_FOUND, '物品不存在')
+        return HTTP.Common.SUCCESS, item
+
+    def _player_flow(self, player: _Player, sub_code: int, data: dict) -> tuple[dict, Any]:
+        """處理 PlayerFlow 的請求，回傳 (錯誤碼的預期結果, 回應的 data)"""
+        if sub_code == PlayerFlow.UpdateName.value:
+            name = data.get('name')
+            if not isinstance(name, str) or not _USERNAME.fullmatch(name):
+                return WebSocket.User.INVALID_USERNAME_FORMAT, None
+            player.username = name
+        elif sub_code == PlayerFlow.BindPhone.value:
+            telephone = data.get('telephone')
+            if not telephone:
+                return WebSocket.User.TELEPHONE_NOT_PROVIDED, None
+            if not isinstance(telephone, str) or not _TELEPHONE.fullmatch(telephone):
+                return WebSocket.User.INVALID_TELEPHONE_FORMAT, None
+            if any(other.telephone == telephone and other is not player for other in self._players.values()):
+                return WebSocket.User.TELEPHONE_ALREADY_REGISTERED, None
+            player.telephone = telephone
+        return WebSocket.Common.SUCCESS, player.info()
+
+    def _item_flow(self, sub_code: int, data: dict) -> tuple[dict, Any]:
+        """處理 ItemFlow 的請求，回傳 (錯誤碼的預期結果, 回應的 data)"""
+        if sub_code == ItemFlow.GetAllItems.value:
+            return WebSocket.Common.SUCCESS, self._items
+        item_id = data.get('item_id')
+        if item_id is None:
+            return WebSocket.Item.ITEM_ID_NOT_PROVIDED, None
+        item = self._items_by_id.get(item_id)
+        if item is None:
+            return WebSocket.Item.ITEM_NOT_FOUND, None
+        return WebSocket.Common.SUCCESS, item
+
+    def _delay(self) -> float:
+        return self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    # --- HTTP ---
+
+    async def _handle_http(self, method: str, target: str, headers: dict[str, str], body: bytes):
+        """處理一個 HTTP 請求
+
+        Args:
+            method: 請求方法。
+            target: 請求的路徑 (含 query)。
+            headers: 請求 headers，名稱為小寫。
+            body: 請求 body，尚未解壓縮。
+
+        Returns:
+            (狀態碼, 回應 headers, 回應 body)。
+        """
+        path = urlsplit(target).path
+        response_headers = [('content-type', 'application/json')]
+        try:
+            if method == 'GET' and path == '/docs':
+                return 200, [('content-type', 'text/html')], b'<html><body>mock backend</body></html>'
+            if method == 'POST' and path == '/auth/register':
+                expectation, data = self._register(self._json_body(headers, body))
+            elif method == 'POST' and path == '/auth/login':
+                expectation, data = self._login(self._json_body(headers, body))
+            elif method == 'PUT' and path == '/user/password':
+                player = self._authorize_http(headers)
+                expectation, data = self._change_password(player, self._json_body(headers, body))
+            elif method == 'GET' and path.startswith('/items/'):
+                item_id = path.removeprefix('/items/')
+                expectation, data = (HTTP.Common.SUCCESS, self._items) if not item_id else self._get_item(item_id)
+                etag = f'"{hashlib.sha1(path.encode()).hexdigest()}"'
+                response_headers += [('etag', etag), ('last-modified', self._last_modified)]
+                if headers.get('if-none-match') == etag:
+                    return 304, response_headers[1:], b''
+            else:
+                return 404, response_headers, self._json({'code': 404, 'msg': 'Not Found', 'data': None})
+            content = {'code': expectation['code'], 'msg': 'success', 'data': data}
+        except _Reply as e:
+            expectation = e.expectation
+            content = {'code': expectation['code'], 'msg': e.msg, 'data': None}
+        payload = self._json(content)
+        encoding = self._response_encoding(headers.get('accept-encoding', ''))
+        if encoding and len(payload) >= _COMPRESS_MIN_SIZE:
+            payload = _RESPONSE_ENCODERS[encoding](payload)
+            response_headers.append(('content-encoding', encoding))
+        return expectation['status_code'], response_headers, payload
+
+    def _authorize_http(self, headers: dict[str, str]) -> _Player:
+        scheme, _, token = headers.get('authorization', '').partition(' ')
+        player = self._tokens.get(token) if scheme.lower() == 'bearer' else None
+        if player is None:
+            raise _Reply(UNAUTHORIZED, '未授權')
+        return player
+
+    @staticmethod
+    def _json_body(headers: dict[str, str], body: bytes) -> dict:
+        encoding = headers.get('content-encoding', 'identity')
+        try:
+            if encoding != 'identity':
+                body = _REQUEST_DECODERS[encoding](body)
+            content = json.loads(body)
+        except (KeyError, ValueError, OSError, zlib.error, ImportError):
+            raise _Reply(INVALID_REQUEST, f'無法解析的請求 body (content-encoding: {encoding})') from None
+        if not isinstance(content, dict):
+            raise _Reply(INVALID_REQUEST, '請求 body 應為 JSON 物件')
+        return content
+
+    @staticmethod
+    def _json(content: dict) -> bytes:
+        return json.dumps(content, ensure_ascii=False, separators=(',', ':')).encode()
+
+    @staticmethod
+    def _response_encoding(accept_encoding: str) -> str | None:
+        accepted = {token.split(';')[0].strip() for token in accept_encoding.split(',')}
+        return next((encoding for encoding in _RESPONSE_ENCODERS if encoding in accepted), None)
+
+    async def _serve_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """處理一條 HTTP 連線：開頭是 HTTP/2 preface 時改走 `_serve_h2`，否則以 h11 處理 HTTP/1.1"""
+        try:
+            initial = await reader.read(65536)
+            if initial.startswith(_HTTP2_PREFACE):
+                await self._serve_h2(reader, writer, initial)
+            else:
+                await self._serve_h11(reader, writer, initial)
+        except (ConnectionError, h11.ProtocolError) as e:
+            logger.debug('HTTP 連線中斷: %r', e)
+        finally:
+            writer.close()
+
+    async def _serve_h11(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, initial: bytes):
+        connection = h11.Connection(h11.SERVER)
+        connection.receive_data(initial)
+        while True:
+            request = None
+            body = bytearray()
+            while True:
+                event = connection.next_event()
+                if event is h11.NEED_DATA:
+                    connection.receive_data(await reader.read(65536))
+                elif isinstance(event, h11.Request):
+                    request = event
+                elif isinstance(event, h11.Data):
+                    body += event.data
+                elif isinstance(event, (h11.EndOfMessage, h11.ConnectionClosed)):
+                    break
+            if request is None:
+                return
+            headers = {name.decode().lower(): value.decode() for name, value in request.headers}
+            status, response_headers, payload = await self._respond_http(
+                request.method.decode(), request.target.decode(), headers, bytes(body)
+            )
+            response_headers = [*response_headers, ('content-length', str(len(payload)))]
+            writer.write(connection.send(h11.Response(status_code=status, headers=response_headers)))
+            writer.write(connection.send(h11.Data(data=payload)) + connection.send(h11.EndOfMessage()))
+            await writer.drain()
+            if connection.our_state is h11.MUST_CLOSE:
+                return
+            connection.start_next_cycle()
+
+    async def _serve_h2(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, initial: bytes):
+        connection = H2Connection(config=H2Configuration(client_side=False, header_encoding='utf-8'))
+        connection.initiate_connection()
+        requests: dict[int, tuple[dict[str, str], bytearray]] = {}
+        window_updated = asyncio.Event()
+        tasks: set[asyncio.Task] = set()
+
+        async def respond(stream_id: int, headers: dict[str, str], body: bytes):
+            status, response_headers, payload = await self._respond_http(
+                headers[':method'], headers[':path'], headers, body
+            )
+            connection.send_headers(
+                stream_id, [(':status', str(status)), *response_headers, ('content-length', str(len(payload)))]
+            )
+            view = memoryview(payload)
+            while view:
+                size = min(connection.local_flow_control_window(stream_id), connection.max_outbound_frame_size)
+                if size <= 0:
+                    window_updated.clear()
+                    writer.write(connection.data_to_send())
+                    await window_updated.wait()
+                    continue
+                connection.send_data(stream_id, view[:size].tobytes())
+                view = view[size:]
+            connection.end_stream(stream_id)
+            writer.write(connection.data_to_send())
+            await writer.drain()
+
+        data = initial
+        try:
+            while data:
+                for event in connection.receive_data(data):
+                    if isinstance(event, RequestReceived):
+                        requests[event.stream_id] = (
+                            {name.lower(): value for name, value in event.headers},
+                            bytearray(),
+                        )
+                    elif isinstance(event, DataReceived):
+                        requests[event.stream_id][1].extend(event.data)
+                        connection.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                    elif isinstance(event, StreamEnded):
+                        headers, body = requests.pop(event.stream_id)
+                        task = asyncio.create_task(respond(event.stream_id, headers, bytes(body)))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                    elif isinstance(event, StreamReset):
+                        requests.pop(event.stream_id, None)
+                    elif isinstance(event, WindowUpdated):
+                        window_updated.set()
+                    elif isinstance(event, ConnectionTerminated):
+                        return
+                writer.write(connection.data_to_send())
+                await writer.drain()
+                data = await reader.read(65536)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _respond_http(self, method: str, target: str, headers: dict[str, str], body: bytes):
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return await self._handle_http(method, target, headers, body)
+
+    # --- WebSocket ---
+
+    def _authorize_ws(self, connection: ServerConnection, request):
+        """交握時以 query 中的 token 識別使用者，無效時拒絕連線"""
+        token = parse_qs(urlsplit(request.path).query).get('token', [''])[0]
+        if urlsplit(request.path).path != '/ws' or token not in self._tokens:
+            return connection.respond(HTTPStatus.UNAUTHORIZED, '無效的 token\n')
+        return None
+
+    async def _serve_ws(self, connection: ServerConnection):
+        """處理一條 WebSocket 連線
+
+        回應排進佇列，由另一個 task 依序在預定時間送出：請求本身立即處理，延遲只作用在送出。
+        """
+        token = parse_qs(urlsplit(connection.request.path).query)['token'][0]
+        player = self._tokens[token]
+        outbox: asyncio.Queue[tuple[float, bytes]] = asyncio.Queue()
+        deliver_at = 0.0
+
+        def reply(op_code: OpCode, sub_code: int | None, expectation: dict | None, data: Any):
+            nonlocal deliver_at
+            message = {'op_code': op_code.value}
+            if expectation is not None:
+                error_code = expectation['error_code']
+                message.update(
+                    sub_code=sub_code,
+                    success=error_code == 0,
+                    error_code=error_code,
+                    error_msg=_WS_ERROR_MESSAGES.get(error_code, ''),
+                    data=data,
+                )
+            deliver_at = max(deliver_at, time.monotonic() + self._delay())
+            outbox.put_nowait((deliver_at, self.codec.encode(message)))
+
+        async def send_replies():
+            while True:
+                at, frame = await outbox.get()
+                delay = at - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await connection.send(frame)
+
+        sender = asyncio.create_task(send_replies())
+        try:
+            reply(OpCode.S2CPlayerFlow, PlayerFlow.GetPlayerInfo.value, WebSocket.Common.SUCCESS, player.info())
+            async for frame in connection:
+                if isinstance(frame, str):
+                    continue
+                message = self.codec.decode(frame)
+                op_code, sub_code = message.get('op_code'), message.get('sub_code')
+                data = message.get('data') or {}
+                if op_code == OpCode.C2SPing.value:
+                    reply(OpCode.S2CPong, None, None, None)
+                elif op_code == OpCode.C2SPlayerFlow.value:
+                    reply(OpCode.S2CPlayerFlow, sub_code, *self._player_flow(player, sub_code, data))
+                elif op_code == OpCode.C2SItemFlow.value:
+                    reply(OpCode.S2CItemFlow, sub_code, *self._item_flow(sub_code, data))
+                else:
+                    logger.warning('未知的 WS 請求: %s', message)
+        except ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
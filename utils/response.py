@@ -1,28 +1,74 @@
-"""提供 API 回應的正規化函式"""
+"""提供 API 回應的解碼與正規化函式"""
 
-from typing import Union
+import functools
+from typing import Any, Union
 
+import httpx
 import humps
 import requests
-from requests import Response
 
+from utils.json_codec import json_loads
 
-def normalize_response(response: Union[Response, dict]) -> dict:
+# `decode_body` 表示 body 不是合法 JSON 的回傳值。不能用 None——body 本身可能就是 JSON 的 null
+NOT_JSON = object()
+
+# `normalize_response` 的 body 參數未提供時的預設值，與 `NOT_JSON` 區分「沒解碼過」與「解碼失敗」
+_UNDECODED = object()
+
+
+@functools.lru_cache(maxsize=4096)
+def _decamelize_key(key: str) -> str:
+    return humps.decamelize(key)
+
+
+def decamelize(value: Any) -> Any:
+    """把 dict 的鍵 (含巢狀) 從 camelCase 轉為 snake_case，結果與 `humps.decamelize` 相同
+
+    大型清單中同樣的鍵會出現數十萬次，`humps` 每次都重跑正規表示式，這裡以鍵為單位快取。
+    """
+    if isinstance(value, dict):
+        return {(_decamelize_key(k) if isinstance(k, str) else k): decamelize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [decamelize(item) for item in value]
+    return value
+
+
+def decode_body(response: Union[requests.Response, httpx.Response]) -> Any:
+    """以目前選用的 JSON 解碼器解碼回應 body
+
+    每個回應只應解碼一次，結果同時交給日誌與 `normalize_response` 使用。
+
+    Args:
+        response: `requests.Response` 或 `httpx.Response` 物件。
+
+    Returns:
+        解碼後的 body；不是合法 JSON (含空 body) 時回傳 `NOT_JSON`。
+    """
+    try:
+        return json_loads(response.content)
+    except ValueError:
+        return NOT_JSON
+
+
+def normalize_response(response: Union[requests.Response, httpx.Response, dict], body: Any = _UNDECODED) -> dict:
     """將 API 回應轉為格式統一的字典，並把 camelCase 的鍵轉為 snake_case
 
     Args:
-        response: 原始的 API 回應，可以是 `requests.Response` 物件或已解析的字典。
+        response: 原始的 API 回應，可以是 `requests.Response`、`httpx.Response` 物件或已解析的字典。
+        body: `decode_body` 的結果。已解碼過時傳入以免重複解碼，未提供時才在此解碼。
 
     Returns:
         標準化後的字典。輸入是 `Response` 時會額外帶入 `status_code`；
-        body 不是合法 JSON 時，原始文字放在 `response_text`。
+        body 不是 JSON 物件時，原始文字放在 `response_text`。
     """
-    if not isinstance(response, requests.models.Response):
-        return humps.decamelize(response)
+    if not isinstance(response, (requests.Response, httpx.Response)):
+        return decamelize(response)
 
+    if body is _UNDECODED:
+        body = decode_body(response)
     result = {'status_code': response.status_code}
-    try:
-        result.update(humps.decamelize(response.json()))
-    except ValueError:
+    if isinstance(body, dict):
+        result.update(decamelize(body))
+    else:
         result['response_text'] = response.text
     return result
@@ -0,0 +1,296 @@
+"""WebSocket 訊息的編解碼
+
+線路格式：1 byte 的旗標加上 msgpack 的外層 `{op_code, sub_code, data}`，外層達到門檻時整段以
+旗標所代表的方式壓縮；`data` 本身是另一段 msgpack (以 bin 型別放在外層中)。
+
+旗標對應的壓縮方式見 `COMPRESSION_FLAGS`，送出時用哪一種由每條連線的 `WsCodec` 決定，
+收到時則依旗標解壓縮，不論自己送出時用哪一種:
+
+- none: 不壓縮
+- gzip: 原本協定中唯一的壓縮方式
+- deflate: 裸 deflate 串流 (RFC 1951)，比 gzip 少 18 bytes 的 header 與 trailer
+- zstd: 比 gzip 快數倍，壓縮率相近
+- zstd-dict: 以錄下的流量訓練的字典 (見 `train_dictionary`) 壓縮，小型訊息也能壓得動，
+  雙方須使用同一份字典
+
+zstd 為選用套件，需自行安裝:
+
+    uv pip install zstandard
+
+每則訊息都要編解碼，大型清單回應下這是 WS 收發的主要 CPU 成本，因此 `WsCodec`:
+
+- 重用同一個 `msgpack.Packer` 與壓縮器，不為每則訊息重新建立
+- 解碼大型 frame 時以 `memoryview` 切掉旗標，不複製整個 frame；小型 frame 建立 memoryview 的成本
+  比複製還高，直接切片 (見 `MEMORYVIEW_THRESHOLD`)
+- 不修改呼叫端傳入的 dict
+
+大型 frame 的 (解) 壓縮會占住事件迴圈數毫秒，同一個迴圈上其他連線的心跳與收訊都跟著停擺。
+`AsyncBaseWS` 因此改用 `encode_async` / `decode_async`：達到 `offload_threshold` 的 frame 交給
+執行緒池 (解) 壓縮，zlib 與 zstd 執行時會釋放 GIL，迴圈得以繼續；小型 frame 交給執行緒的成本
+比 (解) 壓縮本身還高，仍在迴圈上直接處理。`scripts/bench_ws_offload.py` 比較兩者的迴圈延遲。
+
+`scripts/bench_ws_codec.py` 比較本實作與原本逐次 `packb` / 切片複製的做法，
+`scripts/bench_ws_compression.py` 比較各壓縮方式的壓縮率與耗時。
+"""
+
+import asyncio
+import importlib
+import threading
+import zlib
+from collections.abc import Callable, Iterable
+from concurrent.futures import Executor
+
+import msgpack
+
+# 壓縮方式 -> 旗標 byte。旗標是協定的一部分，只能新增，不能改號
+COMPRESSION_FLAGS = {'none': 0x00, 'gzip': 0x01, 'deflate': 0x02, 'zstd': 0x03, 'zstd-dict': 0x04}
+
+WS_COMPRESSIONS = tuple(COMPRESSION_FLAGS)
+
+# 外層達到此位元組數時壓縮
+DEFAULT_THRESHOLD = 250
+
+# 各壓縮方式未指定等級時的壓縮等級，gzip 與 `gzip.compress` 的預設值相同
+DEFAULT_LEVELS = {'gzip': 9, 'deflate': 6, 'zstd': 3, 'zstd-dict': 3}
+
+# (解) 壓縮的輸入達到此位元組數時交給執行緒池，見模組說明
+DEFAULT_OFFLOAD_THRESHOLD = 32 * 1024
+
+# frame 達到此位元組數時才以 memoryview 切掉旗標，更小的 frame 直接切片複製 (`frame[1:]`)：
+# 複製幾十 bytes 比建立 memoryview、再讓 msgpack 透過 buffer protocol 讀取還快
+MEMORYVIEW_THRESHOLD = 4 * 1024
+
+# `train_dictionary` 預設的字典大小
+DEFAULT_DICTIONARY_SIZE = 16 * 1024
+
+_Compressor = Callable[[bytes], bytes]
+_Decompressor = Callable[[bytes | memoryview], bytes]
+
+
+def _gzip(level: int, dictionary: bytes | None) -> tuple[_Compressor, _Decompressor]:
+    # wbits=31 為 gzip 格式 (header + trailer)，與 `gzip.compress` / `gzip.decompress` 相容
+    return (lambda data: zlib.compress(data, level, wbits=31), lambda data: zlib.decompress(data, wbits=31))
+
+
+def _deflate(level: int, dictionary: bytes | None) -> tuple[_Compressor, _Decompressor]:
+    # 負的 wbits 為裸 deflate 串流，沒有 header 與 checksum
+    return (lambda data: zlib.compress(data, level, wbits=-15), lambda data: zlib.decompress(data, wbits=-15))
+
+
+def _zstandard(level: int, dictionary: bytes | None) -> tuple[_Compressor, _Decompressor]:
+    zstandard = importlib.import_module('zstandard')
+    dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary is not None else None
+    # zstd 的壓縮器不是執行緒安全的，而大型 frame 會在執行緒池中 (解) 壓縮，因此每個執行緒各建一組
+    local = threading.local()
+
+    def compress(data: bytes) -> bytes:
+        if not hasattr(local, 'compressor'):
+            local.compressor = zstandard.ZstdCompressor(level=level, dict_data=dict_data)
+        return local.compressor.compress(data)
+
+    def decompress(data: bytes | memoryview) -> bytes:
+        if not hasattr(local, 'decompressor'):
+            local.decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+        # `decompress` 要求 frame 帶有內容大小，對方不一定會寫，串流解壓縮則沒有此限制
+        return local.decompressor.decompressobj().decompress(data)
+
+    return compress, decompress
+
+
+def _zstd(level: int, dictionary: bytes | None) -> tuple[_Compressor, _Decompressor]:
+    # 字典只用於 'zstd-dict'，否則對方沒有同一份字典時無法解壓縮
+    return _zstandard(level, None)
+
+
+def _zstd_dict(level: int, dictionary: bytes | None) -> tuple[_Compressor, _Decompressor]:
+    if dictionary is None:
+        raise ValueError("壓縮方式 'zstd-dict' 需要提供 dictionary (見 `train_dictionary`)")
+    return _zstandard(level, dictionary)
+
+
+# 壓縮方式 -> 以 (壓縮等級, 字典) 建立 (壓縮函式, 解壓縮函式) 的建構器。
+# 建構器延後到用到時才執行，未安裝的選用套件不影響其他壓縮方式
+_COMPRESSION_FACTORIES: dict[str, Callable[[int, bytes | None], tuple[_Compressor, _Decompressor]]] = {
+    'gzip': _gzip,
+    'deflate': _deflate,
+    'zstd': _zstd,
+    'zstd-dict': _zstd_dict,
+}
+
+_COMPRESSION_BY_FLAG = {flag: name for name, flag in COMPRESSION_FLAGS.items()}
+
+
+def _build(compression: str, level: int | None, dictionary: bytes | None) -> tuple[_Compressor, _Decompressor]:
+    """建立指定壓縮方式的壓縮與解壓縮函式
+
+    Raises:
+        ValueError: 如果 'zstd-dict' 沒有提供 dictionary。
+        ImportError: 如果該壓縮方式需要的套件未安裝。
+    """
+    try:
+        return _COMPRESSION_FACTORIES[compression](DEFAULT_LEVELS[compression] if level is None else level, dictionary)
+    except ImportError as e:
+        raise ImportError(f"WS 壓縮方式 '{compression}' 需要先安裝對應的套件: uv pip install zstandard") from e
+
+
+class WsCodec:
+    """WebSocket 訊息的編碼器與解碼器
+
+    內部的 `Packer` 不是執行緒安全的，一個 codec 只應在一個執行緒 (事件迴圈) 中使用，每條連線
+    各自建立一個；(解) 壓縮函式則是執行緒安全的，可以交給執行緒池。
+    """
+
+    def __init__(
+        self,
+        compression: str = 'gzip',
+        threshold: int = DEFAULT_THRESHOLD,
+        compress_level: int | None = None,
+        dictionary: bytes | None = None,
+        offload_threshold: int | None = DEFAULT_OFFLOAD_THRESHOLD,
+        executor: Executor | None = None,
+    ):
+        """初始化 WsCodec
+
+        Args:
+            compression: 送出時的壓縮方式，須為 `WS_COMPRESSIONS` 之一。伺服器須認得對應的旗標。
+            threshold: 外層 msgpack 達到此位元組數時才壓縮。zstd-dict 對小型訊息也有效，可調低。
+            compress_level: 壓縮等級，gzip / deflate 為 0-9、zstd 為 1-22，越高越小也越慢。
+                未提供時使用 `DEFAULT_LEVELS`。
+            dictionary: zstd 字典 (見 `train_dictionary`)。'zstd-dict' 必須提供，解碼對方以字典
+                壓縮的訊息時也會用到。
+            offload_threshold: `encode_async` / `decode_async` 在 (解) 壓縮的輸入 (壓縮前的外層或
+                收到的壓縮 frame) 達到此位元組數時交給執行緒池，None 表示一律在事件迴圈上處理。
+            executor: 執行 (解) 壓縮的執行緒池，未提供時使用事件迴圈預設的執行緒池。
+
+        Raises:
+            ValueError: 如果 compression 不在 `WS_COMPRESSIONS` 中，或 'zstd-dict' 沒有提供 dictionary。
+            ImportError: 如果該壓縮方式需要的套件未安裝。
+        """
+        if compression not in COMPRESSION_FLAGS:
+            raise ValueError(f"未知的 WS 壓縮方式 '{compression}'，可用的有: {WS_COMPRESSIONS}")
+        self.compression = compression
+        self.threshold = threshold
+        self.compress_level = compress_level
+        self.dictionary = dictionary
+        self.offload_threshold = offload_threshold
+        self.executor = executor
+        self._packer = msgpack.Packer()
+        self._flag = bytes([COMPRESSION_FLAGS[compression]])
+        self._compress = None
+        # 旗標 -> 解壓縮函式，收到其他旗標時才建立
+        self._decompressors: dict[int, _Decompressor] = {}
+        if compression != 'none':
+            self._compress, self._decompressors[COMPRESSION_FLAGS[compression]] = _build(
+                compression, compress_level, dictionary
+            )
+
+    def encode(self, message: dict) -> bytes:
+        """把訊息編碼成 WebSocket frame
+
+        Args:
+            message: 含 op_code、sub_code 與 data 的訊息，不會被修改。
+
+        Returns:
+            加上旗標、達到門檻時壓縮過的位元組。
+        """
+        payload = self._pack(message)
+        if self._compress is not None and len(payload) >= self.threshold:
+            return self._flag + self._compress(payload)
+        return b'\x00' + payload
+
+    async def encode_async(self, message: dict) -> bytes:
+        """同 `encode`，大型訊息的壓縮交給執行緒池"""
+        payload = self._pack(message)
+        if self._compress is None or len(payload) < self.threshold:
+            return b'\x00' + payload
+        if self._should_offload(payload):
+            return self._flag + await asyncio.get_running_loop().run_in_executor(self.executor, self._compress, payload)
+        return self._flag + self._compress(payload)
+
+    def decode(self, frame: bytes) -> dict:
+        """把 WebSocket frame 解碼成訊息
+
+        Args:
+            frame: 從 WebSocket 收到的原始位元組，旗標可以是 `COMPRESSION_FLAGS` 中的任一個。
+
+        Returns:
+            解壓縮並解包後的 dict，`data` 已展開。
+
+        Raises:
+            ValueError: 如果旗標未知，或以字典壓縮的訊息但此 codec 沒有字典。
+            ImportError: 如果該旗標的壓縮方式需要的套件未安裝。
+        """
+        # 與 `payload` 相同，但不多一層呼叫：小型 frame 的解碼只要零點幾微秒，呼叫本身就占了可觀的比例
+        payload = memoryview(frame)[1:] if len(frame) >= MEMORYVIEW_THRESHOLD else frame[1:]
+        if frame[0] != 0x00:
+            payload = self._decompressor(frame[0])(payload)
+        return self._unpack(payload)
+
+    async def decode_async(self, frame: bytes) -> dict:
+        """同 `decode`，大型 frame 的解壓縮交給執行緒池"""
+        if frame[0] == 0x00 or not self._should_offload(frame):
+            return self.decode(frame)
+        decompress = self._decompressor(frame[0])
+        payload = await asyncio.get_running_loop().run_in_executor(self.executor, decompress, memoryview(frame)[1:])
+        return self._unpack(payload)
+
+    def payload(self, frame: bytes) -> bytes | memoryview:
+        """取出 frame 中解壓縮後的外層 msgpack，錯誤同 `decode`"""
+        flag = frame[0]
+        payload = memoryview(frame)[1:] if len(frame) >= MEMORYVIEW_THRESHOLD else frame[1:]
+        if flag == 0x00:
+            return payload
+        return self._decompressor(flag)(payload)
+
+    def _pack(self, message: dict) -> bytes:
+        data = message.get('data')
+        if data is not None:
+            message = {**message, 'data': self._packer.pack(data)}
+        return self._packer.pack(message)
+
+    @staticmethod
+    def _unpack(payload: bytes | memoryview) -> dict:
+        message = msgpack.unpackb(payload)
+        if isinstance(message.get('data'), bytes):
+            message['data'] = msgpack.unpackb(message['data'])
+        return message
+
+    def _should_offload(self, data: bytes) -> bool:
+        return self.offload_threshold is not None and len(data) >= self.offload_threshold
+
+    def _decompressor(self, flag: int) -> _Decompressor:
+        decompress = self._decompressors.get(flag)
+        if decompress is None:
+            compression = _COMPRESSION_BY_FLAG.get(flag)
+            if compression is None:
+                raise ValueError(f'未知的 WS 壓縮旗標 {flag:#04x}')
+            _, decompress = _build(compression, None, self.dictionary)
+            self._decompressors[flag] = decompress
+        return decompress
+
+
+def train_dictionary(frames: Iterable[bytes], size: int = DEFAULT_DICTIONARY_SIZE) -> bytes:
+    """以錄下的 WebSocket 流量訓練 'zstd-dict' 用的字典
+
+    訓練出的字典存成檔案後，雙方以同一份字典建立 codec:
+
+        codec = WsCodec('zstd-dict', threshold=32, dictionary=Path('ws.dict').read_bytes())
+
+    Args:
+        frames: 收送過的原始 frame (任何未以字典壓縮的旗標皆可)，越接近實際流量越好，建議數百則以上。
+        size: 字典的最大位元組數。
+
+    Returns:
+        字典的內容。
+
+    Raises:
+        ImportError: 如果 zstandard 未安裝。
+        zstandard.ZstdError: 如果樣本太少或太小而無法訓練。
+    """
+    try:
+        zstandard = importlib.import_module('zstandard')
+    except ImportError as e:
+        raise ImportError('訓練 WS 壓縮字典需要先安裝對應的套件: uv pip install zstandard') from e
+    codec = WsCodec('none')
+    samples = [bytes(codec.payload(frame)) for frame in frames]
+    return zstandard.train_dictionary(size, samples).as_bytes()
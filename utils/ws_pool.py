@@ -0,0 +1,169 @@
+"""依使用者重用已登入的 WebSocket 連線
+
+每個 WS 測試原本都要 HTTP 登入、WS 交握、等待初始訊息，結束後再整個拆掉，這些步驟占了
+`testcases/api_test/ws` 大部分的時間。`WsPool` 讓連線在測試之間重用:
+
+- 以 `User` 為 key，同一使用者的連線才會被重用，身分不會錯置
+- 取出時先丟棄上個測試殘留的訊息，再以 ping 確認連線仍可用，不可用的直接關閉並另開
+- 還有逾時請求的回應未到的連線不重用，測試失敗的連線由呼叫端以 `discard` 標記，不歸還
+- 閒置超過 `idle_timeout` 或建立超過 `max_lifetime` 的連線不再重用
+
+連線綁定在建立它的事件迴圈上，因此 pool 與使用它的測試必須跑在同一個 loop_scope。
+"""
+
+import logging
+import time
+from collections import defaultdict, deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+
+from utils.async_base_ws import AsyncBaseWS
+from utils.config_loader import User
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Connection:
+    """pool 中的一條連線"""
+
+    ws: AsyncBaseWS
+    stack: AsyncExitStack
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class WsPool:
+    """依 `User` 管理可重用的 `AsyncBaseWS` 連線
+
+    只在單一事件迴圈中使用，不需要鎖。
+    """
+
+    def __init__(
+        self,
+        ws_url_for: Callable[[User], Awaitable[str]],
+        idle_timeout: float = 60,
+        max_lifetime: float = 300,
+        ping_timeout: float = 5,
+    ):
+        """初始化 WsPool
+
+        Args:
+            ws_url_for: 以使用者登入並回傳 WebSocket URL 的函式，每開一條新連線呼叫一次。
+            idle_timeout: 連線歸還後閒置超過此秒數就不再重用。
+            max_lifetime: 連線建立超過此秒數就不再重用。
+            ping_timeout: 取出時健康檢查等待 pong 的秒數。
+        """
+        self._ws_url_for = ws_url_for
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.ping_timeout = ping_timeout
+        self._idle: defaultdict[User, deque[_Connection]] = defaultdict(deque)
+        self._discarded: set[AsyncBaseWS] = set()
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'expired': 0,
+            'unhealthy': 0,
+            'discarded': 0,
+            'drained_messages': 0,
+        }
+
+    @asynccontextmanager
+    async def connection(self, user: User, fresh: bool = False) -> AsyncIterator[AsyncBaseWS]:
+        """取出一條連線，區塊結束時歸還
+
+        區塊中拋出例外或連線被 `discard` 標記時，連線的狀態不明，直接關閉而不歸還。
+
+        Args:
+            user: 連線所屬的使用者。
+            fresh: 是否一律開新連線 (例如要比對連線時收到的初始訊息)，用完一樣歸還。
+
+        Yields:
+            已連線的 `AsyncBaseWS`。
+        """
+        connection = None if fresh else await self._reuse(user)
+        if connection is None:
+            connection = await self._open(user)
+        try:
+            yield connection.ws
+        except BaseException:
+            self._discarded.discard(connection.ws)
+            await connection.stack.aclose()
+            raise
+        if connection.ws in self._discarded:
+            self._discarded.remove(connection.ws)
+            self._stats['discarded'] += 1
+            await connection.stack.aclose()
+            return
+        connection.last_used = time.monotonic()
+        self._idle[user].append(connection)
+
+    def discard(self, ws: AsyncBaseWS):
+        """標記一條取出中的連線，`connection` 區塊結束時關閉而不歸還
+
+        測試失敗不會讓例外拋進 `connection` 的區塊 (例如 pytest fixture 的 yield)，
+        呼叫端要自行判斷並以此標記，連線才不會帶著失敗測試留下的狀態被下個測試重用。
+
+        Args:
+            ws: 由 `connection` 取出、尚未歸還的連線。
+        """
+        self._discarded.add(ws)
+
+    def stats(self) -> dict:
+        """回傳目前的統計
+
+        Returns:
+            包含 created (新開的連線)、reused (重用的次數)、expired (因閒置或壽命到期而關閉)、
+            unhealthy (健康檢查失敗而關閉)、discarded (被 `discard` 標記而關閉)、
+            drained_messages (取出時丟棄的殘留訊息數) 與
+            idle (目前閒置的連線數) 的 dict。
+        """
+        return {**self._stats, 'idle': sum(len(connections) for connections in self._idle.values())}
+
+    async def close(self):
+        """關閉所有閒置的連線"""
+        for connections in self._idle.values():
+            while connections:
+                await connections.popleft().stack.aclose()
+
+    async def _reuse(self, user: User) -> _Connection | None:
+        """取出該使用者一條可用的閒置連線，沿途關閉過期或不健康的連線"""
+        connections = self._idle[user]
+        while connections:
+            # 先移出再檢查：檢查期間會交出控制權
+            connection = connections.pop()
+            now = time.monotonic()
+            if now - connection.last_used > self.idle_timeout or now - connection.created_at > self.max_lifetime:
+                self._stats['expired'] += 1
+                await connection.stack.aclose()
+                continue
+            self._stats['drained_messages'] += connection.ws.drain_messages()
+            if not await self._healthy(connection.ws):
+                self._stats['unhealthy'] += 1
+                await connection.stack.aclose()
+                continue
+            self._stats['reused'] += 1
+            return connection
+        return None
+
+    async def _healthy(self, ws: AsyncBaseWS) -> bool:
+        if not ws.is_alive:
+            return False
+        if ws.has_pending_replies:
+            # 遲到的回應會先被當成之後同種請求的回應丟棄，不能交給下個測試
+            logger.warning('重用的 WS 連線還有逾時請求的回應未到，改開新連線')
+            return False
+        try:
+            await ws.ping(self.ping_timeout)
+        except TimeoutError:
+            logger.warning('重用的 WS 連線在 %s 秒內沒有回應 ping，改開新連線', self.ping_timeout)
+            return False
+        return True
+
+    async def _open(self, user: User) -> _Connection:
+        stack = AsyncExitStack()
+        ws = await stack.enter_async_context(AsyncBaseWS(await self._ws_url_for(user)))
+        self._stats['created'] += 1
+        return _Connection(ws=ws, stack=stack)
@@ -0,0 +1,164 @@
+"""把 WebSocket 連線上收送的原始 frame 錄成二進位紀錄檔，供 `scripts/ws_replay.py` 離線重播
+
+`--ws-record PATH` 時，整個 API 測試期間所有 `AsyncBaseWS` 連線的開啟、送出與收到的 frame、
+關閉都依發生順序附加到同一個檔案。frame 以線路上的原始位元組 (含壓縮旗標) 儲存，
+不經解碼，錄製本身幾乎不增加成本；重播時由 `read_records` 依序讀回。
+
+檔案格式: 開頭是 `MAGIC`，之後每筆紀錄是固定長度的 header (big-endian) 加上內容:
+
+- timestamp (float64): 自錄製開始起的 `time.monotonic` 秒數
+- connection_id (uint32): 同一份紀錄中從 1 起依開啟順序編號
+- kind (uint8): 見 `RECORD_KINDS`
+- length (uint32): 內容的位元組數。OPEN 的內容是連線的路徑 (不含 query，登入 token 不會寫入)，
+  SEND / RECV 是原始 frame，CLOSE 沒有內容
+
+錄製中斷留下的不完整紀錄在讀取時略過。
+"""
+
+import itertools
+import logging
+import os
+import struct
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'WSREC\x01'
+
+OPEN, SEND, RECV, CLOSE = range(4)
+RECORD_KINDS = {OPEN: 'open', SEND: 'send', RECV: 'recv', CLOSE: 'close'}
+
+_HEADER = struct.Struct('>dIBI')
+
+
+@dataclass(frozen=True, slots=True)
+class WsRecord:
+    """紀錄檔中的一筆紀錄
+
+    Attributes:
+        timestamp: 自錄製開始起的秒數。
+        connection_id: 連線編號。
+        kind: `OPEN` / `SEND` / `RECV` / `CLOSE`。
+        data: OPEN 時為連線的路徑 (UTF-8)，SEND / RECV 時為原始 frame，CLOSE 時為空。
+    """
+
+    timestamp: float
+    connection_id: int
+    kind: int
+    data: bytes
+
+
+class WsRecorder:
+    """一份錄製中的 WS 紀錄檔
+
+    執行緒安全：不同 package 的事件迴圈可能在不同執行緒上。
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        """開啟紀錄檔
+
+        Args:
+            path: 紀錄檔的路徑，會覆蓋既有的檔案。
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'wb')
+        self._file.write(MAGIC)
+        self._start = time.monotonic()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stats = {'connections': 0, 'sent': 0, 'received': 0, 'bytes': len(MAGIC)}
+
+    def open(self, ws_url: str) -> int:
+        """記錄一條新連線
+
+        Args:
+            ws_url: 連線的 URL，只記錄路徑。
+
+        Returns:
+            此連線的編號，之後的 `record` 與 `close` 以它識別連線。
+        """
+        with self._lock:
+            connection_id = next(self._ids)
+            self._stats['connections'] += 1
+        self._write(connection_id, OPEN, urlsplit(ws_url).path.encode())
+        return connection_id
+
+    def record(self, connection_id: int, kind: int, frame: bytes):
+        """記錄一個送出 (`SEND`) 或收到 (`RECV`) 的原始 frame"""
+        self._write(connection_id, kind, frame)
+
+    def close_connection(self, connection_id: int):
+        """記錄連線關閉"""
+        self._write(connection_id, CLOSE, b'')
+
+    def stats(self) -> dict:
+        """回傳路徑、連線數、送出與收到的 frame 數與檔案大小"""
+        with self._lock:
+            return {'path': str(self.path), **self._stats}
+
+    def close(self):
+        """關閉紀錄檔"""
+        with self._lock:
+            self._file.close()
+        logger.info('WS 紀錄已寫入 %s => %s', self.path, self._stats)
+
+    def _write(self, connection_id: int, kind: int, data: bytes):
+        header = _HEADER.pack(time.monotonic() - self._start, connection_id, kind, len(data))
+        with self._lock:
+            if self._file.closed:
+                # 紀錄檔關閉後才結束的連線 (例如 package 結束時才歸還的連線) 不再記錄
+                return
+            self._file.write(header)
+            self._file.write(data)
+            self._stats['bytes'] += len(header) + len(data)
+            if kind == SEND:
+                self._stats['sent'] += 1
+            elif kind == RECV:
+                self._stats['received'] += 1
+
+
+def read_records(path: str | os.PathLike) -> Iterator[WsRecord]:
+    """依錄製順序讀出紀錄檔中的所有紀錄
+
+    Args:
+        path: 紀錄檔的路徑。
+
+    Yields:
+        每一筆 `WsRecord`。
+
+    Raises:
+        ValueError: 如果檔案不是 WS 紀錄檔。
+    """
+    content = Path(path).read_bytes()
+    if not content.startswith(MAGIC):
+        raise ValueError(f'{path} 不是 WS 紀錄檔')
+    view = memoryview(content)
+    offset = len(MAGIC)
+    while offset + _HEADER.size <= len(content):
+        timestamp, connection_id, kind, length = _HEADER.unpack_from(content, offset)
+        start = offset + _HEADER.size
+        if start + length > len(content):
+            logger.warning('%s 結尾有不完整的紀錄，已略過', path)
+            return
+        yield WsRecord(timestamp, connection_id, kind, bytes(view[start : start + length]))
+        offset = start + length
+
+
+_recorder: WsRecorder | None = None
+
+
+def set_ws_recorder(recorder: WsRecorder | None):
+    """設定之後建立的 `AsyncBaseWS` 預設使用的紀錄檔 (由 conftest.py 呼叫)，None 表示停止錄製"""
+    global _recorder
+    _recorder = recorder
+
+
+def current_ws_recorder() -> WsRecorder | None:
+    """回傳目前預設的紀錄檔，未錄製時為 None"""
+    return _recorder
@@ -0,0 +1,157 @@
+"""量測每個 WebSocket 請求的往返耗時，並彙整成依 (op_code, sub_code) 的統計
+
+`AsyncBaseWS.send_and_receive` 從送出請求到收到配對的回應，以 `time.perf_counter` 計時後
+呼叫 `record_ws_timing`；等不到回應時呼叫 `record_ws_timeout`。沒有 `send_and_receive` 在等待的
+訊息依來源分開計數，才不會混在一起:
+
+- 逾時後才到的回應: `record_ws_late`，記在原本請求 (C2S) 的名稱下，與該請求的逾時數並列
+- 伺服器主動推送 (目前只有連線時的初始訊息): `record_ws_push`，記在推送訊息 (S2C) 的名稱下
+- 其他無從對應的訊息: `record_ws_unexpected`，記在收到的訊息 (S2C) 的名稱下
+
+統計以訊息名稱彙整，例如 'C2SPlayerFlow.UpdateName'，名稱由 `api/ws_constants.py` 的 Enum 解析
+(見 `message_name`)，測試結束時由 `ws_timing_summary` 產生，可跨版本比較同一種請求是否變慢。
+"""
+
+import threading
+from collections import defaultdict
+
+from api.ws_constants import SUB_CODE_ENUMS, OpCode
+from utils.http_timing import PERCENTILES, percentile
+
+# 直方圖各區間的上界 (毫秒)，最後另有一個無上界的區間
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def message_name(op_code: int, sub_code: int | None) -> str:
+    """把 op_code 與 sub_code 轉成名稱，例如 'C2SPlayerFlow.UpdateName'
+
+    不在 Enum 中的值保留數字，例如 'C2SPlayerFlow.99'、'42'。
+    """
+    try:
+        op = OpCode(op_code)
+    except ValueError:
+        return str(op_code) if sub_code is None else f'{op_code}.{sub_code}'
+    if sub_code is None:
+        return op.name
+    sub_enum = SUB_CODE_ENUMS.get(op)
+    try:
+        return f'{op.name}.{sub_enum(sub_code).name}'
+    except (TypeError, ValueError):
+        return f'{op.name}.{sub_code}'
+
+
+def _histogram(ordered_ms: list[float]) -> dict[str, int]:
+    """把已排序的耗時 (毫秒) 分到 `HISTOGRAM_BOUNDS_MS` 的區間中，只列出有樣本的區間"""
+    histogram = {}
+    index = 0
+    for bound in HISTOGRAM_BOUNDS_MS:
+        start = index
+        while index < len(ordered_ms) and ordered_ms[index] <= bound:
+            index += 1
+        if index > start:
+            histogram[f'<={bound}ms'] = index - start
+    if index < len(ordered_ms):
+        histogram[f'>{HISTOGRAM_BOUNDS_MS[-1]}ms'] = len(ordered_ms) - index
+    return histogram
+
+
+class WsTimingCollector:
+    """依訊息名稱累積往返耗時、逾時、遲到的回應、推送與非預期訊息數，於測試結束時產生統計
+
+    執行緒安全：不同 package 的事件迴圈可能在不同執行緒上。
+    """
+
+    def __init__(self):
+        self._samples: defaultdict[str, list[float]] = defaultdict(list)
+        self._timeouts: defaultdict[str, int] = defaultdict(int)
+        self._late: defaultdict[str, int] = defaultdict(int)
+        self._pushed: defaultdict[str, int] = defaultdict(int)
+        self._unexpected: defaultdict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, name: str, elapsed: float):
+        with self._lock:
+            self._samples[name].append(elapsed)
+
+    def add_timeout(self, name: str):
+        with self._lock:
+            self._timeouts[name] += 1
+
+    def add_late(self, name: str):
+        with self._lock:
+            self._late[name] += 1
+
+    def add_pushed(self, name: str):
+        with self._lock:
+            self._pushed[name] += 1
+
+    def add_unexpected(self, name: str):
+        with self._lock:
+            self._unexpected[name] += 1
+
+    def summary(self) -> dict[str, dict]:
+        """產生依訊息名稱的統計
+
+        Returns:
+            訊息名稱到統計的對應，依名稱排序。每個名稱含 count (收到回應的請求數)、timeouts、
+            late (逾時後才收到回應的請求數)、pushed (伺服器主動推送的此種訊息數)、unexpected
+            (無從對應而收到的此種訊息數)；有回應時另含 ms (p50 / p95 / p99 / max) 與 histogram
+            (見 `HISTOGRAM_BOUNDS_MS`)。
+        """
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+            timeouts = dict(self._timeouts)
+            late = dict(self._late)
+            pushed = dict(self._pushed)
+            unexpected = dict(self._unexpected)
+        result = {}
+        for name in sorted({*samples, *timeouts, *late, *pushed, *unexpected}):
+            ordered_ms = sorted(value * 1000 for value in samples.get(name, ()))
+            stats = {
+                'count': len(ordered_ms),
+                'timeouts': timeouts.get(name, 0),
+                'late': late.get(name, 0),
+                'pushed': pushed.get(name, 0),
+                'unexpected': unexpected.get(name, 0),
+            }
+            if ordered_ms:
+                stats['ms'] = {
+                    **{f'p{p}': round(percentile(ordered_ms, p), 3) for p in PERCENTILES},
+                    'max': round(ordered_ms[-1], 3),
+                }
+                stats['histogram'] = _histogram(ordered_ms)
+            result[name] = stats
+        return result
+
+
+_collector = WsTimingCollector()
+
+
+def record_ws_timing(op_code: int, sub_code: int | None, elapsed: float):
+    """記錄一個請求從送出到收到回應的耗時 (秒)"""
+    _collector.add(message_name(op_code, sub_code), elapsed)
+
+
+def record_ws_timeout(op_code: int, sub_code: int | None):
+    """記錄一個等不到回應的請求"""
+    _collector.add_timeout(message_name(op_code, sub_code))
+
+
+def record_ws_late(op_code: int, sub_code: int | None):
+    """記錄一個已逾時的請求在逾時後才收到回應，op_code / sub_code 為請求 (而非回應) 的值"""
+    _collector.add_late(message_name(op_code, sub_code))
+
+
+def record_ws_push(op_code: int, sub_code: int | None):
+    """記錄一則伺服器主動推送的訊息"""
+    _collector.add_pushed(message_name(op_code, sub_code))
+
+
+def record_ws_unexpected(op_code: int, sub_code: int | None):
+    """記錄一則沒有 `send_and_receive` 在等待、也無從對應到請求或推送的訊息"""
+    _collector.add_unexpected(message_name(op_code, sub_code))
+
+
+def ws_timing_summary() -> dict[str, dict]:
+    """回傳本次執行所有 WS 請求的依訊息名稱統計，見 `WsTimingCollector.summary`"""
+    return _collector.summary()